@@ -0,0 +1,102 @@
+"""
+Consistency checks for the trigger-maintained product_totals table.
+
+product_totals holds the expense count and total per product so reports
+do not have to sum the expenses table. Triggers on expenses keep it up
+to date (see migration 3); these helpers find and repair drift, e.g.
+after rows were changed with the triggers dropped.
+"""
+from contextlib import contextmanager
+import cache
+import search
+
+# Product ids covered by one rebuild transaction
+PRODUCTS_PER_BATCH = 1000
+
+_DRIFT_QUERY = """
+    SELECT a.product_id, t.expense_count, t.expense_total_cents, a.expense_count, a.expense_total_cents
+    FROM (
+        SELECT product_id, COUNT(*) AS expense_count, SUM(amount_cents) AS expense_total_cents
+        FROM expenses GROUP BY product_id
+    ) AS a
+    LEFT JOIN product_totals AS t ON t.product_id = a.product_id
+    WHERE t.product_id IS NULL
+       OR t.expense_count != a.expense_count
+       OR t.expense_total_cents != a.expense_total_cents
+    UNION ALL
+    SELECT t.product_id, t.expense_count, t.expense_total_cents, 0, 0
+    FROM product_totals AS t
+    WHERE (t.expense_count != 0 OR t.expense_total_cents != 0)
+      AND NOT EXISTS (SELECT 1 FROM expenses AS e WHERE e.product_id = t.product_id)
+"""
+
+
+def find_drift(db):
+    """Return (product_id, stored_count, stored_total, actual_count, actual_total)
+    for every product whose stored totals do not match its expenses."""
+    return db.fetch_all(_DRIFT_QUERY)
+
+
+def rebuild(db, products_per_batch=PRODUCTS_PER_BATCH):
+    """Recompute product_totals from expenses, one range of product ids per
+    transaction so the write lock is never held for the whole table."""
+    max_id = db.fetch_one("""
+        SELECT MAX(COALESCE((SELECT MAX(product_id) FROM expenses), 0),
+                   COALESCE((SELECT MAX(product_id) FROM product_totals), 0))
+    """)[0]
+    for low in range(0, max_id + 1, products_per_batch):
+        high = low + products_per_batch - 1
+        with db.transaction():
+            db.execute_query("DELETE FROM product_totals WHERE product_id BETWEEN ? AND ?", (low, high))
+            db.execute_query("""
+                INSERT INTO product_totals (product_id, expense_count, expense_total_cents)
+                SELECT product_id, COUNT(*), SUM(amount_cents) FROM expenses
+                WHERE product_id BETWEEN ? AND ?
+                GROUP BY product_id
+            """, (low, high))
+    cache.clear(db)
+
+
+# Per-row insert triggers on expenses that bulk inserts drop, each with the
+# statement that covers the rows inserted after id ? in one go
+_DEFERRED_TRIGGERS = [
+    ("trg_expenses_totals_insert", """
+        INSERT INTO product_totals (product_id, expense_count, expense_total_cents)
+        SELECT product_id, COUNT(*), SUM(amount_cents) FROM expenses
+        WHERE id > ?
+        GROUP BY product_id
+        ON CONFLICT (product_id) DO UPDATE SET
+            expense_count = expense_count + excluded.expense_count,
+            expense_total_cents = expense_total_cents + excluded.expense_total_cents
+    """),
+    (search.EXPENSES_INSERT_TRIGGER, search.CATCH_UP),
+]
+
+
+@contextmanager
+def deferred_triggers(db):
+    """Bulk-insert expenses with the per-row totals and search triggers deferred.
+
+    The block runs in one transaction with trg_expenses_totals_insert and
+    trg_expenses_search_insert dropped; on the way out the rows inserted by
+    the block are added to product_totals with a single grouped statement,
+    indexed for search with a single INSERT ... SELECT, and the triggers are
+    recreated, all before the commit. Only inserts are covered: deleting or
+    updating expenses inside the block would leave the totals stale.
+    """
+    with db.transaction():
+        deferred = []
+        for name, catch_up in _DEFERRED_TRIGGERS:
+            trigger = db.fetch_one("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+            if trigger is not None:
+                deferred.append((name, trigger[0], catch_up))
+        if not deferred:
+            yield db
+            return
+        last_id = db.fetch_one("SELECT COALESCE(MAX(id), 0) FROM expenses")[0]
+        for name, _, _ in deferred:
+            db.execute_query(f"DROP TRIGGER {name}")
+        yield db
+        for _, trigger_sql, catch_up in deferred:
+            db.execute_query(catch_up, (last_id,))
+            db.execute_query(trigger_sql)
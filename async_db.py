@@ -0,0 +1,196 @@
+"""
+asyncio facade over Database and the product and expense services.
+
+Every call runs the blocking sqlite3 work on a dedicated thread pool sized
+to the connection pool (one thread per reader plus one for the writer), so
+the event loop never blocks and any number of coroutines can await reports
+at once; excess calls queue for a thread instead of for a connection.
+Streams from iter_query hold a reader for their whole iteration, so they
+run on a pool of their own with one reader fewer than the connection pool:
+however many streams are open, plain awaits still find a thread and a
+reader.
+
+    adb = await AsyncDatabase.open("business_tracker.db")
+    rows = await adb.fetch_all("SELECT ...", params)
+    async for row in adb.iter_query("SELECT ..."):
+        ...
+    await AsyncExpense(adb, user_id, product_id).add_expenses([("Bottle", Money(250))])
+    await adb.close()
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from database import Database
+from services import ExpenseService, ProductService
+
+# Batches handed from the worker thread to an async iteration in advance
+ITER_PREFETCH = 2
+
+
+class AsyncDatabase:
+    def __init__(self, db, max_workers=None):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or db.pool.max_readers + 1,
+                                           thread_name_prefix="xpence-db")
+        self.stream_executor = ThreadPoolExecutor(max_workers=max(db.pool.max_readers - 1, 1),
+                                                  thread_name_prefix="xpence-stream")
+
+    @classmethod
+    async def open(cls, path="business_tracker.db", max_workers=None, **kwargs):
+        """Open (and migrate) a Database without blocking the event loop."""
+        db = await asyncio.get_running_loop().run_in_executor(None, functools.partial(Database, path, **kwargs))
+        return cls(db, max_workers)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking call on the database threads and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def close(self):
+        await self.run(self.db.close)
+        self.executor.shutdown(wait=True)
+        self.stream_executor.shutdown(wait=True)
+
+    async def execute_query(self, query, params=()):
+        return await self.run(self.db.execute_query, query, params)
+
+    async def executemany(self, query, seq_of_params):
+        # The rows are materialized first so the worker thread does not
+        # consume a generator owned by the event loop
+        return await self.run(self._executemany, query, list(seq_of_params))
+
+    def _executemany(self, query, rows):
+        with self.db.transaction():
+            return self.db.executemany(query, rows)
+
+    async def in_transaction(self, fn, *args, **kwargs):
+        """Run ``fn(db, *args, **kwargs)`` inside one transaction on a worker thread."""
+        return await self.run(self._in_transaction, fn, *args, **kwargs)
+
+    def _in_transaction(self, fn, *args, **kwargs):
+        with self.db.transaction():
+            return fn(self.db, *args, **kwargs)
+
+    async def fetch_one(self, query, params=(), row_type=None):
+        return await self.run(self.db.fetch_one, query, params, row_type)
+
+    async def fetch_all(self, query, params=(), row_type=None):
+        return await self.run(self.db.fetch_all, query, params, row_type)
+
+    async def fetch_page(self, query, params=(), after_id=None, before_id=None, **kwargs):
+        return await self.run(self.db.fetch_page, query, params, after_id, before_id, **kwargs)
+
+    async def iter_query(self, query, params=(), batch_size=1000, row_type=None):
+        """Stream rows like Database.iter_query.
+
+        One stream thread runs the query and hands over batches of rows
+        through a bounded queue, so memory stays at a few batches and a slow
+        consumer pauses the thread instead of buffering the whole result.
+        Streams beyond the stream threads wait for one to finish. Wrap the
+        iteration in contextlib.aclosing() when it may stop early, so the
+        thread and its reader connection are released right away.
+        """
+        if not self.db.pool.max_readers:
+            # The stream would hold the only connection and every other
+            # await would wait for it
+            raise ValueError("Streaming needs a database file; "
+                             "an in-memory database has only the writer connection.")
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue(maxsize=ITER_PREFETCH)
+        cancelled = False
+
+        def hand_over(item):
+            # Blocks this worker while the queue is full
+            if not cancelled:
+                asyncio.run_coroutine_threadsafe(batches.put(item), loop).result()
+
+        def produce():
+            # The iteration stays on this thread, which holds the reader
+            # connection for its whole lifetime
+            rows = self.db.iter_query(query, params, batch_size, row_type)
+            try:
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) == batch_size:
+                        if cancelled:
+                            return
+                        hand_over(batch)
+                        batch = []
+                hand_over(batch)
+                hand_over(None)
+            except BaseException as e:
+                hand_over(e)
+            finally:
+                rows.close()
+
+        producer = loop.run_in_executor(self.stream_executor, produce)
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+                for row in batch:
+                    yield row
+        finally:
+            # Stopped early: keep draining until the worker notices and exits,
+            # so it is never left blocked on a full queue
+            cancelled = True
+            # A stream still waiting for a thread never starts
+            producer.cancel()
+            while not producer.done():
+                while not batches.empty():
+                    batches.get_nowait()
+                await asyncio.wait({producer}, timeout=0.01)
+
+
+# Async counterparts of the ProductService operations for one user
+class AsyncProduct:
+    def __init__(self, adb, user_id):
+        self.adb = adb
+        self.user_id = user_id
+        self.service = ProductService(adb.db)
+
+    async def fetch_page(self, after_id=None, before_id=None):
+        return await self.adb.run(self.service.list, self.user_id, after_id, before_id)
+
+    async def add_product(self, name, price):
+        return await self.adb.run(self.service.add, self.user_id, name, price)
+
+    async def remove_product(self, product_id):
+        return await self.adb.run(self.service.remove, self.user_id, product_id)
+
+    async def fetch_dashboard(self, sort_by="margin", descending=True):
+        return await self.adb.run(self.service.dashboard, self.user_id, sort_by, descending)
+
+    async def simulate_scenarios(self, grid):
+        return await self.adb.run(self.service.simulate_scenarios, self.user_id, grid)
+
+
+# Async counterparts of the ExpenseService operations for one product of the user
+class AsyncExpense:
+    def __init__(self, adb, user_id, product_id):
+        self.adb = adb
+        self.user_id = user_id
+        self.product_id = product_id
+        self.service = ExpenseService(adb.db)
+
+    async def fetch_page(self, after_id=None, before_id=None):
+        return await self.adb.run(self.service.list, self.user_id, self.product_id, after_id, before_id)
+
+    async def add_expense(self, name, amount):
+        return await self.adb.run(self.service.add, self.user_id, self.product_id, name, amount)
+
+    async def add_expenses(self, expenses):
+        return await self.adb.run(self.service.add_many, self.user_id, self.product_id, list(expenses))
+
+    async def remove_expense(self, expense_id):
+        return await self.adb.run(self.service.remove, self.user_id, self.product_id, expense_id)
+
+    async def report(self):
+        return await self.adb.run(self.service.report, self.user_id, self.product_id)
+
+    async def simulate_profit(self, quantity):
+        return await self.adb.run(self.service.simulate_profit, self.user_id, self.product_id, quantity)
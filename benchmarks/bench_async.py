@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from async_db import AsyncDatabase, AsyncExpense
+from database import Database
+
+
+def setup_database(path, products, expenses):
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+    with db.transaction():
+        db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                       ((1, f"Product {i}", 1000 + i) for i in range(products)))
+        db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                       ((i % products + 1, f"Expense {i}", 100 + i % 900) for i in range(expenses)))
+    db.close()
+
+
+async def measure_loop_lag(stop, lags, interval=0.005):
+    # How late a 5 ms timer fires shows whether anything blocks the loop
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_level(adb, concurrency, requests, products):
+    async def client(offset):
+        for i in range(offset, requests, concurrency):
+            await AsyncExpense(adb, 1, i % products + 1).report()
+
+    stop, lags = asyncio.Event(), []
+    ticker = asyncio.create_task(measure_loop_lag(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[client(offset) for offset in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return requests / elapsed, max(lags, default=0.0)
+
+
+async def run(path, args):
+    adb = await AsyncDatabase.open(path)
+    rows = []
+    for concurrency in args.concurrency:
+        requests = max(args.requests, concurrency)
+        rows.append((concurrency, *await run_level(adb, concurrency, requests, args.products)))
+    await adb.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async report requests per second at increasing concurrency")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"ASYNC REPORT BENCHMARK ({args.expenses:,} expenses)".center(80))
+    print("=" * 80)
+    print(f"{'Coroutines':>12} {'Requests/s':>14} {'Max loop lag ms':>18}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "async.db")
+        setup_database(path, args.products, args.expenses)
+        for concurrency, per_second, lag in asyncio.run(run(path, args)):
+            print(f"{concurrency:>12,} {per_second:>14,.0f} {lag * 1000:>18.1f}")
+    print("-" * 80)
+
+
+if __name__ == "__main__":
+    main()
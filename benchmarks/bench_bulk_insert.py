@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import time
+from database import Database, PROFILES
+from expense import Expense
+from money import Money
+
+
+def setup_database(path, profile):
+    db = Database(path, profile=profile)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+    db.execute_query("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)", (1, "Bench Product", 10000))
+    return db
+
+
+def bench_per_row_commit(db, rows):
+    """Old path: one execute_query (and one commit) per expense"""
+    start = time.perf_counter()
+    for i in range(rows):
+        db.execute_query("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)", (1, f"Expense {i}", 125))
+    return time.perf_counter() - start
+
+
+def bench_bulk_insert(db, rows):
+    """New path: Expense.add_expenses, one executemany inside one transaction"""
+    expenses = [(f"Expense {i}", Money(125)) for i in range(rows)]
+    start = time.perf_counter()
+    Expense(db, 1, 1).add_expenses(expenses)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rows per second for bulk expense inserts")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="balanced")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, bench in [("per-row commit (before)", bench_per_row_commit),
+                             ("executemany + transaction (after)", bench_bulk_insert)]:
+            db = setup_database(os.path.join(tmp, f"{bench.__name__}.db"), args.profile)
+            elapsed = bench(db, args.rows)
+            db.close()
+            results.append((label, elapsed))
+
+    print("=" * 80)
+    print(f"BULK INSERT BENCHMARK ({args.rows:,} expenses, {args.profile} profile)".center(80))
+    print("=" * 80)
+    print(f"{'Method':<40} {'Seconds':>12} {'Rows/sec':>15}")
+    print("-" * 80)
+    for label, elapsed in results:
+        print(f"{label:<40} {elapsed:>12.3f} {args.rows / elapsed:>15,.0f}")
+    print("-" * 80)
+    print(f"Speedup: {results[0][1] / results[1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import tempfile
+import time
+import cache
+import datagen
+from database import Database
+from services import ProductService, ExpenseService
+
+USERS = 5
+PRODUCTS_PER_USER = 100
+
+
+def menu_session(db, rounds, write_every, seed=0):
+    # What main_menu does: list the products, pick one, look at its report;
+    # every write_every rounds an expense is added to the product
+    rng = random.Random(seed)
+    products, expenses = ProductService(db), ExpenseService(db)
+    start = time.perf_counter()
+    for n in range(1, rounds + 1):
+        user_id = rng.randint(1, USERS)
+        page = products.list(user_id)
+        product_id = rng.choice(page.rows).id
+        expenses.report(user_id, product_id)
+        if write_every and n % write_every == 0:
+            expenses.add(user_id, product_id, "Benchmark expense", "1.25")
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product list and report reads with and without the cache")
+    parser.add_argument("--expenses", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"READ CACHE BENCHMARK ({args.expenses:,} expenses, {args.rounds:,} menu rounds)".center(80))
+    print("=" * 80)
+    print(f"{'Writes':<22} {'No cache r/s':>13} {'Cache r/s':>11} {'Speedup':>8} {'Hit rate':>9} {'Cache KiB':>10}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "cache.db"))
+        datagen.generate(db, users=USERS, products_per_user=PRODUCTS_PER_USER, expenses=args.expenses)
+        for label, write_every in [("none", 0), ("1 in 10 rounds", 10), ("every round", 1)]:
+            plain = menu_session(db, args.rounds, write_every)
+            read_cache = cache.enable(db)
+            cached = menu_session(db, args.rounds, write_every)
+            stats = read_cache.stats()
+            cache.disable(db)
+            print(f"{label:<22} {plain:>13,.0f} {cached:>11,.0f} {cached / plain:>7.1f}x {stats['hit_rate']:>9.0%} "
+                  f"{stats['bytes'] / 1024:>10,.0f}")
+        db.close()
+    print("-" * 80)
+    print("A round lists one page of a user's products and reads one product report. Each")
+    print("hit still checks PRAGMA data_version, so writes by other processes are noticed.")
+
+
+if __name__ == "__main__":
+    main()
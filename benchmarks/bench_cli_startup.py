@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from database import Database
+from services import ProductService
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Commands timed as fresh processes, as a script or cron job would run them
+COMMANDS = [
+    ("python -c pass", ["-c", "pass"]),
+    ("cli.py --help", ["cli.py", "--help"]),
+    ("cli.py report --json", ["cli.py", "--db", "{db}", "--user", "bench", "report", "--json"]),
+    ("cli.py report (table)", ["cli.py", "--db", "{db}", "--user", "bench", "report"]),
+    ("main.py report --json", ["main.py", "--db", "{db}", "--user", "bench", "report", "--json"]),
+]
+
+
+def time_process(argv, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall-clock time of one-shot CLI commands, process start to exit")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--products", type=int, default=50)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("CLI STARTUP BENCHMARK".center(80))
+    print("=" * 80)
+    print(f"{'Command':<30} {'min ms':>10} {'median ms':>12} {'max ms':>10}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cli.db")
+        db = Database(path)
+        db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "unused"))
+        products = ProductService(db)
+        for i in range(args.products):
+            products.add(1, f"Product {i}", f"{i + 1}.00")
+        db.close()
+        for label, argv in COMMANDS:
+            timings = time_process([part.format(db=path) for part in argv], args.runs)
+            print(f"{label:<30} {min(timings) * 1000:>10.1f} {statistics.median(timings) * 1000:>12.1f} "
+                  f"{max(timings) * 1000:>10.1f}")
+    print("-" * 80)
+    print("cli.py imports colorama/Ui only for tables; main.py loads the menus before delegating.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import tempfile
+import time
+from database import Database
+from product import Product, DASHBOARD_SORT_KEYS
+
+TARGET_MS = 50
+
+
+def fill(db, products, expenses):
+    rng = random.Random(7)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+    with db.transaction():
+        db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                       ((1, f"Product {i}", rng.randint(100, 100_000)) for i in range(products)))
+        db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                       ((rng.randint(1, products), f"Expense {i}", rng.randint(1, 500)) for i in range(expenses)))
+
+
+def per_product_reports(db, user_id):
+    """The old way: list products, then two report queries per product"""
+    rows = []
+    for prod_id, name, price in db.fetch_all("SELECT id, name, price_cents FROM products WHERE user_id = ?", (user_id,)):
+        price = db.fetch_one("SELECT price_cents FROM products WHERE id = ?", (prod_id,))[0]
+        total = db.fetch_one("SELECT SUM(amount_cents) FROM expenses WHERE product_id = ?", (prod_id,))[0] or 0
+        rows.append((prod_id, name, price, total, price - total))
+    return rows
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product dashboard latency")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--expenses", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "dashboard.db"))
+        fill(db, args.products, args.expenses)
+        product_manager = Product(db, 1)
+
+        print("=" * 80)
+        print(f"DASHBOARD BENCHMARK ({args.products:,} products, {args.expenses:,} expenses)".center(80))
+        print("=" * 80)
+        print(f"{'Method':<40} {'Best ms':>12} {'Target':>12}")
+        print("-" * 80)
+        failed = False
+        for sort_by in DASHBOARD_SORT_KEYS:
+            ms = timed(lambda: product_manager.fetch_dashboard(sort_by), args.repeat)
+            failed |= ms > TARGET_MS
+            print(f"{'fetch_dashboard(' + repr(sort_by) + ')':<40} {ms:>12.2f} {'<' + str(TARGET_MS) + ' ms':>12}")
+        ms = timed(lambda: per_product_reports(db, 1), 1)
+        print(f"{'per-product reports (before)':<40} {ms:>12.2f} {'-':>12}")
+        db.close()
+    print("=" * 80)
+    print("FAIL: dashboard over target" if failed else "PASS: dashboard under target")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+import simulation
+from database import Database
+from exporter import Exporter
+
+
+def seed(path, rows, products):
+    db = Database(path, profile="fast")
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+    db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                   [(1, f"Product {i}", 10000) for i in range(products)])
+    with db.transaction():
+        db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                       ((i % products + 1, f"Expense {i}", i % 9973 + 1) for i in range(rows)))
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export throughput and peak Python memory by table size")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--products", type=int, default=100)
+    args = parser.parse_args()
+    formats = ["csv", "jsonl"] + (["npy"] if simulation.numpy_available() else [])
+
+    print("=" * 80)
+    print("EXPORT BENCHMARK (expenses table)".center(80))
+    print("=" * 80)
+    print(f"{'Rows':>10} {'Format':<8} {'Seconds':>10} {'Rows/s':>12} {'Peak MiB':>10} {'Output MiB':>12}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            db = seed(os.path.join(tmp, f"export-{rows}.db"), rows, args.products)
+            for fmt in formats:
+                destination = os.path.join(tmp, f"expenses-{rows}" + ("" if fmt == "npy" else f".{fmt}"))
+                start = time.perf_counter()
+                stats = Exporter(db, 1).export("expenses", destination, fmt=fmt)
+                elapsed = time.perf_counter() - start
+                # Memory in a second run: tracemalloc slows allocations down
+                tracemalloc.start()
+                Exporter(db, 1).export("expenses", destination, fmt=fmt)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                if fmt == "npy":
+                    size = sum(os.path.getsize(os.path.join(destination, f)) for f in os.listdir(destination))
+                else:
+                    size = os.path.getsize(destination)
+                print(f"{stats.rows:>10} {fmt:<8} {elapsed:>10.2f} {stats.rows / elapsed:>12,.0f} "
+                      f"{peak / 2**20:>10.1f} {size / 2**20:>12.1f}")
+            db.close()
+    print("-" * 80)
+    print("Peak memory is the Python heap during the export (tracemalloc); it stays at about")
+    print("one batch whatever the row count. npy columns are filled through memory maps.")
+
+
+if __name__ == "__main__":
+    main()
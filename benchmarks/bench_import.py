@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import tempfile
+import time
+from database import Database
+from importer import Importer, STAGES
+
+
+def write_files(tmp, rows, products):
+    csv_path = os.path.join(tmp, "expenses.csv")
+    jsonl_path = os.path.join(tmp, "expenses.jsonl")
+    with open(csv_path, "w", encoding="utf-8") as csv_file, open(jsonl_path, "w", encoding="utf-8") as jsonl_file:
+        csv_file.write("product,name,amount\n")
+        for i in range(rows):
+            product, name, amount = f"Product {i % products}", f"Expense {i}", f"{i % 997 + 1}.{i % 100:02d}"
+            csv_file.write(f"{product},{name},{amount}\n")
+            jsonl_file.write(json.dumps({"product": product, "name": name, "amount": amount}) + "\n")
+    return {"csv": csv_path, "jsonl": jsonl_path}
+
+
+def fresh_database(path, products):
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+    db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                   [(1, f"Product {i}", 10000) for i in range(products)])
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming expense import throughput, per stage")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[5_000, 20_000, 100_000])
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BULK IMPORT BENCHMARK ({args.rows} expense rows)".center(80))
+    print("=" * 80)
+    print(f"{'Format':<8} {'Batch':>8} " + " ".join(f"{stage + ' s':>10}" for stage in STAGES)
+          + f" {'Total s':>9} {'Rows/s':>12}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_files(tmp, args.rows, args.products)
+        for fmt, source in files.items():
+            for batch_size in args.batch_sizes:
+                db = fresh_database(os.path.join(tmp, f"{fmt}-{batch_size}.db"), args.products)
+                start = time.perf_counter()
+                stats = Importer(db, 1, batch_size=batch_size).import_expenses(source)
+                elapsed = time.perf_counter() - start
+                db.close()
+                print(f"{fmt:<8} {batch_size:>8} " + " ".join(f"{stats.timings[stage]:>10.2f}" for stage in STAGES)
+                      + f" {elapsed:>9.2f} {stats.rows / elapsed:>12,.0f}")
+    print("-" * 80)
+    print("read = file decoding and CSV/line splitting, validate = JSON decoding, product lookup")
+    print("and the ExpenseService rules, insert = executemany plus the batched totals update.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import time
+import datagen
+import instrumentation
+from database import Database
+from services import ProductService, ExpenseService
+
+
+def rate(run, seconds, rounds=3):
+    # Best of a few rounds; other load on the machine only slows a round down
+    best = 0.0
+    for _ in range(rounds):
+        calls = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds / rounds:
+            for _ in range(100):
+                run()
+            calls += 100
+        best = max(best, calls / (time.perf_counter() - start))
+    return best
+
+
+def workloads(db):
+    products, expenses = ProductService(db), ExpenseService(db)
+    return [
+        ("fetch_one by primary key", lambda: db.fetch_one("SELECT name FROM products WHERE id = ?", (7,))),
+        ("ExpenseService.report", lambda: expenses.report(1, 7)),
+        ("ProductService.list (page)", lambda: products.list(1)),
+        ("execute_query UPDATE", lambda: db.execute_query("UPDATE products SET price_cents = ? WHERE id = ?",
+                                                          (999, 7))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of statement instrumentation when off and when on")
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("INSTRUMENTATION OVERHEAD BENCHMARK".center(80))
+    print("=" * 80)
+    print(f"{'Workload':<28} {'Off ops/s':>12} {'On ops/s':>12} {'On cost':>9} {'Disabled':>12}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "instrumentation.db"))
+        datagen.generate(db, users=1, products_per_user=100, expenses=args.expenses)
+        for label, run in workloads(db):
+            off = rate(run, args.seconds)
+            instrumentation.enable(db)
+            on = rate(run, args.seconds)
+            instrumentation.disable(db)
+            disabled = rate(run, args.seconds)
+            print(f"{label:<28} {off:>12,.0f} {on:>12,.0f} {off / on - 1:>9.0%} {disabled:>12,.0f}")
+        db.close()
+    print("-" * 80)
+    print("Off and Disabled run the unmodified Database methods; the only cost of the feature")
+    print("when off is one environment lookup when a Database is opened.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from database import Database
+from expense import Expense
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024
+
+
+def walk_pages(expense_manager, pages):
+    page = expense_manager.fetch_page()
+    for _ in range(pages - 1):
+        page = expense_manager.fetch_page(after_id=page.last_id)
+
+
+def stream_all(db):
+    for _ in db.iter_query("SELECT id, name, amount_cents FROM expenses WHERE product_id = ?", (1,)):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of expense listings as the table grows")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("LISTING MEMORY BENCHMARK (expenses of one product)".center(80))
+    print("=" * 80)
+    print(f"{'Rows':>10} {'Method':<30} {'ms':>10} {'Peak KiB':>14}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            db = Database(os.path.join(tmp, f"listing_{size}.db"))
+            db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+            db.execute_query("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)", (1, "Bench", 10000))
+            with db.transaction():
+                db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                               ((1, f"Expense {i}", 125) for i in range(size)))
+            expense_manager = Expense(db, 1, 1)
+            cases = [
+                ("fetch_all (before)", lambda: db.fetch_all(
+                    "SELECT id, name, amount_cents FROM expenses WHERE product_id = ?", (1,))),
+                ("first page", lambda: expense_manager.fetch_page()),
+                ("10 pages forward", lambda: walk_pages(expense_manager, 10)),
+                ("iter_query over all rows", lambda: stream_all(db)),
+            ]
+            for label, fn in cases:
+                ms, peak = measure(fn)
+                print(f"{size:>10,} {label:<30} {ms:>10.2f} {peak:>14,.0f}")
+            db.close()
+            print("-" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import passwords
+from database import Database
+from user import User
+
+
+def login_worker(path, username, password, logins):
+    # One connection per thread; sqlite3 connections are not shared
+    db = Database(path)
+    latencies = []
+    try:
+        for _ in range(logins):
+            start = time.perf_counter()
+            if not User(db).authenticate(username, password):
+                raise RuntimeError(f"Login failed for {username}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        db.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login latency and throughput with hashed passwords")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--logins", type=int, default=10, help="logins per thread")
+    parser.add_argument("--target-ms", type=float, default=passwords.TARGET_SECONDS * 1000)
+    args = parser.parse_args()
+
+    rounds = passwords.calibrate(args.target_ms / 1000)
+    print("=" * 80)
+    print(f"LOGIN BENCHMARK (pbkdf2_sha256, {rounds} iterations)".center(80))
+    print("=" * 80)
+    print(f"{'Threads':>8} {'Logins':>8} {'p50 ms':>10} {'p99 ms':>10} {'Logins/s':>12}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "login.db")
+        db = Database(path)
+        max_threads = max(args.threads)
+        for i in range(max_threads):
+            db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)",
+                             (f"user{i}", passwords.hash_password(f"password{i}")))
+        for threads in args.threads:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                futures = [pool.submit(login_worker, path, f"user{i}", f"password{i}", args.logins)
+                           for i in range(threads)]
+                latencies = sorted(l for future in futures for l in future.result())
+            elapsed = time.perf_counter() - start
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{threads:>8} {len(latencies):>8} {statistics.median(latencies) * 1000:>10.1f} "
+                  f"{p99 * 1000:>10.1f} {len(latencies) / elapsed:>12.1f}")
+        db.close()
+    print("-" * 80)
+    print(f"hashlib releases the GIL while hashing; throughput is bounded by the {os.cpu_count()} CPU(s).")
+
+
+if __name__ == "__main__":
+    main()
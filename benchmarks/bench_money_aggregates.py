@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import tempfile
+import time
+from database import Database
+from money import Money
+
+
+def fill(db, rows, products):
+    """Same expenses stored twice: REAL dollars and INTEGER cents"""
+    db.execute_query("CREATE TABLE real_expenses (id INTEGER PRIMARY KEY, product_id INTEGER, amount REAL)")
+    db.execute_query("CREATE INDEX idx_real_product ON real_expenses (product_id, amount)")
+    rng = random.Random(42)
+    cents = [rng.randint(1, 99_999) for _ in range(rows)]
+    with db.transaction():
+        db.executemany("INSERT INTO real_expenses (product_id, amount) VALUES (?, ?)",
+                       ((1 + i % products, c / 100) for i, c in enumerate(cents)))
+        db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, '', ?)",
+                       ((1 + i % products, c) for i, c in enumerate(cents)))
+    return sum(cents)
+
+
+def timed(db, query, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = db.fetch_all(query)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate speed and exactness of REAL vs integer-cent amounts")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "money.db"))
+        exact_cents = fill(db, args.rows, args.products)
+
+        cases = [
+            ("SUM over all rows", "SELECT SUM(amount) FROM real_expenses",
+             "SELECT SUM(amount_cents) FROM expenses"),
+            ("SUM grouped by product", "SELECT product_id, SUM(amount) FROM real_expenses GROUP BY product_id",
+             "SELECT product_id, SUM(amount_cents) FROM expenses GROUP BY product_id"),
+            ("SUM for one product", "SELECT SUM(amount) FROM real_expenses WHERE product_id = 7",
+             "SELECT SUM(amount_cents) FROM expenses WHERE product_id = 7"),
+        ]
+
+        print("=" * 80)
+        print(f"MONEY AGGREGATE BENCHMARK ({args.rows:,} expenses)".center(80))
+        print("=" * 80)
+        print(f"{'Query':<28} {'REAL ms':>12} {'INTEGER ms':>12} {'Speedup':>10}")
+        print("-" * 80)
+        totals = None
+        for label, real_query, cents_query in cases:
+            real_time, real_result = timed(db, real_query, args.repeat)
+            cents_time, cents_result = timed(db, cents_query, args.repeat)
+            if totals is None:
+                totals = (real_result[0][0], cents_result[0][0])
+            print(f"{label:<28} {real_time * 1000:>12.2f} {cents_time * 1000:>12.2f} {real_time / cents_time:>9.2f}x")
+        db.close()
+
+    print("-" * 80)
+    print(f"Exact total:         {Money(exact_cents)}")
+    print(f"REAL SUM:            ${totals[0]:.6f} (off by {abs(totals[0] * 100 - exact_cents):.6f} cents)")
+    print(f"INTEGER SUM (cents): {Money(totals[1])}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from database import Database
+
+REPORT_QUERY = "SELECT COUNT(*), SUM(amount_cents) FROM expenses WHERE product_id = ?"
+
+
+def setup_database(path, products, expenses):
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+    with db.transaction():
+        db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                       ((1, f"Product {i}", 1000 + i) for i in range(products)))
+        db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                       ((i % products + 1, f"Expense {i}", 100 + i % 900) for i in range(expenses)))
+    return db
+
+
+class SharedConnection:
+    # The only way to use the old single-connection Database from threads:
+    # one connection and cursor, every query serialized behind a lock
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.cursor = self.conn.cursor()
+        self.lock = threading.Lock()
+
+    def fetch_one(self, query, params=()):
+        with self.lock:
+            self.cursor.execute(query, params)
+            return self.cursor.fetchone()
+
+    def close(self):
+        self.conn.close()
+
+
+def reads_per_second(db, threads, products, seconds):
+    deadline = time.perf_counter() + seconds
+
+    def worker(offset):
+        reads = 0
+        product_id = offset
+        while time.perf_counter() < deadline:
+            db.fetch_one(REPORT_QUERY, (product_id % products + 1,))
+            product_id += 7
+            reads += 1
+        return reads
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(worker, range(threads)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read throughput through the connection pool")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--expenses", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"CONNECTION POOL BENCHMARK ({args.expenses:,} expenses, {os.cpu_count()} CPUs)".center(80))
+    print("=" * 80)
+    print(f"{'Threads':>8} {'Shared connection + lock':>28} {'Pool (4 readers)':>20} {'Speedup':>10}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pool.db")
+        setup_database(path, args.products, args.expenses).close()
+        for threads in args.threads:
+            shared = SharedConnection(path)
+            before = reads_per_second(shared, threads, args.products, args.seconds)
+            shared.close()
+            db = Database(path)
+            after = reads_per_second(db, threads, args.products, args.seconds)
+            db.close()
+            print(f"{threads:>8} {before:>28,.0f} {after:>20,.0f} {after / before:>9.1f}x")
+    print("-" * 80)
+    print("sqlite3 releases the GIL while a statement runs, so pooled readers run in parallel on\n"
+          "separate cores; on a single core the pool only adds checkout overhead.")
+
+
+if __name__ == "__main__":
+    main()
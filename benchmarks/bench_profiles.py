@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import threading
+import time
+from database import Database, PROFILES
+
+
+def seed(path, profile, products, expenses_per_product):
+    db = Database(path, profile=profile)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("bench", "bench"))
+    with db.transaction():
+        db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                       [(1, f"Product {i}", 10000) for i in range(products)])
+        db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                       [(1 + i % products, f"Expense {i}", 150) for i in range(products * expenses_per_product)])
+    db.close()
+
+
+def writer(path, profile, products, stop, counts):
+    """Records one expense per commit, like the interactive Add Expense screen"""
+    db = Database(path, profile=profile)
+    i = 0
+    while not stop.is_set():
+        db.execute_query("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                         (1 + i % products, f"Live {i}", 200))
+        i += 1
+    counts["writes"] += i
+    db.close()
+
+
+def reader(path, profile, products, stop, counts, lock):
+    """Runs the two queries behind View Product Report in a loop"""
+    db = Database(path, profile=profile)
+    i = 0
+    while not stop.is_set():
+        product_id = 1 + i % products
+        db.fetch_one("SELECT price_cents FROM products WHERE id = ?", (product_id,))
+        db.fetch_one("SELECT SUM(amount_cents) FROM expenses WHERE product_id = ?", (product_id,))
+        i += 1
+    with lock:
+        counts["reads"] += i
+    db.close()
+
+
+def run_profile(tmp, profile, args):
+    path = os.path.join(tmp, f"{profile}.db")
+    seed(path, profile, args.products, args.expenses)
+
+    # Held open for the whole run so the WAL survives the workers closing
+    db = Database(path, profile=profile, checkpoint_interval=args.checkpoint_interval)
+    stop = threading.Event()
+    lock = threading.Lock()
+    counts = {"reads": 0, "writes": 0}
+    threads = [threading.Thread(target=writer, args=(path, profile, args.products, stop, counts))]
+    threads += [threading.Thread(target=reader, args=(path, profile, args.products, stop, counts, lock))
+                for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    wal_before = os.path.getsize(path + "-wal") if os.path.exists(path + "-wal") else 0
+    if PROFILES[profile]["journal_mode"] == "WAL":
+        db.checkpoint("TRUNCATE")
+    wal_after = os.path.getsize(path + "-wal") if os.path.exists(path + "-wal") else 0
+    db.close()
+    return counts["reads"] / args.seconds, counts["writes"] / args.seconds, wal_before, wal_after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed read/write throughput per pragma profile")
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--expenses", type=int, default=200, help="expenses per product")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--checkpoint-interval", type=float, default=None,
+                        help="run a background CheckpointManager every N seconds")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"PROFILE BENCHMARK (1 writer, {args.readers} readers, {args.seconds:.0f}s each)".center(80))
+    print("=" * 80)
+    print(f"{'Profile':<12} {'Reports/sec':>14} {'Writes/sec':>14} {'WAL before':>16} {'WAL after ckpt':>16}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in PROFILES:
+            reads, writes, wal_before, wal_after = run_profile(tmp, profile, args)
+            print(f"{profile:<12} {reads:>14,.0f} {writes:>14,.0f} {wal_before:>16,} {wal_after:>16,}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
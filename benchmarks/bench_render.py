@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import contextlib
+import time
+from colorama import Fore
+from ui import Ui
+
+
+def unbuffered_frame(headers, rows):
+    # How screens were drawn before: os.system clear plus one print per line
+    os.system('cls' if os.name == 'nt' else 'clear')
+    print(Fore.CYAN + "╒" + "═" * 58 + "╕")
+    print(Fore.CYAN + "│" + Fore.YELLOW + " LISTING ".center(58) + Fore.CYAN + "│")
+    print(Fore.CYAN + "╘" + "═" * 58 + "╛\n")
+    col_widths = [max(len(str(item)) for item in col) for col in zip(headers, *rows)]
+    header_format = "│".join([Fore.BLUE + " %-{}s ".format(w) for w in col_widths])
+    row_format = "│".join([Fore.CYAN + " %-{}s ".format(w) for w in col_widths])
+    print(Fore.BLUE + "┌" + "┬".join(["─" * (w+2) for w in col_widths]) + "┐")
+    print(Fore.BLUE + "│" + header_format % tuple(headers) + Fore.BLUE + "│")
+    print(Fore.BLUE + "├" + "┼".join(["─" * (w+2) for w in col_widths]) + "┤")
+    for row in rows:
+        print(Fore.BLUE + "│" + row_format % tuple(str(item) for item in row) + Fore.BLUE + "│")
+    print(Fore.BLUE + "└" + "┴".join(["─" * (w+2) for w in col_widths]) + "┘")
+
+
+def buffered_frame(headers, rows):
+    with Ui.screen():
+        Ui.display_header("Listing")
+        Ui.display_table(headers, rows)
+
+
+def frames_per_second(frame, headers, rows, seconds, sink):
+    frames = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        while time.perf_counter() - start < seconds:
+            frame(headers, rows)
+            frames += 1
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frames per second when redrawing a large table")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    headers = ["#", "Expense", "Amount"]
+    rows = [(i, f"Expense {i}", f"${i % 500}.{i % 100:02d}") for i in range(1, args.rows + 1)]
+
+    print("=" * 80)
+    print(f"RENDER BENCHMARK ({args.rows} row table)".center(80))
+    print("=" * 80)
+    print(f"{'Method':<50} {'Frames/s':>14}")
+    print("-" * 80)
+    # The clear command writes to the terminal directly, so point the
+    # process-level stdout at /dev/null as well as Python's
+    with open(os.devnull, "w") as sink:
+        saved = os.dup(1)
+        os.dup2(sink.fileno(), 1)
+        try:
+            results = [
+                ("per-line print + os.system clear (before)",
+                 frames_per_second(unbuffered_frame, headers, rows, args.seconds, sink)),
+                ("Ui.screen buffered write + ANSI clear",
+                 frames_per_second(buffered_frame, headers, rows, args.seconds, sink)),
+            ]
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+    for label, fps in results:
+        print(f"{label:<50} {fps:>14.1f}")
+    print("-" * 80)
+    print(f"Speedup: {results[1][1] / results[0][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import gc
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+import datagen
+from database import Database
+from rows import ExpenseRow
+
+QUERY = "SELECT id, name, amount_cents FROM expenses"
+
+# The namedtuple records the services built from tuples before rows.py
+ExpenseRecord = namedtuple("ExpenseRecord", "id name amount_cents")
+
+
+def dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def load(db, factory=None, convert=None):
+    with db.pool.reader() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = factory
+        rows = cursor.execute(QUERY).fetchall()
+        cursor.close()
+    return [convert(*row) for row in rows] if convert else rows
+
+
+SHAPES = [
+    ("tuple", lambda db: load(db), lambda row: row[2]),
+    ("tuple -> namedtuple (before)", lambda db: load(db, convert=ExpenseRecord), lambda row: row.amount_cents),
+    ("dict row_factory", lambda db: load(db, dict_row), lambda row: row["amount_cents"]),
+    ("sqlite3.Row", lambda db: load(db, sqlite3.Row), lambda row: row["amount_cents"]),
+    ("ExpenseRow (row_type)", lambda db: db.fetch_all(QUERY, row_type=ExpenseRow), lambda row: row.amount_cents),
+]
+
+
+def timed(fn, rounds):
+    # Fastest of a few rounds, with the garbage collector off as in run_benchmarks.py
+    best = None
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            del result
+    finally:
+        gc.enable()
+    return best
+
+
+def memory(fn):
+    # Bytes still held by the loaded rows, and the peak while loading
+    gc.collect()
+    tracemalloc.start()
+    rows = fn()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, held, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and speed of loading expense rows as tuples, dicts, "
+                                                 "sqlite3.Row and rows.ExpenseRow")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"ROW TYPE BENCHMARK ({args.rows:,} expense rows)".center(80))
+    print("=" * 80)
+    print(f"{'Row shape':<30} {'Load s':>8} {'B/row':>7} {'Peak B/row':>11} {'Attr ns/row':>12}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "rows.db"), profile="fast")
+        datagen.generate(db, users=1, products_per_user=100, expenses=args.rows)
+        for label, fn, attribute in SHAPES:
+            load_s = timed(lambda: fn(db), args.rounds)
+            rows, held, peak = memory(lambda: fn(db))
+            start = time.perf_counter()
+            for row in rows:
+                attribute(row)
+            access = (time.perf_counter() - start) / len(rows) * 1e9
+            print(f"{label:<30} {load_s:>8.2f} {held / len(rows):>7.0f} {peak / len(rows):>11.0f} {access:>12.1f}")
+            del rows
+        db.close()
+    print("-" * 80)
+    print("B/row counts the row objects, their values and the result list (tracemalloc).")
+    print("Load time is the fastest of the rounds, measured without tracemalloc.")
+
+
+if __name__ == "__main__":
+    main()
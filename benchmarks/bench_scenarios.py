@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+from simulation import ScenarioGrid, frange, numpy_available
+
+
+def make_products(count):
+    rng = random.Random(11)
+    return [(i, rng.randint(100, 100_000), rng.randint(0, 80_000)) for i in range(1, count + 1)]
+
+
+def timed_run(grid, products):
+    start = time.perf_counter()
+    results = grid.run(products)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="What-if scenario grid throughput")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--price-steps", type=int, default=1000)
+    parser.add_argument("--expense-steps", type=int, default=1000)
+    parser.add_argument("--max-quantity", type=int, default=1000)
+    parser.add_argument("--fallback-products", type=int, default=5,
+                        help="products to run through the pure-Python fallback for comparison")
+    args = parser.parse_args()
+
+    products = make_products(args.products)
+    grid = ScenarioGrid(range(1, args.max_quantity + 1), frange(-0.5, 0.5, args.price_steps),
+                        frange(0.5, 1.5, args.expense_steps), fixed_costs_cents=1_000_000)
+    cells = args.price_steps * args.expense_steps
+
+    print("=" * 80)
+    print(f"SCENARIO BENCHMARK ({args.price_steps}x{args.expense_steps} scenarios, "
+          f"{args.max_quantity} quantities)".center(80))
+    print("=" * 80)
+    print(f"{'Engine':<20} {'Products':>10} {'Seconds':>10} {'Scenarios/sec':>18}")
+    print("-" * 80)
+    if numpy_available():
+        elapsed, _ = timed_run(grid, products)
+        print(f"{'numpy':<20} {len(products):>10,} {elapsed:>10.2f} {cells * len(products) / elapsed:>18,.0f}")
+    grid.use_numpy = False
+    sample = products[:args.fallback_products]
+    elapsed, _ = timed_run(grid, sample)
+    print(f"{'array fallback':<20} {len(sample):>10,} {elapsed:>10.2f} {cells * len(sample) / elapsed:>18,.0f}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
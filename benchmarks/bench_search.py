@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import aggregates
+import datagen
+import search
+from database import Database
+
+USERS = 5
+PRODUCTS_PER_USER = 100
+QUERIES = ["bottle", "bott", "sh", "fruit jar", "electricity", "wax", "nothing"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def latencies(find, db, text, repeats):
+    times = []
+    for n in range(repeats):
+        start = time.perf_counter()
+        find(db, n % USERS + 1, text, search.LIMIT)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def insert_rate(db, rows, search_trigger, deferred):
+    # Rows per second for one batch, rolled back so every mode starts alike
+    start = time.perf_counter()
+    try:
+        with db.transaction():
+            if not search_trigger:
+                db.execute_query(f"DROP TRIGGER {search.EXPENSES_INSERT_TRIGGER}")
+            if deferred:
+                with aggregates.deferred_triggers(db):
+                    db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)", rows)
+            else:
+                db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)", rows)
+            elapsed = time.perf_counter() - start
+            raise _Rollback
+    except _Rollback:
+        pass
+    return len(rows) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Name search latency and the cost of keeping the index in sync")
+    parser.add_argument("--expenses", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=100_000, help="rows per bulk insert measured")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "search.db"))
+        stats = datagen.generate(db, users=USERS, products_per_user=PRODUCTS_PER_USER, expenses=args.expenses)
+
+        print("=" * 80)
+        print(f"NAME SEARCH BENCHMARK ({args.expenses:,} expenses, {args.repeats} searches per query)".center(80))
+        print("=" * 80)
+        print(f"{'Query':<14} {'Matches':>9} {'FTS p50 ms':>11} {'FTS p95 ms':>11} {'LIKE p50 ms':>12} {'Speedup':>8}")
+        print("-" * 80)
+        for text in QUERIES:
+            matches = db.fetch_one("SELECT COUNT(*) FROM expenses_search WHERE expenses_search MATCH ?",
+                                   (search.match_expression(1, text),))[0]
+            fts_p50, fts_p95 = latencies(search.find, db, text, args.repeats)
+            like_p50, _ = latencies(search._find_like, db, text, max(args.repeats // 10, 3))
+            print(f"{text:<14} {matches:>9,} {fts_p50:>11.2f} {fts_p95:>11.2f} {like_p50:>12.1f} "
+                  f"{like_p50 / fts_p50:>7.0f}x")
+
+        rng = random.Random(1)
+        product_ids = range(1, USERS * PRODUCTS_PER_USER + 1)
+        rows = [(rng.choice(product_ids), rng.choice(datagen.EXPENSE_NAMES), rng.randint(1, 10_000))
+                for _ in range(args.batch)]
+        print("-" * 80)
+        print(f"{'Bulk insert of ' + format(args.batch, ',') + ' rows':<40} {'Rows/s':>12} {'vs no index':>12}")
+        print("-" * 80)
+        baseline = insert_rate(db, rows, search_trigger=False, deferred=True)
+        for label, search_trigger, deferred in [
+            ("no search index, triggers deferred", False, True),
+            ("search index, triggers deferred", True, True),
+            ("search index, per-row triggers", True, False),
+        ]:
+            rate = baseline if not search_trigger else insert_rate(db, rows, search_trigger, deferred)
+            print(f"{label:<40} {rate:>12,.0f} {rate / baseline:>11.2f}x")
+        db.close()
+    print("-" * 80)
+    print(f"Generating the data took {stats.elapsed:.1f} s with the index built alongside. Searches")
+    print(f"are for user 1..{USERS} in turn; Matches counts user 1's expenses. LIKE is the fallback")
+    print(f"without FTS5; it stops at the first {search.LIMIT} matches, newest first, without ranking.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def start_server(path, workers):
+    # server.py in its own process on a free port; it prints the address
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--db", path, "--port", "0",
+                                "--workers", str(workers)], stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if not line.startswith("Serving on"):
+        process.kill()
+        raise SystemExit(f"server did not start: {line}")
+    return process, int(line.split()[2].rsplit(":", 1)[1])
+
+
+def call(conn, method, path, body=None, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    conn.request(method, path, body=None if body is None else json.dumps(body), headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    return response.status, json.loads(payload) if payload else None
+
+
+def prepare(host, port, products):
+    # A fresh user with some products; returns its token and product ids
+    conn = http.client.HTTPConnection(host, port)
+    username = f"loadtest-{os.getpid()}-{int(time.time())}"
+    call(conn, "POST", "/users", {"username": username, "password": "loadtest"})
+    token = call(conn, "POST", "/sessions", {"username": username, "password": "loadtest"})[1]["token"]
+    ids = [call(conn, "POST", "/products", {"name": f"Product {i}", "price": "100.00"}, token)[1]["id"]
+           for i in range(products)]
+    conn.close()
+    return token, ids
+
+
+def client(host, port, token, ids, requests, seed, latencies, errors):
+    # One clerk on one keep-alive connection: half writes, half reads
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port)
+    own = []
+    for i in range(requests):
+        product_id = rng.choice(ids)
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < 0.5:
+            status = call(conn, "POST", f"/products/{product_id}/expenses",
+                          {"name": f"Expense {seed}-{i}", "amount": "0.25"}, token)[0]
+        elif roll < 0.8:
+            status = call(conn, "GET", f"/products/{product_id}/report", token=token)[0]
+        else:
+            status = call(conn, "GET", "/dashboard", token=token)[0]
+        own.append(time.perf_counter() - start)
+        if status >= 400:
+            errors.append(status)
+    conn.close()
+    latencies.extend(own)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the HTTP API: latency percentiles and requests/s")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=16, help="worker threads of the started server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="use a running server instead of starting one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        port = args.port
+        if port is None:
+            process, port = start_server(os.path.join(tmp, "server.db"), args.workers)
+        try:
+            token, ids = prepare(args.host, port, args.products)
+            print("=" * 80)
+            print("HTTP API LOAD TEST (50% add expense, 30% report, 20% dashboard)".center(80))
+            print("=" * 80)
+            print(f"{'Clients':>8} {'Requests':>10} {'Errors':>8} {'Seconds':>9} {'Req/s':>10} "
+                  f"{'p50 ms':>9} {'p99 ms':>9} {'Max ms':>9}")
+            print("-" * 80)
+            for clients in args.clients:
+                latencies, errors = [], []
+                threads = [threading.Thread(target=client, args=(args.host, port, token, ids, args.requests,
+                                                                  n, latencies, errors))
+                           for n in range(clients)]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+                ordered = sorted(latencies)
+                print(f"{clients:>8} {len(ordered):>10} {len(errors):>8} {elapsed:>9.2f} "
+                      f"{len(ordered) / elapsed:>10,.0f} {percentile(ordered, 0.50) * 1000:>9.2f} "
+                      f"{percentile(ordered, 0.99) * 1000:>9.2f} {ordered[-1] * 1000:>9.2f}")
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    print("-" * 80)
+    print("Each client keeps one keep-alive connection and sends its next request as soon as")
+    print("the previous answer arrives. Clients and server share this machine's CPUs.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+from unittest import mock
+import datagen
+from database import Database
+from expense import Expense
+from product import Product
+from services import UserService, ProductService, ExpenseService
+from ui import Ui
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+THRESHOLDS = os.path.join(HERE, "thresholds.json")
+
+USERS = 5
+PRODUCTS_PER_USER = 100
+
+# Timed calls per benchmark at most; remove benchmarks prepare one more row
+MAX_RUNS = 1000
+
+
+# A generated database and the rows the benchmarks work on
+class Dataset:
+    def __init__(self, path, expenses, seed):
+        self.db = Database(path)
+        self.stats = datagen.generate(self.db, users=USERS, products_per_user=PRODUCTS_PER_USER,
+                                      expenses=expenses, seed=seed)
+        self.user_id = 1
+        # The busiest product of the user, so expense screens see the most rows
+        self.product_id, self.expense_count = self.db.fetch_one("""
+            SELECT t.product_id, t.expense_count FROM product_totals AS t JOIN products AS p ON p.id = t.product_id
+            WHERE p.user_id = ? ORDER BY t.expense_count DESC, t.product_id LIMIT 1
+        """, (self.user_id,)) or (self.db.fetch_one("SELECT MIN(id) FROM products")[0], 0)
+        ids = [row[0] for row in self.db.fetch_all("SELECT id FROM expenses WHERE product_id = ? ORDER BY id",
+                                                   (self.product_id,))]
+        self.middle_expense = ids[len(ids) // 2] if ids else None
+
+
+def answering(*answers):
+    # Interactive screens read their choices from these answers
+    return mock.patch("builtins.input", side_effect=list(answers))
+
+
+def bench_login(data):
+    users = UserService(data.db)
+    return lambda: users.login("user1", datagen.DEFAULT_PASSWORD)
+
+
+def bench_view_products(data):
+    product = Product(data.db, data.user_id)
+
+    def run():
+        with answering(""):
+            product.view_products()
+    return run
+
+
+def bench_view_expenses(data):
+    expense = Expense(data.db, data.user_id, data.product_id)
+
+    def run():
+        with answering(""):
+            expense.view_expenses()
+    return run
+
+
+def bench_expense_page_deep(data):
+    # Keyset paging from the middle of the busiest product
+    expense = Expense(data.db, data.user_id, data.product_id)
+    return lambda: expense.fetch_page(after_id=data.middle_expense)
+
+
+def bench_view_product_report(data):
+    return Expense(data.db, data.user_id, data.product_id).view_product_report
+
+
+def bench_simulate_profit(data):
+    expense = Expense(data.db, data.user_id, data.product_id)
+
+    def run():
+        with answering("1000"):
+            expense.simulate_profit()
+    return run
+
+
+def bench_view_dashboard(data):
+    return Product(data.db, data.user_id).view_dashboard
+
+
+def bench_add_product(data):
+    products = ProductService(data.db)
+    return lambda: products.add(data.user_id, "Benchmark product", "9.99")
+
+
+def bench_remove_product(data):
+    products = ProductService(data.db)
+    ids = [products.add(data.user_id, "Benchmark product", "9.99").id for _ in range(MAX_RUNS + 1)]
+    return lambda: products.remove(data.user_id, ids.pop())
+
+
+def bench_add_expense(data):
+    expenses = ExpenseService(data.db)
+    return lambda: expenses.add(data.user_id, data.product_id, "Benchmark expense", "1.25")
+
+
+def bench_remove_expense(data):
+    expenses = ExpenseService(data.db)
+    ids = [record.id for record in (expenses.add(data.user_id, data.product_id, "Benchmark expense", "1.25")
+                                    for _ in range(MAX_RUNS + 1))]
+    return lambda: expenses.remove(data.user_id, data.product_id, ids.pop())
+
+
+def bench_render_table(data):
+    # A full screen with a 200-row table, the size of a long listing
+    rows = [(f"Product {i}", f"${i}.99", i, f"${i * 3}.50", f"${i}.49", f"{i % 100}.0%") for i in range(200)]
+    headers = ["Product", "Price", "Expenses", "Total Expenses", "Net/Unit", "Margin"]
+
+    def run():
+        with Ui.screen():
+            Ui.display_header("Product Dashboard")
+            Ui.display_table(headers, rows)
+    return run
+
+
+BENCHMARKS = {
+    "login": bench_login,
+    "view_products": bench_view_products,
+    "view_expenses": bench_view_expenses,
+    "expense_page_deep": bench_expense_page_deep,
+    "view_product_report": bench_view_product_report,
+    "simulate_profit": bench_simulate_profit,
+    "view_dashboard": bench_view_dashboard,
+    "add_product": bench_add_product,
+    "remove_product": bench_remove_product,
+    "add_expense": bench_add_expense,
+    "remove_expense": bench_remove_expense,
+    "render_table": bench_render_table,
+}
+
+
+def measure(run, min_runs, budget, rounds=3, max_runs=MAX_RUNS):
+    # One warm-up call, then ``rounds`` rounds of timed calls, each at least
+    # min_runs long and until its share of the budget is spent. The metric
+    # is the median of the fastest round: noise from other processes only
+    # ever makes a round slower.
+    run()
+    medians, times = [], []
+    per_round = max(max_runs // rounds, 1)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            round_times = []
+            deadline = time.perf_counter() + budget / rounds
+            while len(round_times) < per_round and (len(round_times) < min_runs or time.perf_counter() < deadline):
+                start = time.perf_counter()
+                run()
+                round_times.append(time.perf_counter() - start)
+            medians.append(statistics.median(round_times))
+            times.extend(round_times)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    times.sort()
+    best = min(medians)
+    return {
+        "median_ms": round(best * 1000, 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 4),
+        "ops_per_s": round(1 / best, 1) if best else None,
+        "runs": len(times),
+    }
+
+
+def run_suite(sizes, names, seed, min_runs, budget, directory, regressed=None, retries=2):
+    """Results by size and metric. ``regressed(size, name, result)`` marks
+    results to measure again, up to ``retries`` times, keeping the fastest."""
+    results = {}
+    for size in sizes:
+        data = Dataset(os.path.join(directory, f"bench-{size}.db"), size, seed)
+        results[str(size)] = metrics = {}
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            for name in names:
+                result = measure(BENCHMARKS[name](data), min_runs, budget)
+                for _ in range(retries if regressed else 0):
+                    if not regressed(str(size), name, result):
+                        break
+                    again = measure(BENCHMARKS[name](data), min_runs, budget)
+                    if again["median_ms"] < result["median_ms"]:
+                        result = again
+                metrics[name] = result
+        data.db.close()
+    return results
+
+
+def load_thresholds(path):
+    if not os.path.exists(path):
+        return {"default": 0.25, "metrics": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check(size, name, result, baseline, thresholds, tolerance=None):
+    """(baseline ms, change, allowed change, status) of one result."""
+    default = thresholds.get("default", 0.25) if tolerance is None else tolerance
+    allowed = thresholds.get("metrics", {}).get(name, default)
+    before = baseline.get("sizes", {}).get(size, {}).get(name)
+    if before is None:
+        return None, None, allowed, "new"
+    change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+    return before["median_ms"], change, allowed, "REGRESSED" if change > allowed else "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every hot path at several dataset sizes and check "
+                                                 "for regressions against a stored baseline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 200_000], help="expenses per dataset")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds spent timing each benchmark")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against; exit 1 on regression")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write the results as the new baseline")
+    parser.add_argument("--thresholds", default=THRESHOLDS, help="JSON with the allowed slowdown per metric")
+    parser.add_argument("--tolerance", type=float, help="allowed slowdown for metrics without their own, "
+                                                        "e.g. 0.25 for 25%%")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    thresholds = load_thresholds(args.thresholds)
+
+    def regressed(size, name, result):
+        return check(size, name, result, baseline, thresholds, args.tolerance)[-1] == "REGRESSED"
+
+    names = args.only or list(BENCHMARKS)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_suite(args.sizes, names, args.seed, args.min_runs, args.budget, tmp,
+                            regressed if baseline else None)
+    document = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "sizes": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    rows = [(size, name, result["median_ms"], *check(size, name, result, baseline, thresholds, args.tolerance))
+            for size, metrics in results.items() for name, result in metrics.items()]
+
+    print("=" * 80)
+    print("BENCHMARK SUITE".center(80))
+    print("=" * 80)
+    print(f"{'Expenses':>9} {'Metric':<20} {'Median ms':>10} {'Baseline':>10} {'Change':>8} {'Allowed':>8} "
+          f"{'Status':>10}")
+    print("-" * 80)
+    for size, name, current, before, change, allowed, status in rows:
+        print(f"{int(size):>9} {name:<20} {current:>10.3f} {'-' if before is None else f'{before:.3f}':>10} "
+              f"{'-' if change is None else f'{change:+.0%}':>8} {allowed:>8.0%} {status:>10}")
+    print("-" * 80)
+    print("Median of the fastest of 3 rounds, with the garbage collector off; metrics over")
+    print("their allowed slowdown are measured again before they count as regressed.")
+    print(f"Results written to {args.output}.")
+    regressions = [row for row in rows if row[-1] == "REGRESSED"]
+    if args.baseline:
+        print(f"{len(regressions)} of {len(rows)} metrics regressed beyond their tolerance against {args.baseline}.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
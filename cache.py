@@ -0,0 +1,199 @@
+"""
+In-process read-through cache of product lists, products and reports.
+
+    cache.enable(db, max_bytes=8 * 1024 * 1024)
+    ProductService(db).list(user_id)          # queries once, then served from memory
+    db.cache.stats()
+
+The services look entries up by key (user and page for product lists,
+product for reports) and load them from the database on a miss. Every
+entry carries tags, ("user", id) or ("product", id), and a write through
+the services, the importer or datagen invalidates exactly the tags it
+touched once its transaction commits. Loads that overlap such a write are
+not stored, so a reader never puts rows from before the commit back.
+
+Writes by other processes are noticed with PRAGMA data_version on the
+writer connection, which changes whenever another connection commits; the
+whole cache is dropped then. The check runs on every lookup that finds the
+writer free, and lookups inside a transaction bypass the cache, since they
+must see its uncommitted rows.
+
+Entries are evicted least recently used first to keep their estimated size
+under ``max_bytes``. Without enable() the services read the database
+directly as before.
+"""
+import sys
+import threading
+from collections import OrderedDict
+import metrics
+
+MAX_BYTES = 8 * 1024 * 1024
+
+REQUESTS = metrics.REGISTRY.counter("xpence_cache_requests_total", "Read-through cache lookups by result.",
+                                    ["result"])
+EVICTIONS = metrics.REGISTRY.counter("xpence_cache_evictions_total", "Cache entries evicted to stay in budget.")
+INVALIDATIONS = metrics.REGISTRY.counter("xpence_cache_invalidations_total",
+                                         "Cache entries dropped because their rows changed, by cause.", ["cause"])
+CACHE_BYTES = metrics.REGISTRY.gauge("xpence_cache_bytes", "Estimated size of the cached entries.", ["database"])
+
+_HIT, _MISS, _BYPASS = (REQUESTS.labels(result) for result in ("hit", "miss", "bypass"))
+
+
+def sizeof(value):
+    """Estimated bytes held by ``value``: the object plus its items, slots
+    and attributes. Shared objects are counted every time they occur."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sizeof(item) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += sizeof(list(vars(value).values()))
+    else:
+        for name in getattr(type(value), "__slots__", ()):
+            size += sizeof(getattr(value, name))
+    return size
+
+
+# One cached value with the tags that invalidate it
+class _Entry:
+    __slots__ = ("value", "size", "tags")
+
+    def __init__(self, value, size, tags):
+        self.value = value
+        self.size = size
+        self.tags = tags
+
+
+class ReadCache:
+    def __init__(self, db, max_bytes=MAX_BYTES):
+        self.db = db
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = self.bypasses = self.evictions = self.invalidations = 0
+        self._entries = OrderedDict()
+        self._tags = {}
+        # Bumped by every invalidation; a load only stores its value if no
+        # invalidation happened while it ran
+        self._generation = 0
+        self._data_version = db.pool.data_version()
+        self._lock = threading.Lock()
+
+    def get(self, key, tags, load):
+        """The cached value of ``key``, or ``load()``'s result, stored under ``tags``."""
+        if self.db._transaction_depth:
+            with self._lock:
+                self.bypasses += 1
+            _BYPASS.inc()
+            return load()
+        self._check_data_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                _HIT.inc()
+                return entry.value
+            self.misses += 1
+            generation = self._generation
+        _MISS.inc()
+        value = load()
+        size = sizeof(value)
+        with self._lock:
+            if generation == self._generation and size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = _Entry(value, size, tags)
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+                self.bytes += size
+                self._evict()
+        return value
+
+    def _evict(self):
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+            EVICTIONS.inc()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def invalidate(self, *tags, cause="write"):
+        """Drop every entry carrying one of ``tags``."""
+        with self._lock:
+            self._generation += 1
+            keys = {key for tag in tags for key in self._tags.get(tag, ())}
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        INVALIDATIONS.labels(cause).inc(len(keys))
+
+    def clear(self, cause="write"):
+        with self._lock:
+            self._generation += 1
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self.bytes = 0
+            self.invalidations += dropped
+        INVALIDATIONS.labels(cause).inc(dropped)
+
+    def _check_data_version(self):
+        # None while another thread holds the writer: in-process writes are
+        # invalidated anyway, and the next lookup checks again
+        version = self.db.pool.data_version()
+        if version is not None and version != self._data_version:
+            self._data_version = version
+            self.clear(cause="external")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def enable(db, max_bytes=MAX_BYTES):
+    """Give ``db`` a ReadCache and return it."""
+    db.cache = ReadCache(db, max_bytes)
+    CACHE_BYTES.set_function(lambda: [((db.path,), db.cache.bytes)] if db.cache else [], key=db.path)
+    return db.cache
+
+
+def disable(db):
+    db.__dict__.pop("cache", None)
+
+
+# The helpers below are what the services call; they do nothing for a
+# database without a cache (or a stand-in without the attribute)
+
+def read_through(db, key, tags, load):
+    cache = getattr(db, "cache", None)
+    if cache is None:
+        return load()
+    return cache.get(key, tags, load)
+
+
+def invalidate(db, *tags):
+    """Invalidate ``tags`` once the current transaction of ``db`` commits."""
+    cache = getattr(db, "cache", None)
+    if cache is not None:
+        db.after_commit(lambda: cache.invalidate(*tags))
+
+
+def clear(db):
+    cache = getattr(db, "cache", None)
+    if cache is not None:
+        db.after_commit(cache.clear)
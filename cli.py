@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Non-interactive command line for scripts, cron jobs and pipelines.
+
+    python cli.py --user alice product add "Orange Juice" 12.50
+    python cli.py --user alice expense add 3 Bottles 2.75
+    python cli.py --user alice expense import expenses.csv
+    python cli.py --user alice report --json
+    python cli.py --user alice search bott lab
+    python cli.py --user alice export expenses expenses.csv
+    python cli.py --timings --user alice report
+
+Each run performs one operation and exits: 0 on success, 1 when the
+operation is rejected or fails, e.g. on a missing file or a locked
+database (the message goes to stderr), and 2 for usage errors.
+Commands act as the user named by --user (or XPENCE_USER); access to the
+database file is what authorizes them, so no password is asked except when
+creating a user.
+
+Startup is kept short: only argparse is imported up front, the data layer
+is imported once a command runs, colorama and Ui only when a table is
+printed, and the schema migrations are skipped when the database is
+already at the current version.
+"""
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import os
+import sys
+
+DEFAULT_DB = "business_tracker.db"
+
+
+class Timings:
+    # Wall-clock phases of one run, reported on stderr with --timings
+    def __init__(self):
+        self.phases = []
+        self._last = _START
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self, stream):
+        total = sum(seconds for _, seconds in self.phases)
+        parts = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.phases)
+        stream.write(f"timings: {parts}; total {total * 1000:.1f} ms\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="xpence", description="Xpence expense tracker, non-interactive commands")
+    parser.add_argument("--db", default=os.environ.get("XPENCE_DB", DEFAULT_DB), help="database file")
+    parser.add_argument("--user", default=os.environ.get("XPENCE_USER"), help="username to act as")
+    parser.add_argument("--timings", action="store_true", help="report startup and command time on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    user = commands.add_parser("user", help="manage users").add_subparsers(dest="action", required=True)
+    user_add = user.add_parser("add", help="register a user")
+    user_add.add_argument("username")
+    user_add.add_argument("--password-stdin", action="store_true", help="read the password from stdin")
+
+    product = commands.add_parser("product", help="manage products").add_subparsers(dest="action", required=True)
+    product_add = product.add_parser("add", help="add a product")
+    product_add.add_argument("name")
+    product_add.add_argument("price")
+    product_list = product.add_parser("list", help="list products")
+    product_list.add_argument("--json", action="store_true")
+    product_remove = product.add_parser("remove", help="remove a product and its expenses")
+    product_remove.add_argument("product_id", type=int)
+    add_import_arguments(product.add_parser("import", help="import products from CSV/JSONL (name, price)"))
+
+    expense = commands.add_parser("expense", help="manage expenses").add_subparsers(dest="action", required=True)
+    expense_add = expense.add_parser("add", help="add an expense to a product")
+    expense_add.add_argument("product_id", type=int)
+    expense_add.add_argument("name")
+    expense_add.add_argument("amount")
+    expense_list = expense.add_parser("list", help="list the expenses of a product")
+    expense_list.add_argument("product_id", type=int)
+    expense_list.add_argument("--json", action="store_true")
+    expense_remove = expense.add_parser("remove", help="remove an expense")
+    expense_remove.add_argument("product_id", type=int)
+    expense_remove.add_argument("expense_id", type=int)
+    expense_import = expense.add_parser("import", help="import expenses from CSV/JSONL (product, name, amount)")
+    add_import_arguments(expense_import)
+    expense_import.add_argument("--product", type=int, help="product for rows without a product column")
+
+    export = commands.add_parser("export", help="export products, expenses or the report to CSV/JSONL/npy")
+    export.add_argument("table", choices=["products", "expenses", "report"])
+    export.add_argument("destination", help="file (.csv/.jsonl), directory for npy, or '-' for stdout")
+    export.add_argument("--format", choices=["csv", "jsonl", "npy"], help="default: from the destination")
+
+    report = commands.add_parser("report", help="dashboard of all products, or one product's report")
+    report.add_argument("--product", type=int, help="report on one product")
+    report.add_argument("--sort", default="margin", choices=["margin", "net", "expenses", "price", "name"])
+    report.add_argument("--asc", action="store_true", help="sort ascending")
+    report.add_argument("--json", action="store_true")
+
+    search = commands.add_parser("search", help="find products and expenses by name (words match as prefixes)")
+    search.add_argument("words", nargs="+")
+    search.add_argument("--limit", type=int, default=20, help="most products and most expenses to show")
+    search.add_argument("--json", action="store_true")
+    return parser
+
+
+def add_import_arguments(parser):
+    parser.add_argument("file", help="CSV or JSONL file, '-' for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="file format (default: from the extension)")
+    parser.add_argument("--skip-invalid", action="store_true", help="report invalid rows instead of stopping")
+    parser.add_argument("--restart", action="store_true", help="ignore a checkpoint left by an interrupted run")
+
+
+def render_table(headers, rows):
+    # The only place the CLI needs colorama and Ui
+    from ui import Ui
+    Ui.display_table(headers, rows)
+
+
+def print_json(data):
+    import json
+    sys.stdout.write(json.dumps(data, indent=2) + "\n")
+
+
+def money_fields(name, money):
+    return {f"{name}_cents": money.cents, name: str(money)}
+
+
+def cmd_user_add(args, db, services):
+    if args.password_stdin:
+        password = sys.stdin.readline().rstrip("\n")
+    else:
+        import getpass
+        password = getpass.getpass("Password: ")
+    user_id = services.UserService(db).register(args.username.strip(), password)
+    print(f"Registered user {args.username} (id {user_id})")
+
+
+def cmd_product_add(args, db, services, user_id):
+    product = services.ProductService(db).add(user_id, args.name, args.price)
+    print(f"Added product {product.id}: {product.name} {product.price}")
+
+
+def cmd_product_list(args, db, services, user_id):
+    products = services.ProductService(db)
+    rows, page = [], products.list(user_id)
+    while True:
+        rows.extend(page.rows)
+        if not page.has_next:
+            break
+        page = products.list(user_id, after_id=page.last_id)
+    if args.json:
+        print_json([{"id": p.id, "name": p.name, **money_fields("price", p.price)} for p in rows])
+    elif rows:
+        render_table(["ID", "Product", "Price"], [(p.id, p.name, p.price) for p in rows])
+
+
+def cmd_product_remove(args, db, services, user_id):
+    services.ProductService(db).remove(user_id, args.product_id)
+    print(f"Removed product {args.product_id}")
+
+
+def cmd_expense_add(args, db, services, user_id):
+    expense = services.ExpenseService(db).add(user_id, args.product_id, args.name, args.amount)
+    print(f"Added expense {expense.id}: {expense.name} {expense.amount}")
+
+
+def cmd_expense_list(args, db, services, user_id):
+    services.ProductService(db).get(user_id, args.product_id)
+    expenses = services.ExpenseService(db)
+    rows, page = [], expenses.list(user_id, args.product_id)
+    while True:
+        rows.extend(page.rows)
+        if not page.has_next:
+            break
+        page = expenses.list(user_id, args.product_id, after_id=page.last_id)
+    if args.json:
+        print_json([{"id": e.id, "name": e.name, **money_fields("amount", e.amount)} for e in rows])
+    elif rows:
+        render_table(["ID", "Expense", "Amount"], [(e.id, e.name, e.amount) for e in rows])
+
+
+def cmd_expense_remove(args, db, services, user_id):
+    services.ExpenseService(db).remove(user_id, args.product_id, args.expense_id)
+    print(f"Removed expense {args.expense_id}")
+
+
+def run_import(args, db, user_id, kind, **kwargs):
+    from importer import Importer
+    source = sys.stdin.buffer if args.file == "-" else args.file
+    fmt = args.format or ("csv" if args.file == "-" else None)
+    importer = Importer(db, user_id)
+    run = importer.import_products if kind == "products" else importer.import_expenses
+    stats = run(source, fmt=fmt, skip_invalid=args.skip_invalid, resume=not args.restart, **kwargs)
+    print("\n".join(stats.summary()))
+
+
+def cmd_product_import(args, db, services, user_id):
+    run_import(args, db, user_id, "products")
+
+
+def cmd_expense_import(args, db, services, user_id):
+    run_import(args, db, user_id, "expenses", product_id=args.product)
+
+
+def cmd_export(args, db, services, user_id):
+    from exporter import Exporter
+    exporter = Exporter(db, user_id)
+    if args.destination == "-":
+        stats = exporter.export(args.table, sys.stdout, fmt=args.format or "csv")
+        sys.stderr.write(stats.summary() + "\n")
+    else:
+        print(exporter.export(args.table, args.destination, fmt=args.format).summary())
+
+
+def cmd_report(args, db, services, user_id):
+    if args.product is not None:
+        report = services.ExpenseService(db).report(user_id, args.product)
+        if args.json:
+            print_json({"product_id": report.product_id, **money_fields("price", report.price),
+                        **money_fields("total_expenses", report.total_expenses),
+                        **money_fields("net_per_unit", report.net_per_unit)})
+        else:
+            render_table(["Product", "Price", "Total Expenses", "Net/Unit"],
+                         [(report.product_id, report.price, report.total_expenses, report.net_per_unit)])
+        return
+    dashboard = services.ProductService(db).dashboard(user_id, args.sort, not args.asc)
+    if args.json:
+        print_json([
+            {"id": row.id, "name": row.name, **money_fields("price", row.price), "expense_count": row.expense_count,
+             **money_fields("total_expenses", row.total_expenses), **money_fields("net_per_unit", row.net_per_unit),
+             "margin": None if row.margin is None else round(row.margin, 2)}
+            for row in dashboard
+        ])
+    elif dashboard:
+        render_table(["ID", "Product", "Price", "Expenses", "Total Expenses", "Net/Unit", "Margin"], [
+            (row.id, row.name, row.price, row.expense_count, row.total_expenses, row.net_per_unit,
+             "-" if row.margin is None else f"{row.margin:.1f}%")
+            for row in dashboard
+        ])
+
+
+def cmd_search(args, db, services, user_id):
+    results = services.SearchService(db).search(user_id, " ".join(args.words), args.limit)
+    if args.json:
+        print_json({
+            "products": [{"id": p.id, "name": p.name, **money_fields("price", p.price)} for p in results.products],
+            "expenses": [{"id": e.id, "name": e.name, **money_fields("amount", e.amount), "product_id": e.product_id,
+                          "product_name": e.product_name} for e in results.expenses],
+        })
+        return
+    if results.products:
+        render_table(["ID", "Product", "Price"], [(p.id, p.name, p.price) for p in results.products])
+    if results.expenses:
+        render_table(["ID", "Expense", "Amount", "Product"],
+                     [(e.id, e.name, e.amount, f"{e.product_name} ({e.product_id})") for e in results.expenses])
+
+
+COMMANDS = {
+    ("product", "add"): cmd_product_add,
+    ("product", "list"): cmd_product_list,
+    ("product", "remove"): cmd_product_remove,
+    ("product", "import"): cmd_product_import,
+    ("expense", "add"): cmd_expense_add,
+    ("expense", "list"): cmd_expense_list,
+    ("expense", "remove"): cmd_expense_remove,
+    ("expense", "import"): cmd_expense_import,
+    ("export", None): cmd_export,
+    ("report", None): cmd_report,
+    ("search", None): cmd_search,
+}
+
+
+def main(argv=None):
+    timings = Timings()
+    args = build_parser().parse_args(argv)
+    timings.mark("startup")
+
+    import sqlite3
+    import services
+    from database import Database, PoolTimeout
+    timings.mark("imports")
+
+    db = None
+    try:
+        db = Database(args.db)
+        timings.mark("open database")
+        if args.command == "user":
+            cmd_user_add(args, db, services)
+        else:
+            if not args.user:
+                raise services.ValidationError("Pass --user or set XPENCE_USER.")
+            user_id = services.UserService(db).find(args.user)
+            COMMANDS[args.command, getattr(args, "action", None)](args, db, services, user_id)
+        timings.mark("command")
+    except (services.XpenceError, PoolTimeout, sqlite3.Error, OSError) as e:
+        # Bad paths, unreadable files and a locked or broken database are
+        # reported like rejected operations rather than as tracebacks
+        sys.stderr.write(f"error: {e}\n")
+        return 1
+    finally:
+        if db is not None:
+            db.close()
+        if args.timings:
+            timings.report(sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
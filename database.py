@@ -1,51 +1,462 @@
+import os
 import sqlite3
+import threading
+import migrations
+from contextlib import contextmanager
+
+# Pragma profiles applied to every new connection. "safe" keeps SQLite's
+# rollback-journal defaults; the WAL profiles let report readers run while
+# a write is in progress. Negative cache_size values are in KiB.
+PROFILES = {
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+# Rows per page in the paginated listings
+PAGE_SIZE = 20
+
+# Reader connections per pool, and how long to wait for a free connection
+# (also the SQLite busy timeout) before giving up, in seconds
+MAX_READERS = 4
+CHECKOUT_TIMEOUT = 5.0
+
+# Pragmas that belong to the database file rather than the connection; only
+# the writer sets them
+_WRITER_ONLY_PRAGMAS = {"journal_mode", "wal_autocheckpoint"}
+
+
+# One page of a keyset-paginated listing
+class Page:
+    def __init__(self, rows, has_prev, has_next):
+        self.rows = rows
+        self.has_prev = has_prev
+        self.has_next = has_next
+
+    @property
+    def first_id(self):
+        return self.rows[0][0] if self.rows else None
+
+    @property
+    def last_id(self):
+        return self.rows[-1][0] if self.rows else None
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """No connection became free within the checkout timeout."""
+
+
+# One writer connection shared under a lock plus a bounded set of reader
+# connections. SQLite allows a single writer at a time anyway; with WAL the
+# readers keep working while it writes.
+class ConnectionPool:
+    def __init__(self, path, settings, max_readers=MAX_READERS, timeout=CHECKOUT_TIMEOUT):
+        self.path = path
+        self.settings = settings
+        self.timeout = timeout
+        # Every connection to an in-memory database is a separate database,
+        # so those use the writer for reads as well
+        self.max_readers = 0 if path in ("", ":memory:") or "mode=memory" in path else max_readers
+        self._writer = self._connect(readonly=False)
+        self._writer_lock = threading.RLock()
+        # Idle readers, guarded by _available's lock
+        self._idle = []
+        self._created = 0
+        self._available = threading.Condition(threading.Lock())
+        self._local = threading.local()
+
+    def _connect(self, readonly):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                               uri=self.path.startswith("file:"))
+        self._configure(conn, readonly)
+        return conn
+
+    def _configure(self, conn, readonly):
+        for pragma, value in self.settings.items():
+            if not (readonly and pragma in _WRITER_ONLY_PRAGMAS):
+                conn.execute(f"PRAGMA {pragma} = {value}").close()
+        if readonly:
+            conn.execute("PRAGMA query_only = ON").close()
+
+    def configure(self, settings):
+        """Apply new pragma settings to the writer and to readers from now on."""
+        with self.writer() as conn:
+            if settings.get("journal_mode") != self.settings.get("journal_mode"):
+                # An open connection keeps a WAL database in WAL mode, so
+                # idle readers are closed and reopened by acquire() later
+                with self._available:
+                    for reader in self._idle:
+                        reader.close()
+                    self._created -= len(self._idle)
+                    self._idle.clear()
+            self.settings = settings
+            self._configure(conn, readonly=False)
+        with self._available:
+            # Checked-out readers keep their settings until closed
+            for conn in self._idle:
+                self._configure(conn, readonly=True)
+
+    @contextmanager
+    def writer(self):
+        """The writer connection, held by this thread for the block. The lock
+        is reentrant, so a thread inside a transaction can keep using it."""
+        if not self._writer_lock.acquire(timeout=self.timeout):
+            raise PoolTimeout("Timed out waiting for the writer connection")
+        try:
+            yield self._writer
+        finally:
+            self._writer_lock.release()
+
+    def data_version(self):
+        """PRAGMA data_version of the writer, which changes whenever another
+        connection (in practice another process) commits; None while another
+        thread holds the writer."""
+        if not self._writer_lock.acquire(blocking=False):
+            return None
+        try:
+            return self._writer.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            self._writer_lock.release()
+
+    def acquire(self):
+        """Check out a reader connection; pair every call with release().
+
+        Nested checkouts in the same thread reuse the connection the thread
+        already holds. Without readers (in-memory databases) this takes the
+        writer instead.
+        """
+        if not self.max_readers:
+            if not self._writer_lock.acquire(timeout=self.timeout):
+                raise PoolTimeout("Timed out waiting for the writer connection")
+            return self._writer
+        local = self._local
+        held = getattr(local, "reader", None)
+        if held is not None:
+            local.depth += 1
+            return held
+        with self._available:
+            if self._idle:
+                conn = self._idle.pop()
+            elif self._created < self.max_readers:
+                self._created += 1
+                conn = None
+            elif self._available.wait_for(lambda: self._idle, timeout=self.timeout):
+                conn = self._idle.pop()
+            else:
+                raise PoolTimeout(f"No free reader connection after {self.timeout}s")
+        if conn is None:
+            conn = self._connect(readonly=True)
+        local.reader, local.depth = conn, 1
+        return conn
+
+    def release(self, conn):
+        if not self.max_readers:
+            self._writer_lock.release()
+            return
+        local = self._local
+        local.depth -= 1
+        if local.depth:
+            return
+        local.reader = None
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    @contextmanager
+    def reader(self):
+        """A reader connection for the block (see acquire)."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._available:
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+        self._writer.close()
+
 
 # Database Manager
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect("business_tracker.db")
-        self.cursor = self.conn.cursor()
+    checkpointer = None
+    # The instrumentation.Recorder (or metrics.StatementMetrics) while
+    # statements are being timed
+    recorder = None
+    # The cache.ReadCache of the services, when enabled
+    cache = None
+
+    def __init__(self, path="business_tracker.db", profile=DEFAULT_PROFILE, checkpoint_interval=None,
+                 max_readers=MAX_READERS, timeout=CHECKOUT_TIMEOUT):
+        self.path = path
+        self.profile = PROFILES[profile] if isinstance(profile, str) else dict(profile)
+        self.pool = ConnectionPool(path, self.profile, max_readers=max_readers, timeout=timeout)
+        # Depth of nested transaction() blocks in each thread; statements only
+        # commit at depth 0
+        self._local = threading.local()
         self.create_tables()
+        if checkpoint_interval:
+            self.checkpointer = CheckpointManager(path, interval=checkpoint_interval)
+            self.checkpointer.start()
+        if os.environ.get("XPENCE_SQL_STATS"):
+            import instrumentation
+            instrumentation.from_environment(self)
+        if os.environ.get("XPENCE_METRICS_PORT") or os.environ.get("XPENCE_METRICS_FILE"):
+            import metrics
+            metrics.from_environment(self)
+
+    def apply_profile(self, profile):
+        """Apply a named profile from PROFILES, or a dict of pragma settings."""
+        self.profile = PROFILES[profile] if isinstance(profile, str) else dict(profile)
+        self.pool.configure(self.profile)
+        return self.profile
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Copy WAL content back into the database file.
+
+        Returns (busy, wal_frames, checkpointed_frames) as reported by SQLite.
+        TRUNCATE also resets the WAL file to zero bytes once it is fully
+        checkpointed.
+        """
+        with self.pool.writer() as conn:
+            return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+    def close(self):
+        if self.checkpointer:
+            self.checkpointer.stop()
+        self.pool.close()
 
     def create_tables(self):
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
-            )
-        """)
-
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                price REAL NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                amount REAL NOT NULL,
-                FOREIGN KEY (product_id) REFERENCES products (id)
-            )
-        """)
-
-        self.conn.commit()
+        # Brings the schema up to date. When user_version is already current
+        # this is a single PRAGMA read, which keeps short-lived CLI runs fast.
+        if migrations.get_version(self) >= migrations.latest_version():
+            return []
+        return migrations.migrate(self)
+
+    @property
+    def _transaction_depth(self):
+        return getattr(self._local, "depth", 0)
+
+    @contextmanager
+    def transaction(self):
+        """Group every statement in the block into a single commit.
+
+        The block holds the writer connection, so other threads wait for it
+        to finish before writing. Nested blocks join the outermost
+        transaction; if anything raises, the whole transaction is rolled back.
+        """
+        with self.pool.writer() as conn:
+            depth = self._transaction_depth
+            if depth == 0 and not conn.in_transaction:
+                # Explicit BEGIN so DDL is covered too; sqlite3 only opens
+                # transactions implicitly before INSERT/UPDATE/DELETE
+                conn.execute("BEGIN IMMEDIATE")
+            self._local.depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                self._local.depth = depth
+                if depth == 0:
+                    conn.rollback()
+                    self._local.after_commit = []
+                raise
+            self._local.depth = depth
+            if depth == 0:
+                conn.commit()
+                callbacks, self._local.after_commit = getattr(self._local, "after_commit", []), []
+                for callback in callbacks:
+                    callback()
+
+    def after_commit(self, callback):
+        """Call ``callback`` when this thread's transaction commits, or right
+        away outside one; dropped if the transaction rolls back."""
+        if self._transaction_depth:
+            self._local.after_commit = getattr(self._local, "after_commit", [])
+            self._local.after_commit.append(callback)
+        else:
+            callback()
+
+    @contextmanager
+    def _reading(self):
+        # Reads inside this thread's transaction must see its uncommitted
+        # writes, so they go to the writer
+        if self._transaction_depth:
+            with self.pool.writer() as conn:
+                yield conn
+        else:
+            with self.pool.reader() as conn:
+                yield conn
+
+    @contextmanager
+    def snapshot(self):
+        """Run the block's reads in one read transaction.
+
+        Every fetch and iteration of this thread inside the block uses the
+        same connection and sees the database as it was at the first read,
+        e.g. a COUNT(*) and the rows that follow it.
+        """
+        with self._reading() as conn:
+            if conn.in_transaction:
+                yield self
+                return
+            conn.execute("BEGIN")
+            try:
+                yield self
+            finally:
+                conn.rollback()
+
+    def _read(self, query, params, fetch, row_type=None):
+        # Same as _reading() without the context manager overhead, for the
+        # short fetch_one/fetch_all calls. Each call gets its own cursor,
+        # closed straight away so the read snapshot is released and an outer
+        # iter_query keeps its rows.
+        pool = self.pool
+        conn = pool._writer if self._transaction_depth else pool.acquire()
+        try:
+            cursor = conn.execute(query, params)
+            if row_type is not None:
+                # Applied as rows are fetched, so setting it after execute is enough
+                cursor.row_factory = row_type.row_factory
+            try:
+                return fetch(cursor)
+            finally:
+                cursor.close()
+        finally:
+            if not self._transaction_depth:
+                pool.release(conn)
 
     def execute_query(self, query, params=()):
-        self.cursor.execute(query, params)
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            cursor = conn.execute(query, params)
+            rowcount = cursor.rowcount
+            cursor.close()
+            if not self._transaction_depth:
+                conn.commit()
+        return rowcount
+
+    def insert(self, query, params=()):
+        """Run an INSERT and return the id of the new row, or None if it
+        inserted nothing (an INSERT ... SELECT that selected no row)."""
+        with self.pool.writer() as conn:
+            cursor = conn.execute(query, params)
+            row_id = cursor.lastrowid if cursor.rowcount else None
+            cursor.close()
+            if not self._transaction_depth:
+                conn.commit()
+        return row_id
+
+    def executemany(self, query, seq_of_params):
+        """Run one statement for every parameter tuple with a single commit."""
+        with self.pool.writer() as conn:
+            cursor = conn.executemany(query, seq_of_params)
+            rowcount = cursor.rowcount
+            cursor.close()
+            if not self._transaction_depth:
+                conn.commit()
+        return rowcount
+
+    def iter_query(self, query, params=(), batch_size=1000, row_type=None):
+        """Yield the rows of ``query`` without loading them all at once.
+
+        Uses its own cursor and fetchmany(), so memory stays at one batch and
+        other queries can run while the iteration is in progress.
+        """
+        with self._reading() as conn:
+            cursor = conn.cursor()
+            if row_type is not None:
+                cursor.row_factory = row_type.row_factory
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+
+    def fetch_page(self, query, params=(), after_id=None, before_id=None, page_size=PAGE_SIZE, row_type=None):
+        """Keyset pagination by id over ``query``.
+
+        ``query`` selects id as its first column and ends in a WHERE clause;
+        the page condition and ordering are appended to it. Pass the last id
+        of the current page as ``after_id`` for the next page, or its first
+        id as ``before_id`` for the previous one.
+        """
+        if before_id is not None:
+            rows = self.fetch_all(f"{query} AND id < ? ORDER BY id DESC LIMIT ?", (*params, before_id, page_size + 1),
+                                  row_type=row_type)
+            return Page(rows[:page_size][::-1], len(rows) > page_size, True)
+        rows = self.fetch_all(f"{query} AND id > ? ORDER BY id LIMIT ?", (*params, after_id or 0, page_size + 1),
+                              row_type=row_type)
+        return Page(rows[:page_size], after_id is not None, len(rows) > page_size)
+
+    # ``row_type`` is a rows.Record class to build instead of tuples
+    def fetch_one(self, query, params=(), row_type=None):
+        return self._read(query, params, sqlite3.Cursor.fetchone, row_type)
+
+    def fetch_all(self, query, params=(), row_type=None):
+        return self._read(query, params, sqlite3.Cursor.fetchall, row_type)
+
+
+# Keeps the WAL from growing without limit when long-running readers keep
+# SQLite's automatic checkpoints from completing.
+class CheckpointManager:
+    def __init__(self, path, interval=30.0, max_wal_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.interval = interval
+        self.max_wal_bytes = max_wal_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wal-checkpoint", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
 
-    def fetch_one(self, query, params=()):
-        self.cursor.execute(query, params)
-        return self.cursor.fetchone()
+    def wal_size(self):
+        try:
+            return os.path.getsize(self.path + "-wal")
+        except OSError:
+            return 0
 
-    def fetch_all(self, query, params=()):
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
+    def _run(self):
+        conn = sqlite3.connect(self.path, timeout=1.0)
+        try:
+            while not self._stop.wait(self.interval):
+                # A passive checkpoint never blocks readers or writers; only
+                # truncate once the WAL is over its size budget
+                mode = "TRUNCATE" if self.wal_size() > self.max_wal_bytes else "PASSIVE"
+                try:
+                    conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+                except sqlite3.OperationalError:
+                    pass  # Busy; try again next interval
+        finally:
+            conn.close()
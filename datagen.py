@@ -0,0 +1,170 @@
+"""
+Deterministic synthetic data for benchmarks and scaling tests.
+
+    python datagen.py --db bench.db --users 10 --products 100 --expenses 1000000 --seed 7
+    stats = datagen.generate(db, users=10, products_per_user=100, expenses=1_000_000, seed=7)
+
+Fills a real Database with ``users`` users named user1, user2, ... (all
+with the same password), ``products_per_user`` products each and
+``expenses`` expenses spread over all products with a Zipfian skew: the
+product of rank r gets a share proportional to 1 / r**skew, so a few
+products carry most of the expenses as in real shops (skew 0 spreads
+them evenly). Ranks are shuffled, so the busy products are not simply
+the first ones.
+
+The same arguments and seed always produce the same products and
+expenses. Rows go in with executemany in batches, expenses without the
+per-row totals and search triggers (aggregates.deferred_triggers), which keeps
+generating 10M rows to a few minutes.
+"""
+import argparse
+import itertools
+import math
+import random
+import sys
+import time
+from statistics import NormalDist
+import aggregates
+import cache
+import passwords
+from services import ValidationError, ConflictError
+
+# Expense rows inserted per transaction
+BATCH_SIZE = 50_000
+
+DEFAULT_PASSWORD = "password"
+
+PRODUCT_NAMES = ("Juice", "Chips", "Soap", "Candle", "Notebook", "Mug", "Scarf", "Honey", "Tea", "Coffee",
+                 "Jam", "Bread", "Cookies", "Lotion", "Bag", "Poster", "Card", "Pen", "Plant", "Sauce")
+
+EXPENSE_NAMES = ("Bottle", "Label", "Cap", "Box", "Tape", "Shipping", "Packaging", "Ink", "Fruit", "Sugar",
+                 "Flour", "Wax", "Wick", "Paper", "Cloth", "Thread", "Jar", "Lid", "Electricity", "Rent",
+                 "Labour", "Marketing", "Fees", "Insurance", "Delivery")
+
+
+# What one generate() call wrote
+class GenerationStats:
+    def __init__(self):
+        self.users = 0
+        self.products = 0
+        self.expenses = 0
+        self.elapsed = 0.0
+
+    def summary(self):
+        rate = self.expenses / self.elapsed if self.elapsed else 0.0
+        return (f"Generated {self.users} users, {self.products} products and {self.expenses} expenses "
+                f"in {self.elapsed:.2f}s ({rate:,.0f} expenses/s)")
+
+
+def zipf_counts(total, buckets, skew, rng):
+    """Split ``total`` over ``buckets`` in proportion to 1 / rank**skew, in
+    shuffled order. The counts always add up to ``total``."""
+    if buckets == 0:
+        return []
+    weights = [rank ** -skew for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    # Rounding leaves fewer than ``buckets`` over; they go to the top ranks
+    for rank in range(total - sum(counts)):
+        counts[rank] += 1
+    rng.shuffle(counts)
+    return counts
+
+
+def _amount_table(size=1024):
+    # Quantiles of a lognormal distribution in cents: mostly a few dollars,
+    # with a long tail of large costs. Drawing from the table is much
+    # cheaper than calling lognormvariate for every row.
+    normal = NormalDist(5.5, 1.0)
+    return [int(math.exp(normal.inv_cdf((i + 0.5) / size))) + 1 for i in range(size)]
+
+
+def _expense_rows(rng, product_ids, counts):
+    amounts = _amount_table()
+    for product_id, count in zip(product_ids, counts):
+        yield from zip(itertools.repeat(product_id, count), rng.choices(EXPENSE_NAMES, k=count),
+                       rng.choices(amounts, k=count))
+
+
+def _next_id(db, table):
+    # AUTOINCREMENT never reuses the ids of deleted rows
+    return db.fetch_one(f"""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+                   COALESCE((SELECT MAX(id) FROM {table}), 0)) + 1
+    """, (table,))[0]
+
+
+def generate(db, users=10, products_per_user=100, expenses=100_000, skew=1.1, seed=0, batch_size=BATCH_SIZE,
+             password=DEFAULT_PASSWORD):
+    """Add synthetic users, products and expenses to ``db``; returns GenerationStats."""
+    if min(users, products_per_user, expenses) < 0 or skew < 0:
+        raise ValidationError("Counts and skew cannot be negative.")
+    if expenses and not users * products_per_user:
+        raise ValidationError("Expenses need at least one product.")
+    rng = random.Random(seed)
+    stats = GenerationStats()
+    start = time.perf_counter()
+
+    usernames = [f"user{n}" for n in range(1, users + 1)]
+    taken = db.fetch_all(f"SELECT username FROM users WHERE username IN ({', '.join('?' * len(usernames))})",
+                         usernames) if usernames else []
+    if taken:
+        raise ConflictError(f"The database already has a user named {taken[0][0]!r}.")
+    # One hash for everyone: hashing is deliberately slow
+    stored = passwords.hash_password(password)
+    with db.transaction():
+        # Rows inserted in one transaction get consecutive ids
+        first_user = _next_id(db, "users")
+        first_product = _next_id(db, "products")
+        db.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                       [(username, stored) for username in usernames])
+        user_ids = range(first_user, first_user + users)
+        db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)", (
+            (user_id, f"{rng.choice(PRODUCT_NAMES)} {n}", rng.randint(100, 50_000))
+            for user_id in user_ids for n in range(1, products_per_user + 1)
+        ))
+    stats.users = len(user_ids)
+    stats.products = len(user_ids) * products_per_user
+    product_ids = range(first_product, first_product + stats.products)
+
+    rows = _expense_rows(rng, product_ids, zipf_counts(expenses, stats.products, skew, rng))
+    insert = "INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)"
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        with aggregates.deferred_triggers(db):
+            db.executemany(insert, batch)
+        stats.expenses += len(batch)
+    cache.clear(db)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill a database with deterministic synthetic data")
+    parser.add_argument("--db", required=True, help="database file to create or extend")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--products", type=int, default=100, help="products per user")
+    parser.add_argument("--expenses", type=int, default=100_000, help="expenses in total")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of expenses per product (0 = even)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default="fast", help="pragma profile while generating")
+    args = parser.parse_args(argv)
+
+    from database import Database
+    db = Database(args.db, profile=args.profile)
+    try:
+        stats = generate(db, args.users, args.products, args.expenses, args.skew, args.seed)
+    except (ValidationError, ConflictError) as e:
+        sys.stderr.write(f"error: {e}\n")
+        return 1
+    finally:
+        db.close()
+    print(stats.summary())
+    print(f"Log in as user1 .. user{args.users} with password {DEFAULT_PASSWORD!r}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,18 @@
 from ui import Ui
+from money import Money
+from services import ExpenseService, ProductService, XpenceError
+from simulation import frange
 from colorama import Fore
 
 # Expense Class
 class Expense:
-    def __init__(self, db, product_id, name="", amount=0.0):
+    def __init__(self, db, user_id, product_id, name="", amount=Money(0)):
         self.db = db
+        self.user_id = user_id
         self.product_id = product_id
         self.name = name
         self.amount = amount
+        self.service = ExpenseService(db)
 
     def add_expense(self):
         Ui.display_header("Add Expense")
@@ -16,112 +21,169 @@ class Expense:
             Ui.display_error("Expense name cannot be empty.")
             return
         try:
-            self.amount = float(input(Fore.BLUE + "Enter expense amount: "))
-        except ValueError:
-            Ui.display_error("Invalid amount. Please enter a number.")
-            return
-        if self.amount == 0:
-            Ui.display_error("Expense amount cannot be zero.")
-            return
-        if self.amount < 0:
-            Ui.display_error("Expense amount cannot be negative.")
+            expense = self.service.add(self.user_id, self.product_id, self.name, input(Fore.BLUE + "Enter expense amount: "))
+        except XpenceError as e:
+            Ui.display_error(str(e))
             return
-        self.db.execute_query("INSERT INTO expenses (product_id, name, amount) VALUES (?, ?, ?)", (self.product_id, self.name, self.amount))
+        self.amount = expense.amount
         Ui.display_success("Expense added successfully!")
 
+    def add_expenses(self, expenses):
+        # Bulk insert of (name, Money) pairs for this product in one transaction
+        return self.service.add_many(self.user_id, self.product_id, expenses)
+
+    def fetch_page(self, after_id=None, before_id=None):
+        return self.service.list(self.user_id, self.product_id, after_id=after_id, before_id=before_id)
+
+    def view_expenses(self, title="Expenses"):
+        # Shows one page at a time; returns the rows of the page the user stopped on
+        page = self.fetch_page()
+
+        if not page.rows:
+            Ui.display_error("No expenses found.")
+            return []
+
+        while True:
+            with Ui.screen():
+                Ui.display_header(title)
+                Ui.display_lines(f"{index}. {expense.name} - {expense.amount}"
+                                 for index, expense in enumerate(page.rows, start=1))
+                Ui.display_separator()
+
+            action = Ui.page_navigation(page)
+            if action == "next":
+                page = self.fetch_page(after_id=page.last_id)
+            elif action == "prev":
+                page = self.fetch_page(before_id=page.first_id)
+            else:
+                return page.rows
+
     def remove_expense(self):
-        expenses = self.db.fetch_all("SELECT id, name, amount FROM expenses WHERE product_id = ?", (self.product_id,))
-        
+        expenses = self.view_expenses()
         if not expenses:
-            Ui.display_error("No expenses found.")
             return
 
-        Ui.display_header("Expenses")
-        for index, (exp_id, name, amount) in enumerate(expenses, start=1):
-            print(Fore.CYAN + f"{index}. {name} - ${amount:.2f}")
-        print(Fore.YELLOW + "-" * 60)
-
         try:
             choice = int(input(Fore.BLUE + "Select an expense to remove (number): ")) - 1
             if choice < 0 or choice >= len(expenses):
                 Ui.display_error("Invalid choice. Please select a valid expense number.")
                 return
-            expense_id = expenses[choice][0]
-            self.db.execute_query("DELETE FROM expenses WHERE id = ?", (expense_id,))
+            self.service.remove(self.user_id, self.product_id, expenses[choice].id)
             Ui.display_success("Expense removed successfully!")
         except ValueError:
             Ui.display_error("Invalid input.")
+        except XpenceError as e:
+            Ui.display_error(str(e))
             
+    def fetch_totals(self):
+        # (price, total expenses) as Money, or None if the product is gone
+        try:
+            report = self.service.report(self.user_id, self.product_id)
+        except XpenceError:
+            return None
+        return report.price, report.total_expenses
+
     def view_product_report(self):
-        product = self.db.fetch_one("SELECT price FROM products WHERE id = ?", (self.product_id,))
-        if not product:
-            Ui.display_error("Error: Product not found.")
+        try:
+            report = self.service.report(self.user_id, self.product_id)
+        except XpenceError as e:
+            Ui.display_error(f"Error: {e}")
             return
 
-        price = product[0]
-        total_expenses = self.db.fetch_one("SELECT SUM(amount) FROM expenses WHERE product_id = ?", (self.product_id,))[0] or 0
-
-        net_income_per_unit = price - total_expenses
-        Ui.display_header("Product Report")
-        print(Fore.CYAN + f"Product Price: ${price:.2f}")
-        print(Fore.CYAN + f"Total Expenses: ${total_expenses:.2f}")
-        print(Fore.CYAN + f"Net Income Per Unit: ${net_income_per_unit:.2f}")
-        print(Fore.YELLOW + "-" * 60)
+        with Ui.screen():
+            Ui.display_header("Product Report")
+            Ui.display_lines([
+                f"Product Price: {report.price}",
+                f"Total Expenses: {report.total_expenses}",
+                f"Net Income Per Unit: {report.net_per_unit}",
+            ])
+            Ui.display_separator()
 
     def simulate_profit(self):
-        product = self.db.fetch_one("SELECT price FROM products WHERE id = ?", (self.product_id,))
-        if not product:
-            Ui.display_error("Error: Product not found.")
+        # The report is read once, before asking, and reused for the result
+        try:
+            report = self.service.report(self.user_id, self.product_id)
+        except XpenceError as e:
+            Ui.display_error(f"Error: {e}")
             return
 
-        price = product[0]
-        total_expenses = self.db.fetch_one("SELECT SUM(amount) FROM expenses WHERE product_id = ?", (self.product_id,))[0] or 0
-
-        net_income_per_unit = price - total_expenses
         try:
             quantity = int(input(Fore.BLUE + "Enter number of products sold: "))
-            if quantity < 0:
-                Ui.display_error("Quantity cannot be negative.")
-                return
-            if quantity == 0:
-                Ui.display_error("Quantity cannot be zero.")
-                return
-            total_profit = net_income_per_unit * quantity
+            simulation = self.service.simulate_profit(self.user_id, self.product_id, quantity, report=report)
+        except XpenceError as e:
+            Ui.display_error(str(e))
+            return
+        except ValueError:
+            Ui.display_error("Invalid input. Please enter a number.")
+            return
 
+        with Ui.screen():
             Ui.display_header("Profit Simulation")
-            print(Fore.CYAN + f"Net Income Per Unit: ${net_income_per_unit:.2f}")
-            print(Fore.CYAN + f"Estimated Profit for {quantity} units: ${total_profit:.2f}")
-            print(Fore.YELLOW + "-" * 60)
+            Ui.display_lines([
+                f"Net Income Per Unit: {simulation.net_per_unit}",
+                f"Estimated Profit for {simulation.quantity} units: {simulation.total_profit}",
+            ])
+            Ui.display_separator()
+
+    def simulate_scenarios(self, price_changes=frange(-0.2, 0.2, 5), expense_scales=frange(0.8, 1.2, 5)):
+        try:
+            report = self.service.report(self.user_id, self.product_id)
+        except XpenceError as e:
+            Ui.display_error(f"Error: {e}")
+            return
+
+        try:
+            fixed_costs = input(Fore.BLUE + "Enter fixed costs to cover (0 for none): ")
+            max_quantity = int(input(Fore.BLUE + "Enter maximum number of products sold: "))
+            scenarios = self.service.scenarios(self.user_id, self.product_id, max_quantity, price_changes, expense_scales, fixed_costs,
+                                               report=report)
+        except XpenceError as e:
+            Ui.display_error(str(e))
+            return
         except ValueError:
             Ui.display_error("Invalid input. Please enter a number.")
-            
+            return
+
+        result, profits = scenarios.result, scenarios.profits
+        headers = ["Price \\ Expenses"] + [f"{scale:.0%}" for scale in expense_scales]
+        rows = [
+            [f"{dp:+.0%}"] + [Money(round(profits[i][j][-1])) for j in range(len(expense_scales))]
+            for i, dp in enumerate(price_changes)
+        ]
+        summary = [f"Best scenario: price {result.best_price_change:+.0%}, expenses {result.best_expense_scale:.0%}"
+                   f" -> {Money(round(result.best_net_cents))} per unit"]
+        for label, quantity in [("current", result.break_even_quantity), ("best", result.best_break_even_quantity)]:
+            if quantity is None:
+                summary.append(f"Break-even ({label}): not reached within {max_quantity} units")
+            else:
+                summary.append(f"Break-even ({label}): {quantity} units")
+
+        with Ui.screen():
+            Ui.display_header("What-If Scenarios")
+            Ui.display_lines([f"Profit for {max_quantity} units by price change and expense level:"])
+            Ui.display_table(headers, rows)
+            Ui.display_lines(summary)
+            Ui.display_separator()
+
     # Expense Management Menu
-    def manage_expenses(db, product_id):
+    def manage_expenses(db, user_id, product_id):
         # Fetch the product name
-        product = db.fetch_one("SELECT name FROM products WHERE id = ?", (product_id,))
-        
-        if not product:
-            Ui.display_error("Error: Product not found.")
+        try:
+            product_name = ProductService(db).get(user_id, product_id).name
+        except XpenceError as e:
+            Ui.display_error(f"Error: {e}")
             return
 
-        product_name = product[0]  # Extract the product name
-
         while True:
-            Ui.display_header(f"{product_name}")  # Display product name in header
-            Ui.display_options(["View Expenses", "Add Expense", "Remove Expense", "View Product Report", "Simulate Profit", "Go Back"])
+            with Ui.screen():
+                Ui.display_header(f"{product_name}")  # Display product name in header
+                Ui.display_options(["View Expenses", "Add Expense", "Remove Expense", "View Product Report", "Simulate Profit", "What-If Scenarios", "Go Back"])
             choice = input(Fore.BLUE + "Enter your choice: ")
 
-            expense_manager = Expense(db, product_id)
+            expense_manager = Expense(db, user_id, product_id)
 
             if choice == "1":
-                expenses = db.fetch_all("SELECT name, amount FROM expenses WHERE product_id = ?", (product_id,))
-                if not expenses:
-                    Ui.display_error("No expenses found.")
-                else:
-                    Ui.display_header(f"Expenses for {product_name}")
-                    for index, (name, amount) in enumerate(expenses, start=1):
-                        print(Fore.CYAN + f"{index}. {name} - ${amount:.2f}")
-                    print(Fore.YELLOW + "-" * 60)
+                expense_manager.view_expenses(f"Expenses for {product_name}")
                 input(Fore.YELLOW + "Press Enter to continue...")
             elif choice == "2":
                 expense_manager.add_expense()
@@ -136,4 +198,7 @@ class Expense:
                 expense_manager.simulate_profit()
                 input(Fore.YELLOW + "Press Enter to continue...")
             elif choice == "6":
+                expense_manager.simulate_scenarios()
+                input(Fore.YELLOW + "Press Enter to continue...")
+            elif choice == "7":
                 break
@@ -0,0 +1,222 @@
+"""
+Streaming export of a user's products, expenses and per-product report.
+
+    stats = Exporter(db, user_id).export("expenses", "expenses.csv")
+    Exporter(db, user_id).export("report", "report_columns", fmt="npy")
+
+CSV and JSONL files are written one batch of rows at a time, so memory
+stays flat however large the table is. Amounts are written as decimal
+text ("12.50") in the same columns the importer reads, so an exported
+file can be imported into another database.
+
+The "npy" format writes a directory with one NumPy .npy file per column:
+amounts as int64 cents, ids and counts as int64, margins as float64 (NaN
+when undefined) and names as fixed-width unicode. Analytics jobs can open
+them with numpy.load(path, mmap_mode="r") without parsing anything. The
+files are filled through memory maps batch by batch as well, inside one
+read snapshot so the row count taken up front matches the rows written.
+"""
+import csv
+import itertools
+import json
+import os
+import time
+import simulation
+from services import ValidationError
+
+# Rows fetched and written per batch
+BATCH_SIZE = 10_000
+
+FORMATS = ("csv", "jsonl", "npy")
+
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# Column types: int and money are integers (money in cents), text is a
+# string and float may be NULL
+_NPY_TYPES = {"int": "<i8", "money": "<i8", "float": "<f8"}
+
+
+# A query over one user's rows and the name and type of its columns
+class Table:
+    def __init__(self, query, columns):
+        self.query = query
+        self.columns = columns
+
+    @property
+    def names(self):
+        return [name for name, _ in self.columns]
+
+
+TABLES = {
+    "products": Table(
+        "SELECT id, name, price_cents FROM products WHERE user_id = ? ORDER BY id",
+        [("id", "int"), ("name", "text"), ("price", "money")],
+    ),
+    # Walks the user's products, then each product's expenses through the
+    # covering (product_id, id, ...) index, so nothing has to be sorted
+    "expenses": Table(
+        """
+        SELECT e.id, e.product_id, e.name, e.amount_cents
+        FROM products AS p JOIN expenses AS e ON e.product_id = p.id
+        WHERE p.user_id = ?
+        ORDER BY p.id, e.id
+        """,
+        [("id", "int"), ("product_id", "int"), ("name", "text"), ("amount", "money")],
+    ),
+    # The numbers of the product report, for every product of the user
+    "report": Table(
+        """
+        SELECT p.id, p.name, p.price_cents,
+               COALESCE(t.expense_count, 0),
+               COALESCE(t.expense_total_cents, 0),
+               p.price_cents - COALESCE(t.expense_total_cents, 0),
+               (p.price_cents - COALESCE(t.expense_total_cents, 0)) * 100.0 / NULLIF(p.price_cents, 0)
+        FROM products AS p LEFT JOIN product_totals AS t ON t.product_id = p.id
+        WHERE p.user_id = ?
+        ORDER BY p.id
+        """,
+        [("product_id", "int"), ("name", "text"), ("price", "money"), ("expense_count", "int"),
+         ("total_expenses", "money"), ("net_per_unit", "money"), ("margin", "float")],
+    ),
+}
+
+
+# Outcome of one export call
+class ExportStats:
+    def __init__(self, table, destination, fmt):
+        self.table = table
+        self.destination = destination
+        self.format = fmt
+        self.rows = 0
+        self.elapsed = 0.0
+
+    def summary(self):
+        rate = self.rows / self.elapsed if self.elapsed else 0.0
+        return (f"Exported {self.rows} {self.table} rows to {self.destination} ({self.format}) "
+                f"in {self.elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+
+def cents_text(cents):
+    """Cents as plain decimal text: 1250 -> "12.50", -5 -> "-0.05"."""
+    sign = "-" if cents < 0 else ""
+    dollars, cents = divmod(abs(cents), 100)
+    return f"{sign}{dollars}.{cents:02d}"
+
+
+def detect_format(destination):
+    """"csv" or "jsonl" from the file extension, "npy" for a directory."""
+    extension = os.path.splitext(str(destination))[1].lower()
+    if extension in _EXTENSIONS:
+        return _EXTENSIONS[extension]
+    if not extension or os.path.isdir(destination):
+        return "npy"
+    raise ValidationError(f"Cannot tell the format of {destination}; use .csv, .jsonl or a directory.")
+
+
+class Exporter:
+    def __init__(self, db, user_id, batch_size=BATCH_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+
+    def export(self, table, destination, fmt=None):
+        """Write ``table`` ("products", "expenses" or "report") to a path, or
+        to a text stream for csv/jsonl."""
+        if table not in TABLES:
+            raise ValidationError(f"Cannot export {table!r}; choose one of {', '.join(TABLES)}.")
+        is_path = isinstance(destination, (str, os.PathLike))
+        fmt = fmt or (detect_format(destination) if is_path else "csv")
+        if fmt not in FORMATS:
+            raise ValidationError(f"Unknown export format {fmt!r}.")
+        start = time.perf_counter()
+        stats = ExportStats(table, destination if is_path else getattr(destination, "name", "stream"), fmt)
+        if fmt == "npy":
+            if not is_path:
+                raise ValidationError("The npy format writes a directory; pass a path.")
+            stats.rows = self._write_npy(TABLES[table], destination)
+        else:
+            write = self._write_csv if fmt == "csv" else self._write_jsonl
+            if is_path:
+                with open(destination, "w", encoding="utf-8", newline="") as stream:
+                    stats.rows = write(TABLES[table], stream)
+            else:
+                stats.rows = write(TABLES[table], destination)
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _batches(self, table):
+        rows = self.db.iter_query(table.query, (self.user_id,), self.batch_size)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _text_rows(self, table, batch):
+        # Money columns as decimal text, margins rounded like the dashboard
+        money = [i for i, (_, kind) in enumerate(table.columns) if kind == "money"]
+        floats = [i for i, (_, kind) in enumerate(table.columns) if kind == "float"]
+        if not money and not floats:
+            return batch
+        converted = []
+        for row in batch:
+            row = list(row)
+            for i in money:
+                row[i] = cents_text(row[i])
+            for i in floats:
+                if row[i] is not None:
+                    row[i] = round(row[i], 2)
+            converted.append(row)
+        return converted
+
+    def _write_csv(self, table, stream):
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(table.names)
+        count = 0
+        for batch in self._batches(table):
+            writer.writerows(self._text_rows(table, batch))
+            count += len(batch)
+        return count
+
+    def _write_jsonl(self, table, stream):
+        names = table.names
+        dumps = json.dumps
+        count = 0
+        for batch in self._batches(table):
+            stream.write("".join(dumps(dict(zip(names, row))) + "\n" for row in self._text_rows(table, batch)))
+            count += len(batch)
+        return count
+
+    def _write_npy(self, table, directory):
+        if not simulation.numpy_available():
+            raise ValidationError("The npy format needs NumPy; export to csv or jsonl instead.")
+        np = simulation.np
+        from numpy.lib.format import open_memmap
+        os.makedirs(directory, exist_ok=True)
+        params = (self.user_id,)
+        with self.db.snapshot():
+            # Sizes come from the same snapshot as the rows: the row count
+            # and the widest value of every text column, in one pass
+            aliases = [f"c{i}" for i in range(len(table.columns))]
+            text = [alias for alias, (_, kind) in zip(aliases, table.columns) if kind == "text"]
+            sizes = self.db.fetch_one(
+                f"WITH q ({', '.join(aliases)}) AS ({table.query}) "
+                f"SELECT {', '.join(['COUNT(*)'] + [f'MAX(LENGTH({alias}))' for alias in text])} FROM q", params)
+            count, widths = sizes[0], iter(sizes[1:])
+            dtypes = [f"<U{max(next(widths) or 0, 1)}" if kind == "text" else _NPY_TYPES[kind]
+                      for _, kind in table.columns]
+            arrays = [open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+", dtype=dtype, shape=(count,))
+                      for (name, _), dtype in zip(table.columns, dtypes)]
+            written = 0
+            for batch in self._batches(table):
+                end = written + len(batch)
+                for i, values in enumerate(zip(*batch)):
+                    if table.columns[i][1] == "float":
+                        values = [np.nan if value is None else value for value in values]
+                    arrays[i][written:end] = values
+                written = end
+        for array in arrays:
+            array.flush()
+        del arrays
+        return written
+
@@ -9,9 +9,28 @@ from test_user_authentication import CustomInputMock
 init(autoreset=True)
 
 # Import all test modules
-from test_user_authentication import test_user_authentication, test_user_registration
+from test_user_authentication import test_user_authentication, test_user_registration, test_password_hashing
 from test_product_management import test_view_products, test_add_product, test_remove_product
 from test_expense_management import test_view_expenses, test_add_expense, test_remove_expense, test_profit_simulation
+from test_simulation import test_scenarios
+from test_query_plans import test_query_plans
+from test_migrations import test_migrations
+from test_aggregates import test_product_totals
+from test_connection_pool import test_connection_pool
+from test_async_db import test_async_db
+from test_services import test_services
+from test_dashboard import test_dashboard
+from test_cli import test_cli
+from test_importer import test_importer
+from test_exporter import test_exporter
+from test_server import test_server
+from test_datagen import test_datagen
+from test_instrumentation import test_instrumentation
+from test_metrics import test_metrics
+from test_rows import test_rows
+from test_cache import test_cache
+from test_search import test_search
+from test_ui import test_ui
 
 def print_header(title):
     print("\n" + "="*80)
@@ -37,6 +56,7 @@ def run_all_tests():
         print_section("Running User Authentication Tests")
         results["auth_login"] = test_user_authentication()
         results["auth_register"] = test_user_registration()
+        results["auth_passwords"] = test_password_hashing()
         
         # Product Management Tests
         print_section("Running Product Management Tests")
@@ -50,6 +70,67 @@ def run_all_tests():
         results["expense_add"] = test_add_expense()
         results["expense_remove"] = test_remove_expense()
         results["expense_profit"] = test_profit_simulation()
+        results["expense_scenarios"] = test_scenarios()
+
+        # Service Layer Tests
+        print_section("Running Service Layer Tests")
+        results["services"] = test_services()
+
+        # Dashboard Tests
+        print_section("Running Dashboard Tests")
+        results["dashboard"] = test_dashboard()
+
+        # Command Line Tests
+        print_section("Running Command Line Tests")
+        results["cli"] = test_cli()
+
+        # Bulk Import Tests
+        print_section("Running Bulk Import Tests")
+        results["importer"] = test_importer()
+
+        # Export Tests
+        print_section("Running Export Tests")
+        results["exporter"] = test_exporter()
+
+        # HTTP Server Tests
+        print_section("Running HTTP Server Tests")
+        results["server"] = test_server()
+
+        # Data Generator Tests
+        print_section("Running Data Generator Tests")
+        results["datagen"] = test_datagen()
+
+        # Instrumentation Tests
+        print_section("Running Instrumentation Tests")
+        results["instrumentation"] = test_instrumentation()
+
+        # Metrics Tests
+        print_section("Running Metrics Tests")
+        results["metrics"] = test_metrics()
+
+        # Row Type Tests
+        print_section("Running Row Type Tests")
+        results["rows"] = test_rows()
+
+        # Cache Tests
+        print_section("Running Cache Tests")
+        results["cache"] = test_cache()
+
+        # Search Tests
+        print_section("Running Search Tests")
+        results["search"] = test_search()
+
+        # UI Rendering Tests
+        print_section("Running UI Rendering Tests")
+        results["ui"] = test_ui()
+
+        # Database Tests
+        print_section("Running Database Tests")
+        results["db_query_plans"] = test_query_plans()
+        results["db_migrations"] = test_migrations()
+        results["db_product_totals"] = test_product_totals()
+        results["db_connection_pool"] = test_connection_pool()
+        results["db_async"] = test_async_db()
     
     # Calculate totals
     for module, (passed, total) in results.items():
@@ -60,11 +141,12 @@ def run_all_tests():
     print_header("XPENCE FUNCTIONALITY TESTING SUMMARY")
     
     # User Auth Summary
-    auth_passed = results["auth_login"][0] + results["auth_register"][0]
-    auth_total = results["auth_login"][1] + results["auth_register"][1]
+    auth_passed = results["auth_login"][0] + results["auth_register"][0] + results["auth_passwords"][0]
+    auth_total = results["auth_login"][1] + results["auth_register"][1] + results["auth_passwords"][1]
     print(f"{Fore.CYAN}User Authentication: {Fore.GREEN}{auth_passed}/{auth_total} tests passed ({auth_passed/auth_total*100:.1f}%)")
     print(f"  {Fore.WHITE}Login Tests: {Fore.GREEN}{results['auth_login'][0]}/{results['auth_login'][1]} passed")
     print(f"  {Fore.WHITE}Registration Tests: {Fore.GREEN}{results['auth_register'][0]}/{results['auth_register'][1]} passed")
+    print(f"  {Fore.WHITE}Password Hashing Tests: {Fore.GREEN}{results['auth_passwords'][0]}/{results['auth_passwords'][1]} passed")
     
     # Product Management Summary
     product_passed = results["product_view"][0] + results["product_add"][0] + results["product_remove"][0]
@@ -76,14 +158,70 @@ def run_all_tests():
     
     # Expense Management Summary
     expense_passed = (results["expense_view"][0] + results["expense_add"][0] + 
-                      results["expense_remove"][0] + results["expense_profit"][0])
+                      results["expense_remove"][0] + results["expense_profit"][0] +
+                      results["expense_scenarios"][0])
     expense_total = (results["expense_view"][1] + results["expense_add"][1] + 
-                    results["expense_remove"][1] + results["expense_profit"][1])
+                    results["expense_remove"][1] + results["expense_profit"][1] +
+                    results["expense_scenarios"][1])
     print(f"\n{Fore.CYAN}Expense Management: {Fore.GREEN}{expense_passed}/{expense_total} tests passed ({expense_passed/expense_total*100:.1f}%)")
     print(f"  {Fore.WHITE}View Expenses Tests: {Fore.GREEN}{results['expense_view'][0]}/{results['expense_view'][1]} passed")
     print(f"  {Fore.WHITE}Add Expense Tests: {Fore.GREEN}{results['expense_add'][0]}/{results['expense_add'][1]} passed")
     print(f"  {Fore.WHITE}Remove Expense Tests: {Fore.GREEN}{results['expense_remove'][0]}/{results['expense_remove'][1]} passed")
     print(f"  {Fore.WHITE}Profit Simulation Tests: {Fore.GREEN}{results['expense_profit'][0]}/{results['expense_profit'][1]} passed")
+    print(f"  {Fore.WHITE}Scenario Simulation Tests: {Fore.GREEN}{results['expense_scenarios'][0]}/{results['expense_scenarios'][1]} passed")
+
+    # Service Layer Summary
+    print(f"\n{Fore.CYAN}Service Layer: {Fore.GREEN}{results['services'][0]}/{results['services'][1]} tests passed ({results['services'][0]/results['services'][1]*100:.1f}%)")
+
+    # Dashboard Summary
+    print(f"\n{Fore.CYAN}Dashboard: {Fore.GREEN}{results['dashboard'][0]}/{results['dashboard'][1]} tests passed ({results['dashboard'][0]/results['dashboard'][1]*100:.1f}%)")
+
+    # Command Line Summary
+    print(f"\n{Fore.CYAN}Command Line: {Fore.GREEN}{results['cli'][0]}/{results['cli'][1]} tests passed ({results['cli'][0]/results['cli'][1]*100:.1f}%)")
+
+    # Bulk Import Summary
+    print(f"\n{Fore.CYAN}Bulk Import: {Fore.GREEN}{results['importer'][0]}/{results['importer'][1]} tests passed ({results['importer'][0]/results['importer'][1]*100:.1f}%)")
+
+    # Export Summary
+    print(f"\n{Fore.CYAN}Export: {Fore.GREEN}{results['exporter'][0]}/{results['exporter'][1]} tests passed ({results['exporter'][0]/results['exporter'][1]*100:.1f}%)")
+
+    # HTTP Server Summary
+    print(f"\n{Fore.CYAN}HTTP Server: {Fore.GREEN}{results['server'][0]}/{results['server'][1]} tests passed ({results['server'][0]/results['server'][1]*100:.1f}%)")
+
+    # Data Generator Summary
+    print(f"\n{Fore.CYAN}Data Generator: {Fore.GREEN}{results['datagen'][0]}/{results['datagen'][1]} tests passed ({results['datagen'][0]/results['datagen'][1]*100:.1f}%)")
+
+    # Instrumentation Summary
+    print(f"\n{Fore.CYAN}Instrumentation: {Fore.GREEN}{results['instrumentation'][0]}/{results['instrumentation'][1]} tests passed ({results['instrumentation'][0]/results['instrumentation'][1]*100:.1f}%)")
+
+    # Metrics Summary
+    print(f"\n{Fore.CYAN}Metrics: {Fore.GREEN}{results['metrics'][0]}/{results['metrics'][1]} tests passed ({results['metrics'][0]/results['metrics'][1]*100:.1f}%)")
+
+    # Row Types Summary
+    print(f"\n{Fore.CYAN}Row Types: {Fore.GREEN}{results['rows'][0]}/{results['rows'][1]} tests passed ({results['rows'][0]/results['rows'][1]*100:.1f}%)")
+
+    # Cache Summary
+    print(f"\n{Fore.CYAN}Cache: {Fore.GREEN}{results['cache'][0]}/{results['cache'][1]} tests passed ({results['cache'][0]/results['cache'][1]*100:.1f}%)")
+
+    # Search Summary
+    print(f"\n{Fore.CYAN}Search: {Fore.GREEN}{results['search'][0]}/{results['search'][1]} tests passed ({results['search'][0]/results['search'][1]*100:.1f}%)")
+
+    # UI Rendering Summary
+    print(f"\n{Fore.CYAN}UI Rendering: {Fore.GREEN}{results['ui'][0]}/{results['ui'][1]} tests passed ({results['ui'][0]/results['ui'][1]*100:.1f}%)")
+
+    # Database Summary
+    db_passed = (results["db_query_plans"][0] + results["db_migrations"][0] +
+                 results["db_product_totals"][0] + results["db_connection_pool"][0] +
+                 results["db_async"][0])
+    db_total = (results["db_query_plans"][1] + results["db_migrations"][1] +
+                results["db_product_totals"][1] + results["db_connection_pool"][1] +
+                results["db_async"][1])
+    print(f"\n{Fore.CYAN}Database: {Fore.GREEN}{db_passed}/{db_total} tests passed ({db_passed/db_total*100:.1f}%)")
+    print(f"  {Fore.WHITE}Query Plan Tests: {Fore.GREEN}{results['db_query_plans'][0]}/{results['db_query_plans'][1]} passed")
+    print(f"  {Fore.WHITE}Migration Tests: {Fore.GREEN}{results['db_migrations'][0]}/{results['db_migrations'][1]} passed")
+    print(f"  {Fore.WHITE}Product Totals Tests: {Fore.GREEN}{results['db_product_totals'][0]}/{results['db_product_totals'][1]} passed")
+    print(f"  {Fore.WHITE}Connection Pool Tests: {Fore.GREEN}{results['db_connection_pool'][0]}/{results['db_connection_pool'][1]} passed")
+    print(f"  {Fore.WHITE}Async Database Tests: {Fore.GREEN}{results['db_async'][0]}/{results['db_async'][1]} passed")
     
     # Overall Summary
     print("\n" + "="*80)
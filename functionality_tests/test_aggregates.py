@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import aggregates
+from database import Database
+from colorama import Fore
+
+
+def seeded_database():
+    db = Database(":memory:")
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                   [(1, "Juice", 1200), (1, "Chips", 1000)])
+    db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                   [(1, "Bottle", 250), (1, "Label", 50), (2, "Bag", 75)])
+    return db
+
+
+def totals(db):
+    return db.fetch_all("SELECT product_id, expense_count, expense_total_cents FROM product_totals ORDER BY product_id")
+
+
+def check_insert():
+    return totals(seeded_database())
+
+
+def check_delete():
+    db = seeded_database()
+    db.execute_query("DELETE FROM expenses WHERE name = ?", ("Bottle",))
+    return totals(db)
+
+
+def check_update():
+    db = seeded_database()
+    db.execute_query("UPDATE expenses SET product_id = 2, amount_cents = 60 WHERE name = ?", ("Label",))
+    return totals(db)
+
+
+def check_remove_product():
+    db = seeded_database()
+    with db.transaction():
+        db.execute_query("DELETE FROM expenses WHERE product_id = ?", (2,))
+        db.execute_query("DELETE FROM products WHERE id = ?", (2,))
+    return totals(db)
+
+
+def check_drift_detected():
+    db = seeded_database()
+    db.execute_query("UPDATE product_totals SET expense_total_cents = 1 WHERE product_id = 1")
+    return aggregates.find_drift(db)
+
+
+def check_rebuild():
+    db = seeded_database()
+    db.execute_query("DELETE FROM product_totals")
+    aggregates.rebuild(db, products_per_batch=1)
+    return (aggregates.find_drift(db), totals(db))
+
+
+# Function to test the trigger-maintained product totals
+def test_product_totals():
+    """Test that product_totals follows every expense change and can be rebuilt"""
+    test_cases = [
+        {"id": "TC501", "description": "Inserts add to product totals",
+         "check": check_insert, "expected": [(1, 2, 300), (2, 1, 75)]},
+
+        {"id": "TC502", "description": "Deletes subtract from totals",
+         "check": check_delete, "expected": [(1, 1, 50), (2, 1, 75)]},
+
+        {"id": "TC503", "description": "Updates move amount and product",
+         "check": check_update, "expected": [(1, 1, 250), (2, 2, 135)]},
+
+        {"id": "TC504", "description": "Removing product drops its totals",
+         "check": check_remove_product, "expected": [(1, 2, 300)]},
+
+        {"id": "TC505", "description": "Checker reports tampered totals",
+         "check": check_drift_detected, "expected": [(1, 2, 1, 2, 300)]},
+
+        {"id": "TC506", "description": "Rebuild restores consistent totals",
+         "check": check_rebuild, "expected": ([], [(1, 2, 300), (2, 1, 75)])}
+    ]
+
+    results = []
+    for test_case in test_cases:
+        try:
+            result = test_case["check"]()
+        except Exception as e:
+            result = str(e)
+
+        status = "PASS" if result == test_case["expected"] else "FAIL"
+        results.append({
+            "id": test_case["id"],
+            "description": test_case["description"],
+            "status": status,
+            "expected": str(test_case["expected"]),
+            "actual": str(result)
+        })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("PRODUCT TOTALS TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Product Totals\n")
+    test_product_totals()
@@ -0,0 +1,191 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import contextlib
+import tempfile
+import time
+from async_db import AsyncDatabase, AsyncProduct, AsyncExpense
+from money import Money
+from services import ProductReport
+from colorama import Fore
+
+
+async def seeded_database(path, **kwargs):
+    adb = await AsyncDatabase.open(path, **kwargs)
+    await adb.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    await AsyncProduct(adb, 1).add_product("Juice", Money(1200))
+    await AsyncExpense(adb, 1, 1).add_expenses([(f"Expense {i}", Money(10)) for i in range(2500)])
+    return adb
+
+
+async def check_reports(path):
+    # Many coroutines reading at once, all served by the worker threads
+    adb = await seeded_database(path)
+    reports = await asyncio.gather(*[AsyncExpense(adb, 1, 1).report() for _ in range(500)])
+    await adb.close()
+    return set(reports) == {ProductReport(1, Money(1200), Money(25000), Money(-23800))}, len(reports)
+
+
+async def check_stream(path):
+    adb = await seeded_database(path)
+    ids = [row[0] async for row in adb.iter_query("SELECT id FROM expenses ORDER BY id", batch_size=100)]
+    await adb.close()
+    return len(ids), ids[-1]
+
+
+async def check_stream_stops_early(path):
+    adb = await seeded_database(path)
+    rows = 0
+    async with contextlib.aclosing(adb.iter_query("SELECT id FROM expenses", batch_size=10)) as stream:
+        async for _ in stream:
+            rows += 1
+            if rows == 25:
+                break
+    # The reader went back to the pool, so other queries still get one
+    count = await adb.fetch_one("SELECT COUNT(*) FROM expenses")
+    await adb.close()
+    return rows, count[0]
+
+
+async def check_batch_write(path):
+    adb = await seeded_database(path)
+    await adb.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                          ((1, f"Batch {i}", 5) for i in range(100)))
+    report = await AsyncExpense(adb, 1, 1).report()
+    await adb.close()
+    return report.total_expenses
+
+
+async def check_invalid_product(path):
+    adb = await seeded_database(path)
+    try:
+        await AsyncProduct(adb, 1).add_product("Soda", Money(-100))
+        result = "added"
+    except ValueError as e:
+        result = str(e)
+    await adb.close()
+    return result
+
+
+async def check_remove_product(path):
+    adb = await seeded_database(path)
+    products = AsyncProduct(adb, 1)
+    await products.remove_product(1)
+    result = (await products.fetch_page()).rows, await adb.fetch_one("SELECT COUNT(*) FROM expenses")
+    await adb.close()
+    return result
+
+
+async def check_concurrent_streams(path):
+    # More streams than readers, each awaiting other reads as it goes; a
+    # plain read meanwhile does not queue behind the streams
+    adb = await seeded_database(path, timeout=1.0)
+    waits = []
+
+    async def stream():
+        rows = 0
+        async for _ in adb.iter_query("SELECT id FROM expenses", batch_size=100):
+            rows += 1
+            if rows % 100 == 0:
+                await adb.fetch_one("SELECT COUNT(*) FROM products")
+                await asyncio.sleep(0.005)
+        return rows
+
+    async def plain_read():
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await adb.fetch_one("SELECT COUNT(*) FROM expenses")
+        waits.append(time.perf_counter() - start)
+
+    counts = await asyncio.gather(*[stream() for _ in range(adb.db.pool.max_readers + 2)], plain_read())
+    await adb.close()
+    return counts[:-1] == [2500] * (adb.db.pool.max_readers + 2), waits[0] < 0.2
+
+
+async def check_memory_stream(path):
+    # In-memory databases have only the writer connection to stream from
+    adb = await AsyncDatabase.open(":memory:")
+    try:
+        async for _ in adb.iter_query("SELECT 1"):
+            pass
+        result = "streamed"
+    except ValueError as e:
+        result = str(e)
+    await adb.close()
+    return result
+
+
+# Function to test the asyncio facade
+def test_async_db():
+    """Test async reads, streaming and writes through AsyncDatabase"""
+    test_cases = [
+        {"id": "TC801", "description": "500 concurrent report reads",
+         "check": check_reports, "expected": (True, 500)},
+
+        {"id": "TC802", "description": "Async streaming iteration",
+         "check": check_stream, "expected": (2500, 2500)},
+
+        {"id": "TC803", "description": "Stream closed early frees reader",
+         "check": check_stream_stops_early, "expected": (25, 2500)},
+
+        {"id": "TC804", "description": "Async batch write",
+         "check": check_batch_write, "expected": Money(25500)},
+
+        {"id": "TC805", "description": "Invalid product rejected",
+         "check": check_invalid_product, "expected": "Product price cannot be negative."},
+
+        {"id": "TC806", "description": "Remove product and its expenses",
+         "check": check_remove_product, "expected": ([], (0,))},
+
+        {"id": "TC807", "description": "More streams than readers",
+         "check": check_concurrent_streams, "expected": (True, True)},
+
+        {"id": "TC808", "description": "In-memory streaming rejected",
+         "check": check_memory_stream,
+         "expected": "Streaming needs a database file; an in-memory database has only the writer connection."}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = asyncio.run(test_case["check"](os.path.join(tmp, f"{test_case['id']}.db")))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("ASYNC DATABASE TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Async Database\n")
+    test_async_db()
@@ -0,0 +1,240 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import tempfile
+import cache
+import metrics
+from database import Database
+from importer import Importer
+from money import Money
+from services import UserService, ProductService, ExpenseService
+from colorama import Fore
+
+
+def seeded_database(path):
+    # Two users with a product each; user 1's product has two expenses
+    db = Database(path)
+    users = UserService(db)
+    users.register("user", "secret")
+    users.register("other", "secret")
+    ProductService(db).add(1, "Juice", "12.00")
+    ProductService(db).add(2, "Chips", "3.00")
+    ExpenseService(db).add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50")])
+    cache.enable(db)
+    return db
+
+
+def counts(db):
+    stats = db.cache.stats()
+    return stats["hits"], stats["misses"]
+
+
+def check_hits(path):
+    db = seeded_database(path)
+    products, expenses = ProductService(db), ExpenseService(db)
+    first = [p.name for p in products.list(1).rows]
+    for _ in range(3):
+        products.list(1)
+        expenses.report(1, 1)
+    return first, counts(db), db.cache.stats()["entries"]
+
+
+def check_product_write(path):
+    # A new product drops only its user's lists
+    db = seeded_database(path)
+    products = ProductService(db)
+    products.list(1)
+    products.list(2)
+    products.add(1, "Soap", "4.00")
+    names = [p.name for p in products.list(1).rows]
+    products.list(2)
+    return names, counts(db)
+
+
+def check_expense_write(path):
+    # An expense drops its product's report, not the product list or other reports
+    db = seeded_database(path)
+    products, expenses = ProductService(db), ExpenseService(db)
+    products.list(1)
+    expenses.report(1, 1)
+    expenses.report(2, 2)
+    expenses.add(1, 1, "Cap", "1.00")
+    total = expenses.report(1, 1).total_expenses
+    expenses.report(2, 2)
+    products.list(1)
+    return total, counts(db)
+
+
+def check_remove_product(path):
+    db = seeded_database(path)
+    products = ProductService(db)
+    products.get(1, 1)
+    products.list(1)
+    products.remove(1, 1)
+    try:
+        products.get(1, 1)
+        found = True
+    except Exception:
+        found = False
+    return found, products.list(1).rows, db.cache.stats()["entries"]
+
+
+def check_other_process(path):
+    # Another connection (as another process would) writes; data_version notices
+    db = seeded_database(path)
+    expenses = ExpenseService(db)
+    before = expenses.report(1, 1).total_expenses
+    other = Database(path)
+    ExpenseService(other).add(1, 1, "Cap", "1.00")
+    other.close()
+    after = expenses.report(1, 1).total_expenses
+    return before, after, metrics.REGISTRY.get("xpence_cache_invalidations_total").labels("external").value() > 0
+
+
+def check_transaction(path):
+    # Reads inside a transaction see its own writes and bypass the cache;
+    # a rollback keeps the cached entries
+    db = seeded_database(path)
+    expenses = ExpenseService(db)
+    expenses.report(1, 1)
+    try:
+        with db.transaction():
+            expenses.add(1, 1, "Cap", "1.00")
+            inside = expenses.report(1, 1).total_expenses
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    after = expenses.report(1, 1).total_expenses
+    stats = db.cache.stats()
+    return inside, after, stats["bypasses"], stats["hits"]
+
+
+def check_eviction(path):
+    # Room for about two report entries: the least recently used goes first
+    db = seeded_database(path)
+    expenses = ExpenseService(db)
+    for product_id in range(3, 6):
+        ProductService(db).add(1, f"Product {product_id}", "1.00")
+    size = cache.sizeof(expenses.report(1, 1))
+    cache.enable(db, max_bytes=size * 2 + size // 2)
+    expenses.report(1, 1)
+    expenses.report(1, 3)
+    expenses.report(1, 1)
+    expenses.report(1, 4)
+    stats = db.cache.stats()
+    expenses.report(1, 1)
+    return stats["entries"], stats["evictions"], stats["bytes"] <= stats["max_bytes"], counts(db)
+
+
+def check_import(path):
+    db = seeded_database(path)
+    expenses = ExpenseService(db)
+    expenses.report(1, 1)
+    expenses.report(2, 2)
+    data = io.BytesIO(b"product,name,amount\nJuice,Cap,1.00\n")
+    Importer(db, 1).import_expenses(data, fmt="csv")
+    return expenses.report(1, 1).total_expenses, expenses.report(2, 2).total_expenses, counts(db)
+
+
+def check_racing_load(path):
+    # A write committed while a miss is loading: the loaded value is returned
+    # but not stored, so the next lookup reads the new rows
+    db = seeded_database(path)
+    expenses = ExpenseService(db)
+
+    def load():
+        value = expenses._load_report(1, 1)
+        ExpenseService(db).add(1, 1, "Cap", "1.00")
+        return value
+
+    stale = db.cache.get(("report", 1, 1), [("product", 1)], load).total_expenses
+    return stale, expenses.report(1, 1).total_expenses, db.cache.stats()["misses"]
+
+
+def check_isolation(path):
+    # Callers get their own list; changing it leaves the cached page alone
+    db = seeded_database(path)
+    products = ProductService(db)
+    products.list(1).rows.clear()
+    return [p.name for p in products.list(1).rows], counts(db)
+
+
+# Function to test the read-through cache
+def test_cache():
+    """Test cache hits, precise invalidation, data_version and eviction"""
+    test_cases = [
+        {"id": "TC1801", "description": "Repeated reads are hits",
+         "check": check_hits, "expected": (["Juice"], (5, 2), 2)},
+
+        {"id": "TC1802", "description": "Product add drops user's lists",
+         "check": check_product_write, "expected": (["Juice", "Soap"], (1, 3))},
+
+        {"id": "TC1803", "description": "Expense add drops its report",
+         "check": check_expense_write, "expected": (Money(400), (2, 4))},
+
+        {"id": "TC1804", "description": "Product removal drops entries",
+         "check": check_remove_product, "expected": (False, [], 1)},
+
+        {"id": "TC1805", "description": "Other connection's write seen",
+         "check": check_other_process, "expected": (Money(300), Money(400), True)},
+
+        {"id": "TC1806", "description": "Transactions bypass the cache",
+         "check": check_transaction, "expected": (Money(400), Money(300), 1, 1)},
+
+        {"id": "TC1807", "description": "LRU eviction within budget",
+         "check": check_eviction, "expected": (2, 1, True, (2, 3))},
+
+        {"id": "TC1808", "description": "Import drops imported products",
+         "check": check_import, "expected": (Money(400), Money(0), (1, 3))},
+
+        {"id": "TC1809", "description": "Load racing a write not stored",
+         "check": check_racing_load, "expected": (Money(300), Money(400), 2)},
+
+        {"id": "TC1810", "description": "Cached pages are not shared",
+         "check": check_isolation, "expected": (["Juice"], (1, 1))}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("CACHE TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Cache\n")
+    test_cache()
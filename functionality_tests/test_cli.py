@@ -0,0 +1,214 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import json
+import subprocess
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+import cli
+import migrations
+from database import Database
+from services import UserService, ProductService, ExpenseService
+from colorama import Fore
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def seeded_database(path):
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("other", "pass"))
+    ProductService(db).add(1, "Juice", "12.00")
+    ExpenseService(db).add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50")])
+    db.close()
+
+
+def run(path, *argv):
+    # Exit code, stdout and stderr of one in-process CLI run
+    out, err = io.StringIO(), io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        code = cli.main(["--db", path, *argv])
+    return code, out.getvalue(), err.getvalue()
+
+
+def check_product_add(path):
+    seeded_database(path)
+    code, out, _ = run(path, "--user", "user", "product", "add", "Chips", "3.25")
+    db = Database(path)
+    return code, out.strip(), db.fetch_one("SELECT user_id, price_cents FROM products WHERE name = 'Chips'")
+
+
+def check_report_json(path):
+    seeded_database(path)
+    code, out, _ = run(path, "--user", "user", "report", "--json")
+    row = json.loads(out)[0]
+    return code, row["name"], row["total_expenses_cents"], row["net_per_unit"], row["margin"]
+
+
+def check_expense_import(path):
+    seeded_database(path)
+    csv_path = path + ".csv"
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("name,amount\nCap,0.10\nBox,1.40\n")
+    code, out, _ = run(path, "--user", "user", "expense", "import", csv_path, "--product", "1")
+    return code, out.startswith("Imported 2 expenses"), ExpenseService(Database(path)).report(1, 1).total_expenses.cents
+
+
+def check_import_invalid_row(path):
+    # A bad row rejects the whole file
+    seeded_database(path)
+    csv_path = path + ".csv"
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("name,amount\nCap,0.10\nRefund,-1.00\n")
+    code, _, err = run(path, "--user", "user", "expense", "import", csv_path, "--product", "1")
+    return code, err.strip(), ExpenseService(Database(path)).report(1, 1).total_expenses.cents
+
+
+def check_foreign_product(path):
+    seeded_database(path)
+    return run(path, "--user", "other", "expense", "add", "1", "Cap", "0.10")[::2]
+
+
+def check_unknown_user(path):
+    seeded_database(path)
+    return run(path, "--user", "nobody", "product", "list")[::2]
+
+
+def check_failures(path):
+    # Files and databases that cannot be opened end in "error: ..." and 1
+    seeded_database(path)
+    missing = os.path.join(os.path.dirname(path), "missing", "x")
+    runs = [run(missing + ".db", "--user", "user", "report"),
+            run(path, "--user", "user", "expense", "import", missing + ".csv", "--product", "1"),
+            run(path, "--user", "user", "export", "products", missing + ".csv")]
+    return [(code, err.startswith("error: "), out) for code, out, err in runs]
+
+
+def check_out_of_range(path):
+    # Amounts beyond what Money and SQLite hold are one-line errors, not tracebacks
+    seeded_database(path)
+    runs = [run(path, "--user", "user", "product", "add", "X", "1e30"),
+            run(path, "--user", "user", "expense", "add", "1", "X", "99999999999999999999")]
+    return [(code, out, err) for code, out, err in runs]
+
+
+def check_register(path):
+    seeded_database(path)
+    stdin = sys.stdin
+    sys.stdin = io.StringIO("secret\n")
+    try:
+        code, out, _ = run(path, "user", "add", "carol", "--password-stdin")
+    finally:
+        sys.stdin = stdin
+    return code, out.strip(), UserService(Database(path)).login("carol", "secret")
+
+
+def check_schema_current(path):
+    # Reopening a migrated database runs no migrations
+    seeded_database(path)
+    db = Database(path)
+    return db.create_tables(), migrations.get_version(db) == migrations.latest_version()
+
+
+def check_lazy_imports(path):
+    # JSON output never loads colorama, the Ui or NumPy
+    seeded_database(path)
+    script = ("import sys, cli; code = cli.main(['--db', sys.argv[1], '--user', 'user', 'report', '--json']);"
+              "print(code, sorted(m for m in ('colorama', 'ui', 'numpy') if m in sys.modules), file=sys.stderr)")
+    result = subprocess.run([sys.executable, "-c", script, path], cwd=ROOT, capture_output=True, text=True)
+    return result.stderr.strip()
+
+
+def check_timings(path):
+    seeded_database(path)
+    code, _, err = run(path, "--timings", "--user", "user", "product", "list", "--json")
+    return code, err.startswith("timings: startup") and "open database" in err and "total" in err
+
+
+# Function to test the non-interactive command line
+def test_cli():
+    """Test one-shot CLI commands against a database file"""
+    test_cases = [
+        {"id": "TC1001", "description": "product add",
+         "check": check_product_add, "expected": (0, "Added product 2: Chips $3.25", (1, 325))},
+
+        {"id": "TC1002", "description": "report --json",
+         "check": check_report_json, "expected": (0, "Juice", 300, "$9.00", 75.0)},
+
+        {"id": "TC1003", "description": "expense import from CSV",
+         "check": check_expense_import, "expected": (0, True, 450)},
+
+        {"id": "TC1004", "description": "Invalid row aborts import",
+         "check": check_import_invalid_row, "expected": (1, "error: Row 2: Expense amount cannot be negative.", 300)},
+
+        {"id": "TC1005", "description": "Another user's product",
+         "check": check_foreign_product, "expected": (1, "error: Product not found.\n")},
+
+        {"id": "TC1006", "description": "Unknown --user",
+         "check": check_unknown_user, "expected": (1, "error: No user named 'nobody'.\n")},
+
+        {"id": "TC1007", "description": "user add --password-stdin",
+         "check": check_register, "expected": (0, "Registered user carol (id 3)", 3)},
+
+        {"id": "TC1008", "description": "Current schema skips migrations",
+         "check": check_schema_current, "expected": ([], True)},
+
+        {"id": "TC1009", "description": "--json skips Ui/colorama/numpy",
+         "check": check_lazy_imports, "expected": "0 []"},
+
+        {"id": "TC1010", "description": "--timings on stderr",
+         "check": check_timings, "expected": (0, True)},
+
+        {"id": "TC1011", "description": "Unopenable files exit 1",
+         "check": check_failures, "expected": [(1, True, "")] * 3},
+
+        {"id": "TC1012", "description": "Out-of-range amounts exit 1",
+         "check": check_out_of_range,
+         "expected": [(1, "", "error: Invalid price. Please enter a number.\n"),
+                      (1, "", "error: Invalid amount. Please enter a number.\n")]}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("COMMAND LINE TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Command Line\n")
+    test_cli()
@@ -0,0 +1,285 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from database import Database, PoolTimeout, CheckpointManager, PROFILES
+from colorama import Fore
+
+
+def seeded_database(path, **kwargs):
+    db = Database(path, **kwargs)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                   [(1, f"Product {i}", 100 * i) for i in range(1, 51)])
+    return db
+
+
+def check_parallel_reads(path):
+    db = seeded_database(path)
+
+    def read(_):
+        return db.fetch_one("SELECT COUNT(*), SUM(price_cents) FROM products WHERE user_id = ?", (1,))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = set(pool.map(read, range(200)))
+    db.close()
+    return results
+
+
+def check_parallel_writes(path):
+    db = seeded_database(path)
+
+    def write(i):
+        db.execute_query("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)", (1, f"E{i}", 10))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(100)))
+    result = db.fetch_one("SELECT expense_count, expense_total_cents FROM product_totals WHERE product_id = 1")
+    db.close()
+    return result
+
+
+def check_nested_iteration(path):
+    # Queries inside the loop must not clobber the outer result set
+    db = seeded_database(path)
+    names = []
+    for product_id, in db.iter_query("SELECT id FROM products ORDER BY id", batch_size=7):
+        names.append(db.fetch_one("SELECT name FROM products WHERE id = ?", (product_id,))[0])
+    db.close()
+    return len(names), names[-1]
+
+
+def check_transaction_isolation(path):
+    # The writing thread sees its uncommitted insert; another thread does not
+    db = seeded_database(path)
+    query = "SELECT COUNT(*) FROM products"
+    with db.transaction():
+        db.execute_query("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)", (1, "New", 1))
+        inside = db.fetch_one(query)[0]
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            other_thread = pool.submit(db.fetch_one, query).result()[0]
+    after = db.fetch_one(query)[0]
+    db.close()
+    return inside, other_thread, after
+
+
+def check_reader_timeout(path):
+    db = seeded_database(path, max_readers=1, timeout=0.2)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_reader():
+        for _ in db.iter_query("SELECT id FROM products"):
+            holding.set()
+            release.wait()
+            break
+
+    thread = threading.Thread(target=hold_reader)
+    thread.start()
+    holding.wait()
+    try:
+        db.fetch_one("SELECT 1")
+        result = "no timeout"
+    except PoolTimeout:
+        result = "PoolTimeout"
+    release.set()
+    thread.join()
+    db.close()
+    return result
+
+
+def check_writer_timeout(path):
+    db = seeded_database(path, timeout=0.2)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_writer():
+        with db.transaction():
+            holding.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold_writer)
+    thread.start()
+    holding.wait()
+    try:
+        db.execute_query("DELETE FROM products WHERE id = ?", (1,))
+        result = "no timeout"
+    except PoolTimeout:
+        result = "PoolTimeout"
+    release.set()
+    thread.join()
+    db.close()
+    return result
+
+
+def check_memory_database(path):
+    # In-memory databases cannot share readers, so every thread uses the writer
+    db = seeded_database(":memory:")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        counts = set(pool.map(lambda _: db.fetch_one("SELECT COUNT(*) FROM products")[0], range(20)))
+    return db.pool.max_readers, counts
+
+
+def pragmas(conn, names):
+    return tuple(conn.execute(f"PRAGMA {name}").fetchone()[0] for name in names)
+
+
+def check_profiles(path):
+    # The writer takes every pragma of a profile, readers all but the
+    # file-level ones
+    db = seeded_database(path)
+    connection_pragmas = ("synchronous", "cache_size", "mmap_size", "temp_store")
+    applied = {}
+    for name in PROFILES:
+        db.apply_profile(name)
+        with db.pool.writer() as conn:
+            writer = pragmas(conn, ("journal_mode", *connection_pragmas))
+        with db.pool.reader() as conn:
+            reader = pragmas(conn, connection_pragmas)
+        applied[name] = writer, reader
+    db.close()
+    return applied
+
+
+def check_unknown_profile(path):
+    db = seeded_database(path)
+    try:
+        db.apply_profile("turbo")
+        result = "applied"
+    except KeyError as e:
+        result = f"KeyError {e}"
+    profile = db.profile
+    db.close()
+    return result, profile == PROFILES["balanced"]
+
+
+def check_default_wal(path):
+    db = seeded_database(path)
+    mode = db.fetch_one("PRAGMA journal_mode")[0]
+    wal = os.path.exists(path + "-wal")
+    db.close()
+    return mode, wal
+
+
+def wait_for(condition, seconds=5.0):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def check_truncate_threshold(path):
+    # Below max_wal_bytes the manager runs passive checkpoints, which leave
+    # the WAL file its size; above it, TRUNCATE empties the file
+    db = seeded_database(path)
+    results = []
+    for max_wal_bytes in (1 << 30, 1):
+        db.executemany("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                       [(1, f"More {i}", i) for i in range(200)])
+        manager = CheckpointManager(path, interval=0.01, max_wal_bytes=max_wal_bytes)
+        size = manager.wal_size()
+        manager.start()
+        results.append(wait_for(lambda: manager.wal_size() == 0, seconds=0.5 if max_wal_bytes > 1 else 5.0))
+        manager.stop()
+        results.append(size > 0)
+    db.close()
+    return results
+
+
+def check_checkpointer_lifecycle(path):
+    # checkpoint_interval starts the manager's thread; close() stops it
+    db = seeded_database(path, checkpoint_interval=0.01)
+    thread = db.checkpointer._thread
+    running = thread.is_alive()
+    db.close()
+    return running, thread.is_alive(), "wal-checkpoint" in {t.name for t in threading.enumerate()}
+
+
+# Function to test the connection pool behind Database
+def test_connection_pool():
+    """Test reads and writes from many threads through the connection pool"""
+    test_cases = [
+        {"id": "TC701", "description": "Parallel reads from 8 threads",
+         "check": check_parallel_reads, "expected": {(50, 127500)}},
+
+        {"id": "TC702", "description": "Parallel writes from 8 threads",
+         "check": check_parallel_writes, "expected": (100, 1000)},
+
+        {"id": "TC703", "description": "Query inside iter_query loop",
+         "check": check_nested_iteration, "expected": (50, "Product 50")},
+
+        {"id": "TC704", "description": "Uncommitted rows stay private",
+         "check": check_transaction_isolation, "expected": (51, 50, 51)},
+
+        {"id": "TC705", "description": "Reader checkout times out",
+         "check": check_reader_timeout, "expected": "PoolTimeout"},
+
+        {"id": "TC706", "description": "Writer checkout times out",
+         "check": check_writer_timeout, "expected": "PoolTimeout"},
+
+        {"id": "TC707", "description": "In-memory database shares writer",
+         "check": check_memory_database, "expected": (0, {50})},
+
+        {"id": "TC708", "description": "Profiles set their pragmas",
+         "check": check_profiles,
+         "expected": {"safe": (("delete", 2, -2000, 0, 0), (2, -2000, 0, 0)),
+                      "balanced": (("wal", 1, -16000, 64 * 1024 * 1024, 2), (1, -16000, 64 * 1024 * 1024, 2)),
+                      "fast": (("wal", 0, -64000, 256 * 1024 * 1024, 2), (0, -64000, 256 * 1024 * 1024, 2))}},
+
+        {"id": "TC709", "description": "Unknown profile rejected",
+         "check": check_unknown_profile, "expected": ("KeyError 'turbo'", True)},
+
+        {"id": "TC710", "description": "Default profile uses WAL",
+         "check": check_default_wal, "expected": ("wal", True)},
+
+        {"id": "TC711", "description": "TRUNCATE above the WAL budget",
+         "check": check_truncate_threshold, "expected": [False, True, True, True]},
+
+        {"id": "TC712", "description": "Checkpointer stops on close",
+         "check": check_checkpointer_lifecycle, "expected": (True, False, False)}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("CONNECTION POOL TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Connection Pool\n")
+    test_connection_pool()
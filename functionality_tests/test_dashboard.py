@@ -0,0 +1,143 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+from database import Database
+from money import Money
+from services import UserService, ProductService, ExpenseService, DashboardRow, DASHBOARD_SORT_KEYS
+from colorama import Fore
+
+
+def seeded_database(path):
+    # User 1: a product with two expenses, one costing more than its price,
+    # one without expenses and a free sample; user 2 has one product
+    db = Database(path)
+    users = UserService(db)
+    users.register("user", "secret")
+    users.register("other", "secret")
+    products, expenses = ProductService(db), ExpenseService(db)
+    products.add(1, "Juice", "12.00")
+    products.add(1, "Chips", "3.00")
+    products.add(1, "Soap", "4.00")
+    # The services refuse a zero price; older databases can still hold one
+    db.execute_query("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)", (1, "Sample", 0))
+    products.add(2, "Other", "5.00")
+    expenses.add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50")])
+    expenses.add(1, 2, "Bag", "4.00")
+    expenses.add(1, 4, "Wrap", "1.00")
+    expenses.add(2, 5, "Box", "1.00")
+    return db
+
+
+def check_rows(path):
+    db = seeded_database(path)
+    return ProductService(db).dashboard(1, "name", descending=False)
+
+
+def check_margins(path):
+    # Margin is net over price in percent; a zero price has none
+    db = seeded_database(path)
+    return [(row.name, None if row.margin is None else round(row.margin, 2))
+            for row in ProductService(db).dashboard(1, "name", descending=False)]
+
+
+def check_order(path):
+    # Every sort key in both directions; ties and missing margins fall back to id
+    db = seeded_database(path)
+    products = ProductService(db)
+    return {key: ([row.id for row in products.dashboard(1, key, descending=True)],
+                  [row.id for row in products.dashboard(1, key, descending=False)])
+            for key in DASHBOARD_SORT_KEYS}
+
+
+def check_follows_writes(path):
+    # The totals come from trigger-maintained rows; removals show up at once
+    db = seeded_database(path)
+    ExpenseService(db).remove(1, 1, 1)
+    ProductService(db).remove(1, 2)
+    return [(row.id, row.expense_count, row.total_expenses) for row in ProductService(db).dashboard(1, "name")]
+
+
+def check_invalid_sort(path):
+    try:
+        ProductService(seeded_database(path)).dashboard(1, "price_cents; DROP TABLE products")
+        return "sorted"
+    except ValueError as e:
+        return str(e)
+
+
+# Function to test the product dashboard
+def test_dashboard():
+    """Test the dashboard's counts, totals, margins and ordering on a real database"""
+    test_cases = [
+        {"id": "TC2001", "description": "Counts, totals and net per unit",
+         "check": check_rows,
+         "expected": [DashboardRow(2, "Chips", Money(300), 1, Money(400), Money(-100), -100 / 3),
+                      DashboardRow(1, "Juice", Money(1200), 2, Money(300), Money(900), 75.0),
+                      DashboardRow(4, "Sample", Money(0), 1, Money(100), Money(-100), None),
+                      DashboardRow(3, "Soap", Money(400), 0, Money(0), Money(400), 100.0)]},
+
+        {"id": "TC2002", "description": "Margins, none for a zero price",
+         "check": check_margins,
+         "expected": [("Chips", -33.33), ("Juice", 75.0), ("Sample", None), ("Soap", 100.0)]},
+
+        {"id": "TC2003", "description": "Every sort key, both directions",
+         "check": check_order,
+         "expected": {"margin": ([3, 1, 2, 4], [4, 2, 1, 3]),
+                      "net": ([1, 3, 2, 4], [2, 4, 3, 1]),
+                      "expenses": ([2, 1, 4, 3], [3, 4, 1, 2]),
+                      "price": ([1, 3, 2, 4], [4, 2, 3, 1]),
+                      "name": ([3, 4, 1, 2], [2, 1, 4, 3])}},
+
+        {"id": "TC2004", "description": "Follows removed rows",
+         "check": check_follows_writes,
+         "expected": [(3, 0, Money(0)), (4, 1, Money(100)), (1, 1, Money(50))]},
+
+        {"id": "TC2005", "description": "Unknown sort key rejected",
+         "check": check_invalid_sort,
+         "expected": "Cannot sort the dashboard by 'price_cents; DROP TABLE products'."}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("DASHBOARD TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Dashboard\n")
+    test_dashboard()
@@ -0,0 +1,173 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+import tempfile
+import aggregates
+import datagen
+from database import Database
+from services import UserService, ProductService
+from colorama import Fore
+
+
+def generated(path, **kwargs):
+    db = Database(path)
+    return db, datagen.generate(db, **{"users": 3, "products_per_user": 4, "expenses": 500, **kwargs})
+
+
+def contents(db):
+    return (db.fetch_all("SELECT * FROM products ORDER BY id"), db.fetch_all("SELECT * FROM expenses ORDER BY id"),
+            db.fetch_all("SELECT id, username FROM users ORDER BY id"))
+
+
+def check_counts(path):
+    db, stats = generated(path)
+    tables = [db.fetch_one(f"SELECT COUNT(*) FROM {table}")[0] for table in ("users", "products", "expenses")]
+    return (stats.users, stats.products, stats.expenses), tables
+
+
+def check_deterministic(path):
+    first = contents(generated(path, seed=7)[0])
+    again = contents(generated(path + "-again.db", seed=7)[0])
+    other = contents(generated(path + "-other.db", seed=8)[0])
+    return first == again, first[1] == other[1]
+
+
+def check_zipf_counts(path):
+    counts = datagen.zipf_counts(10_000, 100, 1.1, random.Random(0))
+    ordered = sorted(counts, reverse=True)
+    return sum(counts), ordered[0] > 15 * ordered[49], counts != ordered
+
+
+def check_even_spread(path):
+    counts = datagen.zipf_counts(1003, 10, 0, random.Random(0))
+    return sum(counts), max(counts) - min(counts)
+
+
+def check_skewed_products(path):
+    # The busiest product of a skewed run holds far more than an even share
+    db, _ = generated(path, skew=1.5)
+    busiest = db.fetch_one("SELECT MAX(expense_count) FROM product_totals")[0]
+    return busiest > 3 * 500 / 12
+
+
+def check_totals(path):
+    db, _ = generated(path)
+    return aggregates.find_drift(db), db.fetch_one("SELECT SUM(expense_count) FROM product_totals")[0]
+
+
+def check_login(path):
+    db, _ = generated(path)
+    return UserService(db).login("user2", datagen.DEFAULT_PASSWORD), len(ProductService(db).list(2).rows)
+
+
+def check_extend(path):
+    # Generating into a database with deleted products keeps every expense
+    # attached to a generated product
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("owner", "pass"))
+    ProductService(db).add(1, "Juice", "12.00")
+    ProductService(db).add(1, "Chips", "3.00")
+    ProductService(db).remove(1, 2)
+    datagen.generate(db, users=2, products_per_user=2, expenses=100)
+    orphans = db.fetch_one("""
+        SELECT COUNT(*) FROM expenses AS e LEFT JOIN products AS p ON p.id = e.product_id
+        WHERE p.id IS NULL OR p.user_id = 1
+    """)[0]
+    return orphans, db.fetch_all("SELECT id, user_id FROM products ORDER BY id")
+
+
+def check_conflict(path):
+    db, _ = generated(path, expenses=0)
+    try:
+        datagen.generate(db, users=1)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def check_invalid(path):
+    try:
+        datagen.generate(Database(path), users=0, expenses=10)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+# Function to test the synthetic data generator
+def test_datagen():
+    """Test seeded, skewed synthetic data generation"""
+    test_cases = [
+        {"id": "TC1401", "description": "Row counts",
+         "check": check_counts, "expected": ((3, 12, 500), [3, 12, 500])},
+
+        {"id": "TC1402", "description": "Same seed, same data",
+         "check": check_deterministic, "expected": (True, False)},
+
+        {"id": "TC1403", "description": "Zipf counts sum and skew",
+         "check": check_zipf_counts, "expected": (10_000, True, True)},
+
+        {"id": "TC1404", "description": "Skew 0 spreads evenly",
+         "check": check_even_spread, "expected": (1003, 1)},
+
+        {"id": "TC1405", "description": "Skewed products",
+         "check": check_skewed_products, "expected": True},
+
+        {"id": "TC1406", "description": "Totals match expenses",
+         "check": check_totals, "expected": ([], 500)},
+
+        {"id": "TC1407", "description": "Generated users can log in",
+         "check": check_login, "expected": (2, 4)},
+
+        {"id": "TC1408", "description": "Extends a used database",
+         "check": check_extend, "expected": (0, [(1, 1), (3, 2), (4, 2), (5, 3), (6, 3)])},
+
+        {"id": "TC1409", "description": "Existing username",
+         "check": check_conflict,
+         "expected": "ConflictError: The database already has a user named 'user1'."},
+
+        {"id": "TC1410", "description": "Expenses without products",
+         "check": check_invalid, "expected": "ValidationError: Expenses need at least one product."}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("DATA GENERATOR TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Data Generator\n")
+    test_datagen()
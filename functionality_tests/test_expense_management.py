@@ -2,18 +2,20 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import contextlib
 import unittest.mock
 from expense import Expense
+from database import Page
 from colorama import Fore
 from ui_mock import UiMock
 
 # Mock Database for expense testing
 class MockDatabase:
     def __init__(self):
-        self.expenses = [(1, "Expense1", 50.0), (2, "Expense2", 100.0)]
+        self.expenses = [(1, "Expense1", 5000), (2, "Expense2", 10000)]
         self.deleted_ids = []
-        self.product_price = 200.0
-        self.total_expense = 150.0
+        self.product_price = 20000
+        self.total_expense = 15000
     
     def execute_query(self, query, params):
         if "INSERT INTO expenses" in query:
@@ -25,11 +27,23 @@ class MockDatabase:
             self.deleted_ids.append(params[0])
             return True
         return False
+
+    def insert(self, query, params):
+        self.execute_query(query, params)
+        return len(self.expenses)
+
+    def executemany(self, query, seq_of_params):
+        for params in seq_of_params:
+            self.execute_query(query, params)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield self
         
     def fetch_all(self, query, params):
         if "FROM expenses" in query:
             if self.expenses:
-                if "id, name, amount" in query:
+                if "id, name, amount_cents" in query:
                     # Return all three values for removal
                     return self.expenses
                 else:
@@ -37,11 +51,14 @@ class MockDatabase:
                     return [(name, amount) for id, name, amount in self.expenses]
         return []
         
+    def fetch_page(self, query, params, after_id=None, before_id=None, row_type=None):
+        # Every mock listing fits on a single page
+        rows = self.fetch_all(query, params)
+        return Page([row_type(*row) for row in rows] if row_type else rows, False, False)
+
     def fetch_one(self, query, params):
-        if "price FROM products" in query:
-            return [self.product_price]
-        elif "SUM(amount)" in query:
-            return [self.total_expense]
+        if "LEFT JOIN product_totals" in query and self.product_price is not None:
+            return (self.product_price, self.total_expense)
         return None
 
 # Function to test expense viewing functionality
@@ -52,7 +69,7 @@ def test_view_expenses():
     test_cases = [
         {"id": "TC201", "description": "View expenses with existing data", 
          "input": {"product_id": 1}, 
-         "expected": [("Expense1", 50.0), ("Expense2", 100.0)]},
+         "expected": [("Expense1", 5000), ("Expense2", 10000)]},
         
         {"id": "TC202", "description": "View expenses with no data", 
          "input": {"product_id": 2, "empty": True},
@@ -69,9 +86,9 @@ def test_view_expenses():
                 # Simulate empty expense list
                 db.expenses = []
             
-            expense_manager = Expense(db, test_case["input"]["product_id"])
+            expense_manager = Expense(db, 1, test_case["input"]["product_id"])
             # Call the actual view expenses functionality
-            expenses = db.fetch_all("SELECT name, amount FROM expenses WHERE product_id = ?", 
+            expenses = db.fetch_all("SELECT name, amount_cents FROM expenses WHERE product_id = ?", 
                                 (expense_manager.product_id,))
             
             # Format result for comparison
@@ -145,7 +162,7 @@ def test_add_expense():
                 str(test_case["input"]["amount"])
             ]
             
-            expense_manager = Expense(db, 1)
+            expense_manager = Expense(db, 1, 1)
             try:
                 if not test_case["input"]["name"] or test_case["input"]["amount"] <= 0:
                     result = "Invalid input"
@@ -221,7 +238,7 @@ def test_remove_expense():
                 db.expenses = []
                 mock_input.side_effect = ["0"]  # Dummy input that won't be used
                 
-                expense_manager = Expense(db, 1)
+                expense_manager = Expense(db, 1, 1)
                 try:
                     expense_manager.remove_expense()
                     result = "No expenses found."
@@ -230,7 +247,7 @@ def test_remove_expense():
             else:
                 # Mock the expense selection process
                 mock_input.side_effect = [str(test_case["input"]["choice"])]
-                expense_manager = Expense(db, 1)
+                expense_manager = Expense(db, 1, 1)
                 
                 choice = test_case["input"]["choice"]
                 if choice < 0 or choice >= len(db.expenses):
@@ -305,7 +322,7 @@ def test_profit_simulation():
             # Mock the quantity input
             mock_input.side_effect = [str(test_case["input"]["quantity"])]
             
-            expense_manager = Expense(db, test_case["input"]["product_id"])
+            expense_manager = Expense(db, 1, test_case["input"]["product_id"])
             
             # Handle product not found case
             if test_case["input"]["product_id"] == 999:
@@ -0,0 +1,202 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import json
+import tempfile
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+import cli
+import simulation
+from database import Database
+from exporter import Exporter, cents_text
+from importer import Importer
+from services import ProductService, ExpenseService
+from colorama import Fore
+
+
+def seeded_database(path):
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("other", "pass"))
+    ProductService(db).add(1, "Juice", "12.00")
+    ProductService(db).add(2, "Soap", "4.00")
+    ProductService(db).add(1, "Chips, salted", "3.00")
+    ExpenseService(db).add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50")])
+    ExpenseService(db).add(2, 2, "Wrap", "0.20")
+    ExpenseService(db).add(1, 3, "Bag", "3.25")
+    return db
+
+
+def export_text(db, table, fmt):
+    out = io.StringIO()
+    Exporter(db, 1, batch_size=2).export(table, out, fmt=fmt)
+    return out.getvalue()
+
+
+def check_products_csv(path):
+    return export_text(seeded_database(path), "products", "csv").splitlines()
+
+
+def check_expenses_jsonl(path):
+    # Only the user's own expenses, in product then id order
+    lines = export_text(seeded_database(path), "expenses", "jsonl").splitlines()
+    return [(row["product_id"], row["name"], row["amount"]) for row in map(json.loads, lines)]
+
+
+def check_report_matches_dashboard(path):
+    db = seeded_database(path)
+    lines = export_text(db, "report", "csv").splitlines()[1:]
+    dashboard = {row.id: row for row in ProductService(db).dashboard(1)}
+    expected = [f"{pid},{row.name if ',' not in row.name else chr(34) + row.name + chr(34)},"
+                f"{cents_text(row.price.cents)},{row.expense_count},{cents_text(row.total_expenses.cents)},"
+                f"{cents_text(row.net_per_unit.cents)},{round(row.margin, 2)}"
+                for pid, row in sorted(dashboard.items())]
+    return lines == expected, lines[-1]
+
+
+def check_npy_columns(path):
+    if not simulation.numpy_available():
+        return "skipped"
+    np = simulation.np
+    db = seeded_database(path)
+    directory = os.path.join(os.path.dirname(path), "report_columns")
+    stats = Exporter(db, 1, batch_size=1).export("report", directory)
+    price = np.load(os.path.join(directory, "price.npy"), mmap_mode="r")
+    name = np.load(os.path.join(directory, "name.npy"), mmap_mode="r")
+    net = np.load(os.path.join(directory, "net_per_unit.npy"), mmap_mode="r")
+    return stats.rows, str(price.dtype), price.tolist(), name.tolist(), net.tolist(), isinstance(price, np.memmap)
+
+
+def check_npy_empty(path):
+    if not simulation.numpy_available():
+        return "skipped"
+    db = Database(path)
+    directory = path + "-expenses"
+    stats = Exporter(db, 1).export("expenses", directory, fmt="npy")
+    return stats.rows, sorted(os.listdir(directory)), simulation.np.load(os.path.join(directory, "id.npy")).shape
+
+
+def check_round_trip(path):
+    # Exported products import into another database unchanged
+    db = seeded_database(path)
+    exported = path + ".csv"
+    Exporter(db, 1).export("products", exported)
+    other = Database(path + "-copy.db")
+    other.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("copy", "pass"))
+    Importer(other, 1).import_products(exported)
+    return other.fetch_all("SELECT name, price_cents FROM products ORDER BY id")
+
+
+def check_snapshot(path):
+    # Reads in a snapshot ignore rows committed by other threads meanwhile
+    db = seeded_database(path)
+    query = "SELECT COUNT(*) FROM products"
+    with db.snapshot():
+        before = db.fetch_one(query)[0]
+        thread = threading.Thread(target=ProductService(db).add, args=(1, "Tea", "2.00"))
+        thread.start()
+        thread.join()
+        inside = db.fetch_one(query)[0]
+    return before, inside, db.fetch_one(query)[0]
+
+
+def check_unknown_table(path):
+    try:
+        Exporter(seeded_database(path), 1).export("users", path + ".csv")
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def check_cli_stdout(path):
+    seeded_database(path).close()
+    out, err = io.StringIO(), io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        code = cli.main(["--db", path, "--user", "user", "export", "expenses", "-"])
+    return code, out.getvalue().splitlines()[0], err.getvalue().startswith("Exported 3 expenses rows")
+
+
+def check_cents_text(path):
+    return [cents_text(cents) for cents in (0, 5, 1250, -5, -99, -1200)]
+
+
+# Function to test the exporter
+def test_exporter():
+    """Test streaming exports to CSV, JSONL and npy columns"""
+    test_cases = [
+        {"id": "TC1201", "description": "Products to CSV",
+         "check": check_products_csv, "expected": ["id,name,price", "1,Juice,12.00", '3,"Chips, salted",3.00']},
+
+        {"id": "TC1202", "description": "Expenses to JSONL, user only",
+         "check": check_expenses_jsonl, "expected": [(1, "Bottle", "2.50"), (1, "Label", "0.50"), (3, "Bag", "3.25")]},
+
+        {"id": "TC1203", "description": "Report matches dashboard",
+         "check": check_report_matches_dashboard, "expected": (True, '3,"Chips, salted",3.00,1,3.25,-0.25,-8.33')},
+
+        {"id": "TC1204", "description": "Report to memory-mapped npy",
+         "check": check_npy_columns, "expected": (2, "int64", [1200, 300], ["Juice", "Chips, salted"], [900, -25],
+                                                   True)},
+
+        {"id": "TC1205", "description": "Empty table to npy",
+         "check": check_npy_empty, "expected": (0, ["amount.npy", "id.npy", "name.npy", "product_id.npy"], (0,))},
+
+        {"id": "TC1206", "description": "Export/import round trip",
+         "check": check_round_trip, "expected": [("Juice", 1200), ("Chips, salted", 300)]},
+
+        {"id": "TC1207", "description": "Snapshot isolates reads",
+         "check": check_snapshot, "expected": (3, 3, 4)},
+
+        {"id": "TC1208", "description": "Unknown table",
+         "check": check_unknown_table,
+         "expected": "ValidationError: Cannot export 'users'; choose one of products, expenses, report."},
+
+        {"id": "TC1209", "description": "CLI export to stdout",
+         "check": check_cli_stdout, "expected": (0, "id,product_id,name,amount", True)},
+
+        {"id": "TC1210", "description": "Cents as decimal text",
+         "check": check_cents_text, "expected": ["0.00", "0.05", "12.50", "-0.05", "-0.99", "-12.00"]}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] or result == "skipped" else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("EXPORT TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Export\n")
+    test_exporter()
@@ -0,0 +1,235 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import codecs
+import io
+import tempfile
+from decimal import Decimal, ROUND_HALF_UP
+import aggregates
+from database import Database
+from importer import Importer
+from money import Money
+from services import ProductService, ExpenseService, ValidationError
+from colorama import Fore
+
+
+def seeded_database(path):
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("other", "pass"))
+    ProductService(db).add(1, "Juice", "12.00")
+    ProductService(db).add(1, "Chips", "3.00")
+    ProductService(db).add(2, "Soap", "4.00")
+    ExpenseService(db).add(1, 1, "Bottle", "2.50")
+    return db
+
+
+def write(path, text, encoding="utf-8"):
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(text)
+    return path
+
+
+def totals(db):
+    # Stored totals per product, after checking they match the expenses
+    return aggregates.find_drift(db), db.fetch_all("SELECT * FROM product_totals ORDER BY product_id")
+
+
+def raised(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def check_csv_by_name(path):
+    db = seeded_database(path)
+    source = write(path + ".csv", "product,name,amount\nJuice,Label,0.50\nChips,Bag,1.25\nJuice,Cap,0.10\n")
+    stats = Importer(db, 1, batch_size=2).import_expenses(source)
+    return stats.rows, totals(db)
+
+
+def check_jsonl_by_id(path):
+    db = seeded_database(path)
+    source = write(path + ".jsonl", '{"product_id": 2, "name": "Bag", "amount": 1.25}\n\n'
+                                    '{"product_id": "1", "name": "Cap", "amount": "0.10"}\n')
+    stats = Importer(db, 1).import_expenses(source)
+    return stats.rows, totals(db)
+
+
+def check_products(path):
+    db = seeded_database(path)
+    source = write(path + ".csv", "name,price\nTea,2.00\n\"Box, large\",\"1,200.50\"\n")
+    stats = Importer(db, 1).import_products(source)
+    return stats.rows, db.fetch_all("SELECT name, price_cents FROM products WHERE user_id = 1 AND id > 3")
+
+
+def check_unknown_product(path):
+    db = seeded_database(path)
+    source = write(path + ".csv", "product,name,amount\nJuice,Cap,0.10\nCola,Can,0.30\n")
+    return raised(Importer(db, 1).import_expenses, source), db.fetch_one("SELECT COUNT(*) FROM expenses")[0]
+
+
+def check_foreign_product(path):
+    # Another user's product id is not visible to the importing user
+    db = seeded_database(path)
+    source = write(path + ".csv", "product_id,name,amount\n3,Wrap,0.20\n")
+    return raised(Importer(db, 1).import_expenses, source)
+
+
+def check_skip_invalid(path):
+    db = seeded_database(path)
+    source = write(path + ".csv", "name,amount\nCap,0.10\n,1.00\nRefund,-2\nBox\nBag,1.25\n")
+    stats = Importer(db, 1).import_expenses(source, product_id=1, skip_invalid=True)
+    return stats.rows, stats.rejected, stats.errors
+
+
+def check_skip_out_of_range(path):
+    # Huge amounts are rows to report, not the end of the import
+    db = seeded_database(path)
+    source = write(path + ".csv", "name,amount\nCap,0.10\nGold,1e30\nMint,99999999999999999999\nBag,1.25\n")
+    stats = Importer(db, 1).import_expenses(source, product_id=1, skip_invalid=True)
+    return stats.rows, stats.rejected, stats.errors
+
+
+def check_resume(path):
+    # The first run stops at row 5; after the row is fixed the second run
+    # carries on from the last committed batch without duplicating rows
+    db = seeded_database(path)
+    rows = [f"Item {i},1.00" for i in range(1, 8)]
+    source = write(path + ".csv", "name,amount\n" + "\n".join(rows).replace("Item 5,1.00", "Item 5,oops") + "\n")
+    importer = Importer(db, 1, batch_size=2)
+    first = raised(importer.import_expenses, source, product_id=1)
+    checkpoint = db.fetch_one("SELECT records, rows FROM import_checkpoints")
+    write(source, "name,amount\n" + "\n".join(rows) + "\n")
+    stats = importer.import_expenses(source, product_id=1)
+    names = [name for name, in db.fetch_all("SELECT name FROM expenses WHERE name LIKE 'Item %' ORDER BY id")]
+    left = db.fetch_one("SELECT COUNT(*) FROM import_checkpoints")[0]
+    return first, checkpoint, stats.resumed_at, stats.rows, len(names), len(set(names)), left
+
+
+def check_trigger_restored(path):
+    # After a bulk batch the per-row trigger is back and keeps totals current
+    db = seeded_database(path)
+    with aggregates.deferred_triggers(db):
+        db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                       [(2, "Bag", 125), (2, "Tape", 30)])
+    ExpenseService(db).add(1, 2, "Ink", "1.00")
+    return totals(db)
+
+
+def check_bom_and_stream(path):
+    db = seeded_database(path)
+    data = codecs.BOM_UTF8 + "Product,Name,Amount\nJuice,\"Cap, red\",0.10\n".encode("utf-8")
+    stats = Importer(db, 1).import_expenses(io.BufferedReader(io.BytesIO(data)), fmt="csv")
+    return stats.rows, db.fetch_one("SELECT name, amount_cents FROM expenses ORDER BY id DESC LIMIT 1")
+
+
+def check_money_fast_path(path):
+    # The fast path of Money.parse agrees with the Decimal rules
+    samples = ["12", "12.5", "12.50", "12.", "0.07", " 7 ", "1,299.99", "12.345", "+4", ".5", "1e3"]
+    expected = [int((Decimal(s.strip().replace(",", "")) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+                for s in samples]
+    return [Money.parse(s).cents for s in samples] == expected, raised(Money.parse, "1.2.3")
+
+
+def check_money_range(path):
+    # Amounts Decimal cannot quantize, or too large for an SQLite integer,
+    # are invalid amounts like any other
+    db = seeded_database(path)
+    return ([raised(Money.parse, s) for s in ["1e30", "99999999999999999999", "-92233720368547758.08"]],
+            Money.parse("92233720368547758.07").cents, raised(ProductService(db).add, 1, "Gold", "1e30"))
+
+
+# Function to test the bulk importer
+def test_importer():
+    """Test streaming CSV/JSONL imports with validation and checkpoints"""
+    test_cases = [
+        {"id": "TC1101", "description": "CSV expenses by product name",
+         "check": check_csv_by_name, "expected": (3, ([], [(1, 3, 310), (2, 1, 125)]))},
+
+        {"id": "TC1102", "description": "JSONL expenses by product_id",
+         "check": check_jsonl_by_id, "expected": (2, ([], [(1, 2, 260), (2, 1, 125)]))},
+
+        {"id": "TC1103", "description": "CSV products with quoting",
+         "check": check_products, "expected": (2, [("Tea", 200), ("Box, large", 120050)])},
+
+        {"id": "TC1104", "description": "Unknown product stops import",
+         "check": check_unknown_product, "expected": ("ValidationError: Row 2: Unknown product 'Cola'.", 1)},
+
+        {"id": "TC1105", "description": "Another user's product_id",
+         "check": check_foreign_product, "expected": "ValidationError: Row 1: Unknown product id 3."},
+
+        {"id": "TC1106", "description": "skip_invalid reports bad rows",
+         "check": check_skip_invalid, "expected": (2, 3, [(2, "Expense name cannot be empty."),
+                                                          (3, "Expense amount cannot be negative."),
+                                                          (4, "Missing columns.")])},
+
+        {"id": "TC1112", "description": "skip_invalid skips huge amounts",
+         "check": check_skip_out_of_range,
+         "expected": (2, 2, [(2, "Invalid amount. Please enter a number."),
+                             (3, "Invalid amount. Please enter a number.")])},
+
+        {"id": "TC1107", "description": "Interrupted import resumes",
+         "check": check_resume, "expected": ("ValidationError: Row 5: Invalid amount. Please enter a number.",
+                                              (4, 4), 4, 7, 7, 7, 0)},
+
+        {"id": "TC1108", "description": "Totals trigger restored",
+         "check": check_trigger_restored, "expected": ([], [(1, 1, 250), (2, 3, 255)])},
+
+        {"id": "TC1109", "description": "BOM, header case, stream",
+         "check": check_bom_and_stream, "expected": (1, ("Cap, red", 10))},
+
+        {"id": "TC1110", "description": "Money.parse fast path",
+         "check": check_money_fast_path, "expected": (True, "ValueError: Invalid amount: '1.2.3'")},
+
+        {"id": "TC1111", "description": "Out-of-range amounts rejected",
+         "check": check_money_range,
+         "expected": (["ValueError: Invalid amount: '1e30'", "ValueError: Invalid amount: '99999999999999999999'",
+                       "ValueError: Invalid amount: '-92233720368547758.08'"], 2**63 - 1,
+                      "ValidationError: Invalid price. Please enter a number.")}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("BULK IMPORT TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Bulk Import\n")
+    test_importer()
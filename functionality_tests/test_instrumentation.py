@@ -0,0 +1,221 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import subprocess
+import tempfile
+import threading
+import instrumentation
+from database import Database
+from services import ProductService, ExpenseService
+from colorama import Fore
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def seeded_database(path):
+    db = Database(path)
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    ProductService(db).add(1, "Juice", "12.00")
+    ExpenseService(db).add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50"), ("Cap", "0.10")])
+    return db
+
+
+def by_query(recorder):
+    return {row["query"]: (row["calls"], row["rows"]) for row in recorder.summary()}
+
+
+def check_records_statements(path):
+    db = seeded_database(path)
+    recorder = instrumentation.enable(db)
+    db.fetch_one("SELECT COUNT(*) FROM expenses")
+    db.fetch_all("SELECT id FROM expenses WHERE product_id = 1")
+    db.fetch_all("SELECT id FROM expenses WHERE product_id = 2")
+    db.insert("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)", (1, "Box", 40))
+    db.executemany("UPDATE expenses SET amount_cents = amount_cents + 1 WHERE id = ?", [(1,), (2,)])
+    db.execute_query("DELETE FROM expenses WHERE product_id = ?", (1,))
+    return by_query(recorder)
+
+
+def check_normalize(path):
+    return [instrumentation.normalize(query) for query in (
+        "SELECT *\n  FROM products   WHERE id = 42 AND name = 'O''Brien'",
+        "SELECT * FROM expenses WHERE id IN (?, ?, ?)",
+        "SELECT c0, price_cents * 1.5 FROM q",
+    )]
+
+
+def check_call_site(path):
+    # Statements run by the services are attributed to the service method;
+    # fetch_page inside database.py is skipped
+    db = seeded_database(path)
+    recorder = instrumentation.enable(db)
+    ExpenseService(db).list(1, 1)
+    db.fetch_one("SELECT 1")
+    sites = [site for row in recorder.summary() for site in row["sites"]]
+    return sorted(site.split(":")[0] + " " + site.split(" ")[1] for site in sites)
+
+
+def check_slow_log(path):
+    db = seeded_database(path)
+    log = io.StringIO()
+    recorder = instrumentation.enable(db, slow_ms=0, slow_log=log)
+    db.fetch_all("SELECT name FROM expenses WHERE product_id = ? ORDER BY id", (1,))
+    text = log.getvalue()
+    return recorder.slow, "params: (1,)" in text, "SEARCH expenses USING COVERING INDEX idx_expenses_product" in text
+
+
+def check_iter_query(path):
+    db = seeded_database(path)
+    recorder = instrumentation.enable(db)
+    rows = db.iter_query("SELECT id FROM expenses ORDER BY id", batch_size=2)
+    first = next(rows)
+    rows.close()
+    all_rows = list(db.iter_query("SELECT name FROM expenses", batch_size=2))
+    return first, len(all_rows), by_query(recorder)
+
+
+def check_disable(path):
+    db = seeded_database(path)
+    instrumentation.enable(db)
+    instrumentation.disable(db)
+    plain = Database(path)
+    return ("fetch_one" in db.__dict__, db.recorder, db.fetch_one.__func__ is Database.fetch_one,
+            "fetch_all" in plain.__dict__, plain.recorder)
+
+
+def check_histogram(path):
+    histogram = instrumentation.Histogram()
+    for ms in range(1, 101):
+        histogram.add(ms / 1000)
+    return [abs(histogram.percentile(p) * 1000 - expected) / expected <= 0.1
+            for p, expected in ((0.5, 50), (0.95, 95), (0.99, 99))], histogram.max
+
+
+def check_threads(path):
+    db = seeded_database(path)
+    recorder = instrumentation.enable(db)
+
+    def worker():
+        for _ in range(50):
+            db.fetch_one("SELECT COUNT(*) FROM expenses")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return by_query(recorder)
+
+
+def check_environment(path):
+    # XPENCE_SQL_STATS instruments every Database and reports at exit
+    seeded_database(path).close()
+    report = path + ".report"
+    env = dict(os.environ, XPENCE_SQL_STATS="1", XPENCE_SQL_REPORT=report)
+    script = ("import sys; from database import Database; from services import ExpenseService; "
+              "ExpenseService(Database(sys.argv[1])).report(1, 1)")
+    subprocess.run([sys.executable, "-c", script, path], cwd=ROOT, env=env, check=True)
+    with open(report, encoding="utf-8") as f:
+        text = f.read()
+    return "SQL STATEMENTS" in text, "services.py" in text
+
+
+def check_summary_order(path):
+    db = seeded_database(path)
+    recorder = instrumentation.enable(db)
+    for _ in range(20):
+        db.fetch_all("SELECT * FROM expenses")
+    db.fetch_one("SELECT 1")
+    out = io.StringIO()
+    recorder.report(out)
+    lines = out.getvalue().splitlines()
+    return lines[1].strip().startswith("SQL STATEMENTS (21 calls, "), lines[6].strip()
+
+
+# Function to test the query instrumentation
+def test_instrumentation():
+    """Test statement timing, histograms and the slow-query log"""
+    test_cases = [
+        {"id": "TC1501", "description": "Every statement recorded",
+         "check": check_records_statements,
+         "expected": {"SELECT COUNT(*) FROM expenses": (1, 1),
+                      "SELECT id FROM expenses WHERE product_id = ?": (2, 3),
+                      "INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ...)": (1, 1),
+                      "UPDATE expenses SET amount_cents = amount_cents + ? WHERE id = ?": (1, 2),
+                      "DELETE FROM expenses WHERE product_id = ?": (1, 4)}},
+
+        {"id": "TC1502", "description": "Query normalization",
+         "check": check_normalize,
+         "expected": ["SELECT * FROM products WHERE id = ? AND name = ?",
+                      "SELECT * FROM expenses WHERE id IN (?, ...)", "SELECT c0, price_cents * ? FROM q"]},
+
+        {"id": "TC1503", "description": "Call sites skip data layer",
+         "check": check_call_site, "expected": ["services.py (list)", "test_instrumentation.py (check_call_site)"]},
+
+        {"id": "TC1504", "description": "Slow log with query plan",
+         "check": check_slow_log, "expected": (1, True, True)},
+
+        {"id": "TC1505", "description": "iter_query rows and early close",
+         "check": check_iter_query,
+         "expected": ((1,), 3, {"SELECT id FROM expenses ORDER BY id": (1, 1), "SELECT name FROM expenses": (1, 3)})},
+
+        {"id": "TC1506", "description": "Off means plain methods",
+         "check": check_disable, "expected": (False, None, True, False, None)},
+
+        {"id": "TC1507", "description": "Histogram percentiles",
+         "check": check_histogram, "expected": ([True, True, True], 0.1)},
+
+        {"id": "TC1508", "description": "Concurrent recording",
+         "check": check_threads, "expected": {"SELECT COUNT(*) FROM expenses": (200, 200)}},
+
+        {"id": "TC1509", "description": "XPENCE_SQL_STATS report at exit",
+         "check": check_environment, "expected": (True, True)},
+
+        {"id": "TC1510", "description": "Summary by total time",
+         "check": check_summary_order, "expected": (True, "SELECT * FROM expenses")}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("INSTRUMENTATION TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Instrumentation\n")
+    test_instrumentation()
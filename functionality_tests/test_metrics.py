@@ -0,0 +1,279 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import http.client
+import subprocess
+import tempfile
+import threading
+import instrumentation
+import metrics
+from database import Database
+from services import UserService, ProductService, ExpenseService, AuthenticationError
+from colorama import Fore
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def seeded_database(path):
+    db = Database(path)
+    UserService(db).register("user", "secret")
+    ProductService(db).add(1, "Juice", "12.00")
+    ExpenseService(db).add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50"), ("Cap", "0.10")])
+    return db
+
+
+def samples(text):
+    # Sample lines of an exposition by name and labels
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+
+def changes(counters, run):
+    # How much each counter moved while ``run`` ran; REGISTRY is shared by the whole process
+    before = [counter.value() for counter in counters]
+    run()
+    return [counter.value() - value for counter, value in zip(counters, before)]
+
+
+def check_service_counters(path):
+    db = Database(path)
+    users, products, expenses = UserService(db), ProductService(db), ExpenseService(db)
+    success, failure = metrics.LOGINS.labels("success"), metrics.LOGINS.labels("failure")
+
+    def run():
+        users.register("user", "secret")
+        users.login("user", "secret")
+        for password in ("wrong", "also wrong"):
+            try:
+                users.login("user", password)
+            except AuthenticationError:
+                pass
+        product = products.add(1, "Juice", "12.00")
+        expenses.add_many(1, product.id, [("Bottle", "2.50"), ("Label", "0.50")])
+        expenses.remove(1, product.id, expenses.add(1, product.id, "Cap", "0.10").id)
+        products.remove(1, product.id)
+
+    return changes([metrics.REGISTRATIONS, success, failure, metrics.PRODUCT_INSERTS, metrics.PRODUCT_DELETES,
+                    metrics.EXPENSE_INSERTS, metrics.EXPENSE_DELETES], run)
+
+
+def check_report_histogram(path):
+    db = seeded_database(path)
+    expenses, products = ExpenseService(db), ProductService(db)
+    kinds = ("product", "simulation", "dashboard")
+    before = [metrics.REPORTS.labels(kind).snapshot()[1] for kind in kinds]
+    expenses.report(1, 1)
+    expenses.report(1, 1)
+    expenses.simulate_profit(1, 1, 100)
+    products.dashboard_rows(1)
+    return [metrics.REPORTS.labels(kind).snapshot()[1] - count for kind, count in zip(kinds, before)]
+
+
+def check_exposition(path):
+    registry = metrics.Registry()
+    hits = registry.counter("test_hits_total", "Hits by \"path\".", ["path"])
+    hits.labels("/a\\b").inc(2)
+    latency = registry.histogram("test_seconds", "Latency.", buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 3):
+        latency.observe(seconds)
+    return registry.exposition().splitlines()
+
+
+def check_threads(path):
+    registry = metrics.Registry()
+    counter = registry.counter("test_total", "Increments.")
+    histogram = registry.histogram("test_seconds", "Observations.")
+
+    def worker():
+        for _ in range(10_000):
+            counter.inc()
+            histogram.observe(0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counter.value(), histogram.labels().snapshot()[1]
+
+
+def check_database_gauges(path):
+    db = seeded_database(path)
+    metrics.track_database(db)
+    db.fetch_all("SELECT * FROM expenses")
+    db.execute_query("UPDATE products SET name = ? WHERE id = ?", ("Tea", 1))
+    db.execute_query("PRAGMA optimize")
+    found = samples(metrics.REGISTRY.exposition())
+    db.close()
+    label = f'database="{path}"'
+    return (int(found[f"xpence_db_file_bytes{{{label}}}"]) > 0,
+            [found[f'xpence_db_rows{{{label},table="{table}"}}'] for table in ("users", "products", "expenses")],
+            [int(found[f'xpence_db_statement_seconds_count{{operation="{operation}"}}']) > 0
+             for operation in ("SELECT", "UPDATE", "OTHER")])
+
+
+def check_chains_recorder(path):
+    # A Recorder enabled before tracking keeps receiving every statement
+    db = seeded_database(path)
+    recorder = instrumentation.enable(db)
+    metrics.track_database(db)
+    db.fetch_one("SELECT COUNT(*) FROM expenses")
+    metrics.track_database(db)
+    db.fetch_one("SELECT COUNT(*) FROM expenses")
+    wrapped = db.recorder
+    db.close()
+    return type(wrapped).__name__, wrapped.inner is recorder, [row["calls"] for row in recorder.summary()]
+
+
+def check_write_file(path):
+    registry = metrics.Registry()
+    registry.counter("test_total", "Increments.").inc(3)
+    target = path + ".prom"
+    registry.write_file(target)
+    with open(target, encoding="utf-8") as f:
+        text = f.read()
+    leftovers = [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+    return samples(text), leftovers
+
+
+def check_endpoint(path):
+    registry = metrics.Registry()
+    registry.counter("test_total", "Increments.").inc()
+    metrics_server = metrics.serve(0, registry=registry)
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", metrics_server.server_address[1], timeout=10)
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        found = response.status, response.getheader("Content-Type"), samples(response.read().decode())
+        conn.request("GET", "/other")
+        response = conn.getresponse()
+        response.read()
+        return found, response.status
+    finally:
+        metrics_server.shutdown()
+        metrics_server.server_close()
+
+
+def check_api_route(path):
+    # /metrics sits next to the API and needs no session
+    import server
+    db = Database(path)
+    api_server = server.serve(db, port=0, workers=2, backlog=2)
+    thread = threading.Thread(target=api_server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", api_server.server_address[1], timeout=10)
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        text = response.read().decode()
+        conn.request("GET", "/products")
+        denied = conn.getresponse()
+        denied.read()
+        return response.status, "# TYPE xpence_logins_total counter" in text, denied.status
+    finally:
+        api_server.shutdown()
+        api_server.server_close()
+        db.close()
+
+
+def check_environment(path):
+    # XPENCE_METRICS_FILE tracks every Database and writes the registry at exit
+    seeded_database(path).close()
+    target = path + ".prom"
+    env = dict(os.environ, XPENCE_METRICS_FILE=target)
+    script = ("import sys; from database import Database; from services import ExpenseService; "
+              "ExpenseService(Database(sys.argv[1])).report(1, 1)")
+    subprocess.run([sys.executable, "-c", script, path], cwd=ROOT, env=env, check=True)
+    with open(target, encoding="utf-8") as f:
+        found = samples(f.read())
+    return (found['xpence_report_seconds_count{kind="product"}'],
+            found[f'xpence_db_rows{{database="{path}",table="expenses"}}'])
+
+
+# Function to test the metrics registry and exporters
+def test_metrics():
+    """Test service counters, histograms, gauges and the exporters"""
+    test_cases = [
+        {"id": "TC1601", "description": "Service counters",
+         "check": check_service_counters, "expected": [1, 1, 2, 1, 1, 3, 1]},
+
+        {"id": "TC1602", "description": "Report latency by kind",
+         "check": check_report_histogram, "expected": [2, 1, 1]},
+
+        {"id": "TC1603", "description": "Text exposition format",
+         "check": check_exposition,
+         "expected": ['# HELP test_hits_total Hits by \\"path\\".',
+                      "# TYPE test_hits_total counter",
+                      'test_hits_total{path="/a\\\\b"} 2',
+                      "# HELP test_seconds Latency.",
+                      "# TYPE test_seconds histogram",
+                      'test_seconds_bucket{le="0.1"} 1',
+                      'test_seconds_bucket{le="1"} 3',
+                      'test_seconds_bucket{le="+Inf"} 4',
+                      "test_seconds_count 4",
+                      "test_seconds_sum 4.05"]},
+
+        {"id": "TC1604", "description": "Updates from many threads",
+         "check": check_threads, "expected": (40_000, 40_000)},
+
+        {"id": "TC1605", "description": "Database gauges and statements",
+         "check": check_database_gauges, "expected": (True, ["1", "1", "3"], [True, True, True])},
+
+        {"id": "TC1606", "description": "Existing recorder still fed",
+         "check": check_chains_recorder, "expected": ("StatementMetrics", True, [2])},
+
+        {"id": "TC1607", "description": "Textfile written atomically",
+         "check": check_write_file, "expected": ({"test_total": "3"}, [])},
+
+        {"id": "TC1608", "description": "Standalone /metrics endpoint",
+         "check": check_endpoint, "expected": ((200, metrics.CONTENT_TYPE, {"test_total": "1"}), 404)},
+
+        {"id": "TC1609", "description": "API server /metrics route",
+         "check": check_api_route, "expected": (200, True, 401)},
+
+        {"id": "TC1610", "description": "XPENCE_METRICS_FILE dump at exit",
+         "check": check_environment, "expected": ("1", "3")}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("METRICS TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Metrics\n")
+    test_metrics()
@@ -0,0 +1,246 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sqlite3
+import tempfile
+import migrations
+from database import Database
+from colorama import Fore
+
+# Schema of databases created before migrations were tracked
+LEGACY_SCHEMA = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, password TEXT NOT NULL);
+    CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, name TEXT NOT NULL, price REAL NOT NULL);
+    CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER NOT NULL, name TEXT NOT NULL, amount REAL NOT NULL);
+    INSERT INTO users (username, password) VALUES ('user', 'pass');
+    INSERT INTO products (user_id, name, price) VALUES (1, 'Juice', 12.5);
+    INSERT INTO expenses (product_id, name, amount) VALUES (1, 'Bottle', 2.25);
+    INSERT INTO expenses (product_id, name, amount) VALUES (1, 'Label', 1.005);
+"""
+
+REBUILT_EXPENSES = """
+    CREATE TABLE {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        amount_cents INTEGER NOT NULL,
+        note TEXT NOT NULL DEFAULT ''
+    )
+"""
+
+
+def seed_expenses(db, count):
+    db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", ("user", "pass"))
+    db.execute_query("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)", (1, "Juice", 1250))
+    db.executemany("INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                   [(1, f"Expense {i}", 150) for i in range(count)])
+
+
+def rebuild_expenses(db, batch_size):
+    migrations.rebuild_table(
+        db, "expenses", REBUILT_EXPENSES,
+        indexes={"idx_expenses_product": "product_id, name, amount_cents"},
+        columns=["id", "product_id", "name", "amount_cents"],
+        batch_size=batch_size,
+    )
+
+
+def check_fresh_database():
+    db = Database(":memory:")
+    return migrations.get_version(db)
+
+
+def check_current_database():
+    db = Database(":memory:")
+    return len(db.create_tables())
+
+
+def open_legacy_database(tmp):
+    path = os.path.join(tmp, "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return Database(path)
+
+
+def check_legacy_upgrade():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = open_legacy_database(tmp)
+        index = db.fetch_one("SELECT name FROM sqlite_master WHERE name = 'idx_expenses_product'")
+        rows = db.fetch_one("SELECT COUNT(*) FROM expenses")[0]
+        version = migrations.get_version(db)
+        db.close()
+    return (version if index else 0, rows)
+
+
+def check_legacy_money():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = open_legacy_database(tmp)
+        price = db.fetch_one("SELECT price_cents FROM products")[0]
+        amounts = db.fetch_all("SELECT amount_cents FROM expenses ORDER BY id")
+        db.close()
+    return (price, [amount for (amount,) in amounts])
+
+
+def check_batched_rebuild():
+    db = Database(":memory:")
+    seed_expenses(db, 1050)
+    rebuild_expenses(db, batch_size=100)
+    rows = db.fetch_one("SELECT COUNT(*), MIN(id), MAX(id) FROM expenses")
+    index = db.fetch_one("SELECT tbl_name FROM sqlite_master WHERE name = 'idx_expenses_product'")
+    return rows + index
+
+
+def check_resumed_rebuild():
+    db = Database(":memory:")
+    seed_expenses(db, 1050)
+    # Simulate a rebuild interrupted after the first 300 rows were copied
+    db.execute_query(REBUILT_EXPENSES.format(table="expenses__new"))
+    db.execute_query("INSERT INTO expenses__new (id, product_id, name, amount_cents) "
+                     "SELECT id, product_id, name, amount_cents FROM expenses WHERE id <= 300")
+    rebuild_expenses(db, batch_size=100)
+    return db.fetch_one("SELECT COUNT(*), COUNT(DISTINCT id) FROM expenses")
+
+
+def check_writes_during_rebuild():
+    # Another writer deletes, updates and inserts rows between two batches,
+    # before and after the copy reached them
+    db = Database(":memory:")
+    seed_expenses(db, 1050)
+    execute, batches, during = db.execute_query, [], []
+
+    def execute_query(query, params=()):
+        if query.startswith("INSERT INTO expenses__new") and query.endswith("LIMIT ?"):
+            batches.append(params)
+            if len(batches) == 4:
+                during.append(db.fetch_one("SELECT tbl_name FROM sqlite_master WHERE name = 'idx_expenses_product'")[0])
+                execute("DELETE FROM expenses WHERE id IN (5, 1050)")
+                execute("UPDATE expenses SET amount_cents = 999 WHERE id IN (10, 700)")
+                late = db.insert("INSERT INTO expenses (product_id, name, amount_cents) VALUES (1, 'Late', 5)")
+                execute("DELETE FROM expenses WHERE id = ?", (late,))
+        return execute(query, params)
+
+    db.execute_query = execute_query
+    rebuild_expenses(db, batch_size=100)
+    del db.execute_query
+    changed = db.fetch_all("SELECT id, amount_cents FROM expenses WHERE id IN (5, 10, 700, 1050) ORDER BY id")
+    leftovers = db.fetch_all("SELECT name FROM sqlite_master WHERE name GLOB '*rebuild*' OR name GLOB '*__*'")
+    next_id = db.insert("INSERT INTO expenses (product_id, name, amount_cents) VALUES (1, 'Next', 5)")
+    return db.fetch_one("SELECT COUNT(*) FROM expenses")[0], changed, during, leftovers, next_id
+
+
+def check_keyset_indexes():
+    # Migration 4 replaces the lookup indexes without copying the tables
+    db = Database(":memory:")
+    seed_expenses(db, 50)
+    with db.transaction():
+        db.execute_query("DROP INDEX idx_products_user")
+        db.execute_query("CREATE INDEX idx_products_user ON products (user_id, name, price_cents)")
+        db.execute_query("DROP INDEX idx_expenses_product")
+        db.execute_query("CREATE INDEX idx_expenses_product ON expenses (product_id, name, amount_cents)")
+        migrations.set_version(db, 3)
+    pages = "SELECT name, rootpage FROM sqlite_master WHERE type = 'table' AND name IN ('products', 'expenses')"
+    before = db.fetch_all(pages)
+    migrations.MIGRATIONS[3].run(db, batch_size=10)
+    return (migrations.get_version(db), db.fetch_all(pages) == before,
+            migrations.index_columns(db, "idx_products_user"), migrations.index_columns(db, "idx_expenses_product"))
+
+
+def check_indexes_built_with_copy():
+    # The new indexes grow with the batched copy; the swap only renames them
+    db = Database(":memory:")
+    seed_expenses(db, 1050)
+    execute, steps = db.execute_query, []
+
+    def execute_query(query, params=()):
+        if query.startswith("CREATE INDEX"):
+            steps.append("index")
+        elif query.startswith("INSERT INTO expenses__new") and (not steps or steps[-1] != "copy"):
+            steps.append("copy")
+        return execute(query, params)
+
+    db.execute_query = execute_query
+    rebuild_expenses(db, batch_size=100)
+    del db.execute_query
+    plan = db.fetch_one("EXPLAIN QUERY PLAN SELECT name FROM expenses WHERE product_id = 1")[3]
+    return (steps, migrations.index_columns(db, "idx_expenses_product"), "idx_expenses_product" in plan,
+            db.fetch_one("PRAGMA integrity_check")[0])
+
+
+# Function to test the schema migration engine
+def test_migrations():
+    """Test schema versioning, legacy upgrades and batched table rebuilds"""
+    test_cases = [
+        {"id": "TC401", "description": "Fresh database reaches latest",
+         "check": check_fresh_database, "expected": migrations.latest_version()},
+
+        {"id": "TC402", "description": "Current database applies nothing",
+         "check": check_current_database, "expected": 0},
+
+        {"id": "TC403", "description": "Legacy database is upgraded",
+         "check": check_legacy_upgrade, "expected": (migrations.latest_version(), 2)},
+
+        {"id": "TC404", "description": "Legacy REAL money becomes cents",
+         "check": check_legacy_money, "expected": (1250, [225, 101])},
+
+        {"id": "TC405", "description": "Batched rebuild keeps every row",
+         "check": check_batched_rebuild, "expected": (1050, 1, 1050, "expenses")},
+
+        {"id": "TC406", "description": "Interrupted rebuild resumes",
+         "check": check_resumed_rebuild, "expected": (1050, 1050)},
+
+        {"id": "TC407", "description": "Writes during a rebuild are kept",
+         "check": check_writes_during_rebuild,
+         "expected": (1049, [(10, 999), (700, 999)], ["expenses"], [], 1052)},
+
+        {"id": "TC408", "description": "Keyset indexes replaced in place",
+         "check": check_keyset_indexes,
+         "expected": (4, True, ["user_id", "id", "name", "price_cents"], ["product_id", "id", "name", "amount_cents"])},
+
+        {"id": "TC409", "description": "Swap renames prebuilt indexes",
+         "check": check_indexes_built_with_copy,
+         "expected": (["index", "copy"], ["product_id", "name", "amount_cents"], True, "ok")}
+    ]
+
+    results = []
+    for test_case in test_cases:
+        try:
+            result = test_case["check"]()
+        except Exception as e:
+            result = str(e)
+
+        status = "PASS" if result == test_case["expected"] else "FAIL"
+        results.append({
+            "id": test_case["id"],
+            "description": test_case["description"],
+            "status": status,
+            "expected": str(test_case["expected"]),
+            "actual": str(result)
+        })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("SCHEMA MIGRATION TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Schema Migrations\n")
+    test_migrations()
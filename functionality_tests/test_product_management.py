@@ -2,15 +2,17 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import contextlib
 import unittest.mock
 from product import Product
+from database import Page
 from colorama import Fore
 from ui_mock import UiMock
 
 # Mock Database for product testing
 class MockDatabase:
     def __init__(self):
-        self.products = [(1, "Product1", 100.0), (2, "Product2", 200.0)]
+        self.products = [(1, "Product1", 10000), (2, "Product2", 20000)]
         self.deleted_ids = []
     
     def execute_query(self, query, params):
@@ -23,6 +25,18 @@ class MockDatabase:
             self.deleted_ids.append(params[0])
             return True
         return False
+
+    def insert(self, query, params):
+        self.execute_query(query, params)
+        return len(self.products)
+
+    def executemany(self, query, seq_of_params):
+        for params in seq_of_params:
+            self.execute_query(query, params)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield self
         
     def fetch_all(self, query, params):
         if "FROM products" in query:
@@ -30,6 +44,11 @@ class MockDatabase:
                 return self.products
         return []
 
+    def fetch_page(self, query, params, after_id=None, before_id=None, row_type=None):
+        # Every mock listing fits on a single page
+        rows = self.fetch_all(query, params)
+        return Page([row_type(*row) for row in rows] if row_type else rows, False, False)
+
 # Function to test product viewing functionality
 def test_view_products():
     """Test the product viewing functionality"""
@@ -38,7 +57,7 @@ def test_view_products():
     test_cases = [
         {"id": "TC101", "description": "View products with existing data", 
          "input": {"user_id": 1}, 
-         "expected": [(1, "Product1", 100.0), (2, "Product2", 200.0)]},
+         "expected": [(1, "Product1", 10000), (2, "Product2", 20000)]},
         
         {"id": "TC102", "description": "View products with empty data", 
          "input": {"user_id": 2},
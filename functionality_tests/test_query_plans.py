@@ -0,0 +1,148 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import aggregates
+import instrumentation
+from database import Database
+from services import UserService, ProductService, ExpenseService, SearchService
+from colorama import Fore
+
+# Plans for keyset pages must read the index in order, without sorting
+PAGED = ("SCAN", "USE TEMP B-TREE")
+
+# What the app does, one step per test: every statement a step runs
+# through the Database is captured and its plan checked
+APP_STEPS = [
+    {"id": "TC301", "description": "Register and log in",
+     "run": lambda app: (app.users.register("clerk", "secret"), app.users.login("clerk", "secret"))},
+    {"id": "TC302", "description": "Add and look up a product",
+     "run": lambda app: app.products.get(1, app.products.add(1, "Soap", "4.00").id)},
+    {"id": "TC303", "description": "Pages of products",
+     "run": lambda app: (app.products.list(1), app.products.list(1, after_id=20), app.products.list(1, before_id=41)),
+     "forbid": PAGED},
+    {"id": "TC304", "description": "Add expenses to a product",
+     "run": lambda app: (app.expenses.add(1, 1, "Box", "1.00"), app.expenses.add_many(1, 1, [("Tape", "0.25")]))},
+    {"id": "TC305", "description": "Pages of expenses",
+     "run": lambda app: (app.expenses.list(1, 1), app.expenses.list(1, 1, after_id=20),
+                         app.expenses.list(1, 1, before_id=41)),
+     "forbid": PAGED},
+    {"id": "TC306", "description": "Product report and simulation",
+     "run": lambda app: (app.expenses.report(1, 2), app.expenses.simulate_profit(1, 3, 10))},
+    {"id": "TC307", "description": "Product dashboard",
+     "run": lambda app: app.products.dashboard(1, "net")},
+    {"id": "TC308", "description": "Search products and expenses",
+     "run": lambda app: app.search.search(1, "prod exp")},
+    {"id": "TC309", "description": "Rebuild totals for a product range",
+     "run": lambda app: aggregates.rebuild(app.db, products_per_batch=10)},
+    {"id": "TC310", "description": "Delete a single expense",
+     "run": lambda app: app.expenses.remove(1, 1, 1)},
+    {"id": "TC311", "description": "Delete a product",
+     "run": lambda app: app.products.remove(1, 2)},
+]
+
+
+# The services over one seeded in-memory database
+class App:
+    def __init__(self):
+        self.db = Database(":memory:")
+        self.users = UserService(self.db)
+        self.products = ProductService(self.db)
+        self.expenses = ExpenseService(self.db)
+        self.search = SearchService(self.db)
+        self.users.register("user", "secret")
+        for n in range(1, 61):
+            product = self.products.add(1, f"Product {n}", "10.00")
+            self.expenses.add_many(1, product.id, [(f"Expense {n}-{i}", "0.10") for i in range(3)])
+        for n in range(60):
+            self.expenses.add(1, 1, f"Expense {n}", "0.10")
+
+
+# Stands in for an instrumentation.Recorder and keeps every statement
+class Statements:
+    def __init__(self):
+        self.captured = []
+
+    def record(self, db, query, params, seconds, rows, site):
+        if not isinstance(params, tuple):
+            # executemany: the plan is the same for every row
+            params = params[0] if params else ()
+        self.captured.append((query, params, site))
+
+
+def full_scans(db, query, params, forbid=("SCAN",)):
+    """Return the EXPLAIN QUERY PLAN steps that scan a whole table or index
+    (or, for paginated queries, sort rows instead of reading them in order)"""
+    plan = [detail for *_, detail in Database.fetch_all(db, "EXPLAIN QUERY PLAN " + query, params)]
+    # Scans that read no more than the query asks for: the FROM-less SELECT
+    # of an INSERT ... SELECT, an FTS5 index, a subquery materialized by an
+    # earlier step, and the schema table
+    subqueries = {match[1] for detail in plan for match in [re.match(r"(?:MATERIALIZE|CO-ROUTINE) (\w+)", detail)]
+                  if match}
+    allowed = {"SCAN CONSTANT ROW", "SCAN sqlite_master", *(f"SCAN {name}" for name in subqueries)}
+    return [detail for detail in plan
+            if detail.startswith(forbid) and detail not in allowed and "VIRTUAL TABLE INDEX" not in detail]
+
+
+def step_scans(app, step):
+    """The statements the step ran and the first full scan among them, if any"""
+    statements = Statements()
+    instrumentation.enable(app.db, statements)
+    try:
+        step["run"](app)
+    finally:
+        instrumentation.disable(app.db)
+    for query, params, site in statements.captured:
+        scans = full_scans(app.db, query, params, step.get("forbid", ("SCAN",)))
+        if scans:
+            return len(statements.captured), f"{scans[0]} at {site}"
+    return len(statements.captured), None
+
+
+# Function to test that no app query falls back to a full scan
+def test_query_plans():
+    """Run EXPLAIN QUERY PLAN for every statement of the app's steps and flag full table scans"""
+    app = App()
+
+    results = []
+    for test_case in APP_STEPS:
+        try:
+            count, scan = step_scans(app, test_case)
+            # A step that ran no statement has nothing left to check
+            actual = scan or ("Index search" if count else "No statements")
+        except Exception as e:
+            actual = str(e)
+        results.append({
+            "id": test_case["id"],
+            "description": test_case["description"],
+            "status": "PASS" if actual == "Index search" else "FAIL",
+            "expected": "Index search",
+            "actual": actual
+        })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("QUERY PLAN TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Query Plans\n")
+    test_query_plans()
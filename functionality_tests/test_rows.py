@@ -0,0 +1,199 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import tempfile
+import instrumentation
+from async_db import AsyncDatabase
+from database import Database
+from money import Money
+from rows import UserRow, ProductRow, ExpenseRow
+from services import UserService, ProductService, ExpenseService, ProductRecord
+from colorama import Fore
+
+
+def seeded_database(path):
+    db = Database(path)
+    UserService(db).register("user", "secret")
+    ProductService(db).add(1, "Juice", "12.00")
+    ExpenseService(db).add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50"), ("Cap", "0.10")])
+    return db
+
+
+def check_fetch_all(path):
+    db = seeded_database(path)
+    rows = db.fetch_all("SELECT id, name, amount_cents FROM expenses ORDER BY id", row_type=ExpenseRow)
+    return [type(row).__name__ for row in rows], [(row.id, row.name, row.amount) for row in rows]
+
+
+def check_fetch_one(path):
+    db = seeded_database(path)
+    query = "SELECT id, name, price_cents FROM products WHERE id = ?"
+    return db.fetch_one(query, (1,), row_type=ProductRow), db.fetch_one(query, (2,), row_type=ProductRow)
+
+
+def check_iter_query(path):
+    db = seeded_database(path)
+    return [row.name for row in db.iter_query("SELECT id, name, amount_cents FROM expenses ORDER BY id",
+                                              batch_size=2, row_type=ExpenseRow)]
+
+
+def check_fetch_page(path):
+    db = seeded_database(path)
+    query = "SELECT id, name, amount_cents FROM expenses WHERE product_id = ?"
+    first = db.fetch_page(query, (1,), page_size=2, row_type=ExpenseRow)
+    back = db.fetch_page(query, (1,), before_id=3, page_size=2, row_type=ExpenseRow)
+    return ([row.name for row in first.rows], first.last_id, first.has_next,
+            [row.name for row in back.rows], back.first_id)
+
+
+def check_tuple_compatible(path):
+    # page.rows[0][0], unpacking and comparisons keep working; records of
+    # different classes differ, and being mutable they are unhashable
+    row = ExpenseRow(7, "Cap", 10)
+    expense_id, name, amount_cents = row
+    try:
+        hashed = hash(row)
+    except TypeError as e:
+        hashed = str(e)
+    return (row[0], row[-1], row[:2], len(row), (expense_id, name, amount_cents), row == (7, "Cap", 10),
+            row == ExpenseRow(7, "Cap", 10), row != ExpenseRow(8, "Cap", 10), row != ProductRow(7, "Cap", 10),
+            hashed, row._asdict())
+
+
+def check_compact(path):
+    # No per-instance dict, and no bigger than the tuple it replaces
+    row = ExpenseRow(7, "Cap", 10)
+    as_dict = {"id": 7, "name": "Cap", "amount_cents": 10}
+    try:
+        row.extra = 1
+        settable = True
+    except AttributeError:
+        settable = False
+    return (hasattr(row, "__dict__"), settable, sys.getsizeof(row) < sys.getsizeof(as_dict),
+            sys.getsizeof(row) <= sys.getsizeof((7, "Cap", 10)))
+
+
+def check_services(path):
+    db = seeded_database(path)
+    products, expenses = ProductService(db), ExpenseService(db)
+    return (ProductRecord is ProductRow, type(products.get(1, 1)).__name__, products.get(1, 1).price,
+            [type(row).__name__ for row in products.list(1).rows + expenses.list(1, 1).rows],
+            expenses.add(1, 1, "Box", "1.00") == ExpenseRow(4, "Box", 100))
+
+
+def check_user_row(path):
+    db = seeded_database(path)
+    user = db.fetch_one("SELECT id, username, password FROM users WHERE username = ?", ("user",), row_type=UserRow)
+    return repr(user), user.password.startswith("pbkdf2"), UserService(db).login("user", "secret")
+
+
+def check_instrumented(path):
+    # Timed wrappers pass row_type through and still count the rows
+    db = seeded_database(path)
+    recorder = instrumentation.enable(db)
+    rows = db.fetch_all("SELECT id, name, amount_cents FROM expenses", row_type=ExpenseRow)
+    one = db.fetch_one("SELECT id, name, amount_cents FROM expenses WHERE id = 1", row_type=ExpenseRow)
+    streamed = list(db.iter_query("SELECT id, name, amount_cents FROM expenses", row_type=ExpenseRow))
+    return len(rows), one.name, len(streamed), sorted(row["rows"] for row in recorder.summary())
+
+
+def check_async(path):
+    seeded_database(path).close()
+
+    async def run():
+        adb = await AsyncDatabase.open(path)
+        try:
+            rows = await adb.fetch_all("SELECT id, name, amount_cents FROM expenses ORDER BY id", row_type=ExpenseRow)
+            streamed = [row async for row in adb.iter_query("SELECT id, name, amount_cents FROM expenses",
+                                                             row_type=ExpenseRow)]
+            return [row.amount for row in rows], len(streamed)
+        finally:
+            await adb.close()
+    return asyncio.run(run())
+
+
+# Function to test the record row types
+def test_rows():
+    """Test __slots__ record rows built by the cursor row factory"""
+    test_cases = [
+        {"id": "TC1701", "description": "fetch_all builds records",
+         "check": check_fetch_all,
+         "expected": (["ExpenseRow"] * 3, [(1, "Bottle", Money(250)), (2, "Label", Money(50)),
+                                           (3, "Cap", Money(10))])},
+
+        {"id": "TC1702", "description": "fetch_one record or None",
+         "check": check_fetch_one, "expected": (ProductRow(1, "Juice", 1200), None)},
+
+        {"id": "TC1703", "description": "iter_query streams records",
+         "check": check_iter_query, "expected": ["Bottle", "Label", "Cap"]},
+
+        {"id": "TC1704", "description": "Keyset pages of records",
+         "check": check_fetch_page, "expected": (["Bottle", "Label"], 2, True, ["Bottle", "Label"], 1)},
+
+        {"id": "TC1705", "description": "Indexing, unpacking, equality",
+         "check": check_tuple_compatible,
+         "expected": (7, 10, (7, "Cap"), 3, (7, "Cap", 10), True, True, True, True,
+                      "unhashable type: 'ExpenseRow'", {"id": 7, "name": "Cap", "amount_cents": 10})},
+
+        {"id": "TC1706", "description": "Slots only, tuple-sized",
+         "check": check_compact, "expected": (False, False, True, True)},
+
+        {"id": "TC1707", "description": "Services return records",
+         "check": check_services,
+         "expected": (True, "ProductRow", Money(1200), ["ProductRow", "ExpenseRow", "ExpenseRow", "ExpenseRow"],
+                      True)},
+
+        {"id": "TC1708", "description": "UserRow hides the password",
+         "check": check_user_row, "expected": ("UserRow(id=1, username='user')", True, 1)},
+
+        {"id": "TC1709", "description": "Works with instrumentation",
+         "check": check_instrumented, "expected": (3, "Bottle", 3, [1, 6])},
+
+        {"id": "TC1710", "description": "Async facade row types",
+         "check": check_async, "expected": ([Money(250), Money(50), Money(10)], 3)}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("ROW TYPE TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Row Types\n")
+    test_rows()
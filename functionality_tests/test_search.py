@@ -0,0 +1,209 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import tempfile
+import datagen
+import migrations
+import search
+from database import Database
+from importer import Importer
+from services import UserService, ProductService, ExpenseService, SearchService, ValidationError
+from colorama import Fore
+
+
+def seeded_database(path):
+    # Two users; both have bottles, only user 1 has labels
+    db = Database(path)
+    users = UserService(db)
+    users.register("user", "secret")
+    users.register("other", "secret")
+    products = ProductService(db)
+    products.add(1, "Bottled Juice", "12.00")
+    products.add(1, "Soap", "4.00")
+    products.add(2, "Bottle Opener", "3.00")
+    expenses = ExpenseService(db)
+    expenses.add_many(1, 1, [("Bottle", "2.50"), ("Label", "0.50"), ("Glass bottle with cork", "3.00")])
+    expenses.add_many(1, 2, [("Bottle cap", "0.10")])
+    expenses.add_many(2, 3, [("Bottle", "1.00")])
+    return db
+
+
+def names(results):
+    return [p.name for p in results.products], [e.name for e in results.expenses]
+
+
+def indexed_ids(db):
+    return [row[0] for row in db.fetch_all("SELECT id FROM expenses_search_docsize ORDER BY id")]
+
+
+def check_prefix(path):
+    db = seeded_database(path)
+    results = SearchService(db).search(1, "bott")
+    return names(results), [(e.product_id, e.product_name) for e in results.expenses][:1]
+
+
+def check_scoped(path):
+    # The other user's product and expense match the word but are not theirs
+    db = seeded_database(path)
+    return names(SearchService(db).search(2, "BOTTLE")), names(SearchService(db).search(2, "label"))
+
+
+def check_all_words(path):
+    db = seeded_database(path)
+    return names(SearchService(db).search(1, "bott cork")), names(SearchService(db).search(1, "bottle soap"))
+
+
+def check_syntax(path):
+    # FTS5 operators and quotes are read as words, never as query syntax
+    db = seeded_database(path)
+    service = SearchService(db)
+    found = names(service.search(1, 'bottle" OR NOT owner:*'))
+    errors = []
+    for text, limit in [("", 20), ("*:()", 20), ("bottle", 0)]:
+        try:
+            service.search(1, text, limit)
+        except ValidationError:
+            errors.append(text)
+    return found, errors
+
+
+def check_ranking(path):
+    # Shorter names with the word rank first; limit caps each list
+    db = seeded_database(path)
+    ranked = names(SearchService(db).search(1, "bottle"))[1]
+    return ranked, names(SearchService(db).search(1, "b", limit=1))
+
+
+def check_sync(path):
+    # Removing an expense, or a product with its expenses, leaves the index
+    db = seeded_database(path)
+    products, expenses = ProductService(db), ExpenseService(db)
+    expenses.remove(1, 1, 2)
+    products.remove(1, 2)
+    db.execute_query("UPDATE expenses SET name = 'Jar' WHERE id = 1")
+    db.execute_query("INSERT INTO expenses_search (expenses_search) VALUES ('integrity-check')")
+    return names(SearchService(db).search(1, "bott")), names(SearchService(db).search(1, "jar")), indexed_ids(db)
+
+
+def check_bulk_import(path):
+    # The importer drops the insert trigger per batch and indexes the rows at once
+    db = seeded_database(path)
+    data = io.BytesIO(b"product,name,amount\nBottled Juice,Shrink wrap,0.20\nSoap,Shrink film,0.30\n")
+    Importer(db, 1).import_expenses(data, fmt="csv")
+    trigger = db.fetch_one("SELECT 1 FROM sqlite_master WHERE name = ?", (search.EXPENSES_INSERT_TRIGGER,))
+    return names(SearchService(db).search(1, "shr")), trigger is not None, indexed_ids(db)
+
+
+def check_datagen(path):
+    db = Database(path)
+    datagen.generate(db, users=2, products_per_user=5, expenses=500, batch_size=120)
+    count = db.fetch_one("SELECT COUNT(*) FROM expenses")[0]
+    db.execute_query("INSERT INTO expenses_search (expenses_search) VALUES ('integrity-check')")
+    return len(indexed_ids(db)) == count, count
+
+
+def check_migration(path):
+    # A database from before migration 6 gets its existing rows indexed, in batches
+    db = seeded_database(path)
+    with db.transaction():
+        triggers = db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%search%'")
+        for (trigger,) in triggers:
+            db.execute_query(f"DROP TRIGGER {trigger}")
+        db.execute_query("DROP TABLE products_search")
+        db.execute_query("DROP TABLE expenses_search")
+        migrations.set_version(db, 5)
+    fallback = names(SearchService(db).search(1, "bott"))
+    applied = migrations.migrate(db, batch_size=2)
+    return applied, fallback, names(SearchService(db).search(1, "bott")), indexed_ids(db)
+
+
+# Function to test full-text search
+def test_search():
+    """Test the FTS5 name search, its sync triggers and the LIKE fallback"""
+    test_cases = [
+        {"id": "TC1901", "description": "Words match as prefixes",
+         "check": check_prefix,
+         "expected": ((["Bottled Juice"], ["Bottle", "Bottle cap", "Glass bottle with cork"]),
+                      [(1, "Bottled Juice")])},
+
+        {"id": "TC1902", "description": "Only the user's rows match",
+         "check": check_scoped,
+         "expected": ((["Bottle Opener"], ["Bottle"]), ([], []))},
+
+        {"id": "TC1903", "description": "Every word must match",
+         "check": check_all_words,
+         "expected": (([], ["Glass bottle with cork"]), ([], []))},
+
+        {"id": "TC1904", "description": "Query syntax is escaped",
+         "check": check_syntax, "expected": (([], []), ["", "*:()", "bottle"])},
+
+        {"id": "TC1905", "description": "Ranked by bm25, limited",
+         "check": check_ranking,
+         "expected": (["Bottle", "Bottle cap", "Glass bottle with cork"], (["Bottled Juice"], ["Bottle"]))},
+
+        {"id": "TC1906", "description": "Triggers follow deletes/updates",
+         "check": check_sync,
+         "expected": ((["Bottled Juice"], ["Glass bottle with cork"]), ([], ["Jar"]), [1, 3, 5])},
+
+        {"id": "TC1907", "description": "Bulk import indexes its rows",
+         "check": check_bulk_import,
+         "expected": (([], ["Shrink film", "Shrink wrap"]), True, [1, 2, 3, 4, 5, 6, 7])},
+
+        {"id": "TC1908", "description": "Generated expenses all indexed",
+         "check": check_datagen, "expected": (True, 500)},
+
+        {"id": "TC1909", "description": "Migration indexes old rows",
+         "check": check_migration,
+         "expected": ([6], (["Bottled Juice"], ["Bottle cap", "Glass bottle with cork", "Bottle"]),
+                      (["Bottled Juice"], ["Bottle", "Bottle cap", "Glass bottle with cork"]), [1, 2, 3, 4, 5])},
+
+        {"id": "TC1910", "description": "Checks a query's words",
+         "check": lambda path: (search.words("Café-crème, 2x_bottles"),
+                                search.match_expression(7, 'cap" OR x')),
+         "expected": (["Café", "crème", "2x", "bottles"], 'owner : "u7" AND name : ("cap"* "OR"* "x"*)')}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("SEARCH TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Search\n")
+    test_search()
@@ -0,0 +1,323 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import http.client
+import json
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import server
+from database import Database
+from colorama import Fore
+
+
+@contextmanager
+def running(path, workers=4, backlog=8, keepalive_timeout=server.KEEPALIVE_TIMEOUT):
+    # A server on a free localhost port, stopped when the block ends
+    db = Database(path)
+    api_server = server.serve(db, port=0, workers=workers, backlog=backlog, keepalive_timeout=keepalive_timeout)
+    thread = threading.Thread(target=api_server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield api_server
+    finally:
+        api_server.shutdown()
+        api_server.server_close()
+        db.close()
+
+
+def connect(api_server):
+    return http.client.HTTPConnection("127.0.0.1", api_server.server_address[1], timeout=10)
+
+
+def call(conn, method, path, body=None, token=None, raw=None):
+    # Status and decoded JSON body (None when empty) of one request
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = raw if raw is not None else (None if body is None else json.dumps(body))
+    conn.request(method, path, body=data, headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    return response.status, json.loads(payload) if payload else None
+
+
+def logged_in(conn, username="user"):
+    call(conn, "POST", "/users", {"username": username, "password": "secret"})
+    return call(conn, "POST", "/sessions", {"username": username, "password": "secret"})[1]["token"]
+
+
+def check_register(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        first = call(conn, "POST", "/users", {"username": "user", "password": "secret"})
+        again = call(conn, "POST", "/users", {"username": "user", "password": "other"})
+        return first, again
+
+
+def check_login(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        wrong = call(conn, "POST", "/sessions", {"username": "user", "password": "nope"})
+        return isinstance(token, str) and len(token) > 20, wrong
+
+
+def check_token_required(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        missing = call(conn, "GET", "/products")[0]
+        forged = call(conn, "GET", "/products", token="forged")[0]
+        token = logged_in(conn)
+        call(conn, "DELETE", "/sessions", token=token)
+        return missing, forged, call(conn, "GET", "/products", token=token)[0]
+
+
+def check_products(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        added = call(conn, "POST", "/products", {"name": "Juice", "price": "12.50"}, token)
+        call(conn, "POST", "/products", {"name": "Chips", "price": 3}, token)
+        status, page = call(conn, "GET", "/products?after=1", token=token)
+        return added, status, [item["name"] for item in page["items"]], page["has_prev"]
+
+
+def check_expenses_and_report(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        call(conn, "POST", "/products", {"name": "Juice", "price": "12.00"}, token)
+        one = call(conn, "POST", "/products/1/expenses", {"name": "Bottle", "amount": "2.50"}, token)[0]
+        many = call(conn, "POST", "/products/1/expenses",
+                    {"expenses": [{"name": "Label", "amount": "0.50"}, {"name": "Cap", "amount": 0.25}]}, token)
+        report = call(conn, "GET", "/products/1/report", token=token)[1]
+        simulation = call(conn, "GET", "/products/1/simulation?quantity=10", token=token)[1]
+        return one, many, report["total_expenses"], report["net_per_unit_cents"], simulation["total_profit"]
+
+
+def check_validation(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        call(conn, "POST", "/products", {"name": "Juice", "price": "12.00"}, token)
+        negative = call(conn, "POST", "/products/1/expenses", {"name": "Refund", "amount": "-1"}, token)
+        missing = call(conn, "POST", "/products", {"name": "Tea"}, token)
+        huge = call(conn, "POST", "/products", {"name": "Gold", "price": "1e30"}, token)
+        return negative, missing, huge
+
+
+def check_other_user(path):
+    # Another user's product looks like it does not exist
+    with running(path) as api_server:
+        conn = connect(api_server)
+        owner = logged_in(conn, "owner")
+        call(conn, "POST", "/products", {"name": "Juice", "price": "12.00"}, owner)
+        other = logged_in(conn, "other")
+        return (call(conn, "GET", "/products/1", token=other), call(conn, "DELETE", "/products/1", token=other)[0],
+                call(conn, "GET", "/products/1/expenses", token=other)[0])
+
+
+def check_delete(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        call(conn, "POST", "/products", {"name": "Juice", "price": "12.00"}, token)
+        call(conn, "POST", "/products/1/expenses", {"name": "Bottle", "amount": "2.50"}, token)
+        expense = call(conn, "DELETE", "/products/1/expenses/1", token=token)
+        again = call(conn, "DELETE", "/products/1/expenses/1", token=token)[0]
+        product = call(conn, "DELETE", "/products/1", token=token)
+        return expense, again, product, call(conn, "GET", "/products/1", token=token)[0]
+
+
+def check_routing_errors(path):
+    with running(path) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        return (call(conn, "GET", "/nowhere", token=token)[0], call(conn, "PUT", "/products", token=token),
+                call(conn, "POST", "/products", token=token, raw="{not json")[1],
+                call(conn, "GET", "/dashboard?sort=colour", token=token))
+
+
+def check_keep_alive(path):
+    # Every request of a client travels over the same connection
+    with running(path) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        sock = conn.sock
+        for i in range(20):
+            call(conn, "POST", "/products", {"name": f"Item {i}", "price": "1.00"}, token)
+        status, rows = call(conn, "GET", "/dashboard", token=token)
+        return status, len(rows["items"]), conn.sock is sock
+
+
+def check_concurrent_clerks(path):
+    # Clerks on their own connections add expenses at the same time
+    with running(path, workers=4) as api_server:
+        conn = connect(api_server)
+        token = logged_in(conn)
+        call(conn, "POST", "/products", {"name": "Juice", "price": "100.00"}, token)
+        statuses = []
+
+        def clerk(n):
+            own = connect(api_server)
+            for i in range(25):
+                statuses.append(call(own, "POST", "/products/1/expenses", {"name": f"C{n}-{i}", "amount": "0.01"},
+                                     token)[0])
+            own.close()
+
+        threads = [threading.Thread(target=clerk, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report = call(conn, "GET", "/products/1/report", token=token)[1]
+        return set(statuses), len(statuses), report["total_expenses_cents"]
+
+
+def check_idle_clients(path):
+    # Idle keep-alive clients outnumbering the workers do not hold them,
+    # so a new client is answered at once
+    with running(path, workers=2, backlog=16) as api_server:
+        idle = [connect(api_server) for _ in range(8)]
+        for n, conn in enumerate(idle):
+            call(conn, "POST", "/users", {"username": f"user{n}", "password": "secret"})
+        fresh = connect(api_server)
+        fresh.timeout = 2
+        start = time.perf_counter()
+        status = call(fresh, "POST", "/sessions", {"username": "user0", "password": "secret"})[0]
+        quick = time.perf_counter() - start < 1
+        # The idle connections still work afterwards
+        statuses = {call(conn, "POST", "/sessions", {"username": "user1", "password": "secret"})[0] for conn in idle}
+        for conn in [fresh, *idle]:
+            conn.close()
+        return status, quick, statuses
+
+
+def check_idle_expiry(path):
+    # An idle connection gives its slot back after the keep-alive timeout
+    with running(path, workers=1, backlog=0, keepalive_timeout=0.2) as api_server:
+        held = connect(api_server)
+        call(held, "POST", "/users", {"username": "user", "password": "secret"})
+        time.sleep(0.5)
+        extra = connect(api_server)
+        status = call(extra, "POST", "/sessions", {"username": "user", "password": "secret"})[0]
+        held.close()
+        extra.close()
+        return status
+
+
+def check_busy(path):
+    # With the only connection slot held by an idle keep-alive client and
+    # no backlog, the next connection is turned away with 503
+    with running(path, workers=1, backlog=0) as api_server:
+        held = connect(api_server)
+        call(held, "POST", "/users", {"username": "user", "password": "secret"})
+        extra = connect(api_server)
+        try:
+            busy = call(extra, "GET", "/dashboard")
+        except (ConnectionError, socket.error, http.client.HTTPException) as e:
+            busy = type(e).__name__
+        held.close()
+        return busy
+
+
+# Function to test the HTTP API server
+def test_server():
+    """Test the JSON endpoints, error codes and worker pool of server.py"""
+    test_cases = [
+        {"id": "TC1301", "description": "Register, duplicate username",
+         "check": check_register,
+         "expected": ((201, {"id": 1}), (409, {"error": "Username already exists. Try a different one."}))},
+
+        {"id": "TC1302", "description": "Login issues a token",
+         "check": check_login, "expected": (True, (401, {"error": "Invalid credentials. Try again."}))},
+
+        {"id": "TC1303", "description": "Token required and revocable",
+         "check": check_token_required, "expected": (401, 401, 401)},
+
+        {"id": "TC1304", "description": "Add and page products",
+         "check": check_products,
+         "expected": ((201, {"id": 1, "name": "Juice", "price_cents": 1250, "price": "$12.50"}), 200, ["Chips"], True)},
+
+        {"id": "TC1305", "description": "Expenses, report, simulation",
+         "check": check_expenses_and_report, "expected": (201, (201, {"added": 2}), "$3.25", 875, "$87.50")},
+
+        {"id": "TC1306", "description": "Validation errors are 400",
+         "check": check_validation,
+         "expected": ((400, {"error": "Expense amount cannot be negative."}), (400, {"error": "Missing price."}),
+                      (400, {"error": "Invalid price. Please enter a number."}))},
+
+        {"id": "TC1307", "description": "Another user's product is 404",
+         "check": check_other_user, "expected": ((404, {"error": "Product not found."}), 404, 404)},
+
+        {"id": "TC1308", "description": "Delete expense and product",
+         "check": check_delete, "expected": ((204, None), 404, (204, None), 404)},
+
+        {"id": "TC1309", "description": "404, 405, bad JSON, bad sort",
+         "check": check_routing_errors,
+         "expected": (404, (405, {"error": "Use GET, POST for /products."}),
+                      {"error": "The request body is not valid JSON."},
+                      (400, {"error": "Cannot sort the dashboard by 'colour'."}))},
+
+        {"id": "TC1310", "description": "Keep-alive reuses connection",
+         "check": check_keep_alive, "expected": (200, 20, True)},
+
+        {"id": "TC1311", "description": "Concurrent clerks",
+         "check": check_concurrent_clerks, "expected": ({201}, 100, 100)},
+
+        {"id": "TC1312", "description": "Full worker pool answers 503",
+         "check": check_busy, "expected": (503, {"error": "The server is busy, try again."})},
+
+        {"id": "TC1313", "description": "Idle clients do not hold workers",
+         "check": check_idle_clients, "expected": (201, True, {201})},
+
+        {"id": "TC1314", "description": "Idle connections time out",
+         "check": check_idle_expiry, "expected": 201}
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for test_case in test_cases:
+            try:
+                result = test_case["check"](os.path.join(tmp, f"{test_case['id']}.db"))
+            except Exception as e:
+                result = str(e)
+
+            status = "PASS" if result == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "expected": str(test_case["expected"]),
+                "actual": str(result)
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("HTTP SERVER TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - HTTP Server\n")
+    test_server()
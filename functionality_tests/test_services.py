@@ -0,0 +1,187 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest.mock
+from database import Database
+from expense import Expense
+from money import Money
+from services import (UserService, ProductService, ExpenseService, ProductRecord, ProductReport,
+                      ProfitSimulation, ValidationError, NotFoundError, AuthenticationError, ConflictError)
+from ui_mock import UiMock
+from colorama import Fore
+
+
+def seeded_database():
+    db = Database(":memory:")
+    users = UserService(db)
+    users.register("user", "pass")
+    users.register("other", "pass")
+    ProductService(db).add(1, "Juice", Money(1200))
+    ExpenseService(db).add_many(1, 1, [("Bottle", Money(250)), ("Label", "0.50")])
+    return db
+
+
+def raised(fn, *args):
+    # Name and message of the error fn raises, or its result
+    try:
+        return fn(*args)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def check_add_product():
+    db = seeded_database()
+    return ProductService(db).add(1, "  Chips ", "10.00")
+
+
+def check_invalid_price():
+    return raised(ProductService(seeded_database()).add, 1, "Chips", "ten")
+
+
+def check_remove_foreign_product():
+    # A user cannot remove another user's product
+    db = seeded_database()
+    return raised(ProductService(db).remove, 2, 1), ExpenseService(db).report(1, 1).total_expenses
+
+
+def check_add_many_atomic():
+    db = seeded_database()
+    error = raised(ExpenseService(db).add_many, 1, 1, [("Cap", Money(10)), ("Refund", Money(-5))])
+    return error, ExpenseService(db).report(1, 1).total_expenses
+
+
+def check_report():
+    return ExpenseService(seeded_database()).report(1, 1)
+
+
+def check_simulate_profit():
+    service = ExpenseService(seeded_database())
+    return service.simulate_profit(1, 1, 100), raised(service.simulate_profit, 1, 1, 0)
+
+
+def check_menu_reads_report_once():
+    # The simulation menus read the report before asking and pass it on
+    manager = Expense(seeded_database(), 1, 1)
+    reads = []
+    load = manager.service._load_report
+    manager.service._load_report = lambda *args: reads.append(args) or load(*args)
+    counts = []
+    with unittest.mock.patch("expense.Ui", UiMock), unittest.mock.patch("builtins.input") as mock_input:
+        mock_input.side_effect = ["10"]
+        manager.simulate_profit()
+        counts.append(len(reads))
+        mock_input.side_effect = ["0", "100"]
+        manager.simulate_scenarios()
+        counts.append(len(reads))
+    return counts
+
+
+def check_missing_product():
+    return raised(ExpenseService(seeded_database()).report, 1, 99)
+
+
+def check_foreign_expenses():
+    # Another user's product, or one that does not exist, takes no expenses
+    # and gives none away
+    db = seeded_database()
+    expenses = ExpenseService(db)
+    errors = [raised(expenses.add, 2, 1, "Cap", "0.10"), raised(expenses.add, 1, 99, "Cap", "0.10"),
+              raised(expenses.add_many, 2, 1, [("Cap", "0.10")]), raised(expenses.remove, 2, 1, 1),
+              raised(expenses.report, 2, 1)]
+    count = db.fetch_one("SELECT COUNT(*) FROM expenses")[0]
+    return errors, expenses.list(2, 1).rows, count
+
+
+def check_login():
+    users = UserService(seeded_database())
+    return users.login("other", "pass"), raised(users.login, "other", "wrong")
+
+
+def check_duplicate_user():
+    return raised(UserService(seeded_database()).register, "user", "again")
+
+
+# Function to test the headless service layer
+def test_services():
+    """Test typed results and errors of the user, product and expense services"""
+    test_cases = [
+        {"id": "TC901", "description": "Add product returns record",
+         "check": check_add_product, "expected": ProductRecord(2, "Chips", 1000)},
+
+        {"id": "TC902", "description": "Unparseable price rejected",
+         "check": check_invalid_price, "expected": "ValidationError: Invalid price. Please enter a number."},
+
+        {"id": "TC903", "description": "Other user's product not removed",
+         "check": check_remove_foreign_product, "expected": ("NotFoundError: Product not found.", Money(300))},
+
+        {"id": "TC904", "description": "Invalid batch writes nothing",
+         "check": check_add_many_atomic,
+         "expected": ("ValidationError: Expense amount cannot be negative.", Money(300))},
+
+        {"id": "TC905", "description": "Product report",
+         "check": check_report, "expected": ProductReport(1, Money(1200), Money(300), Money(900))},
+
+        {"id": "TC906", "description": "Profit simulation",
+         "check": check_simulate_profit,
+         "expected": (ProfitSimulation(1, 100, Money(900), Money(90000)), "ValidationError: Quantity cannot be zero.")},
+
+        {"id": "TC907", "description": "Report on missing product",
+         "check": check_missing_product, "expected": "NotFoundError: Product not found."},
+
+        {"id": "TC908", "description": "Login result and failure",
+         "check": check_login, "expected": (2, "AuthenticationError: Invalid credentials. Try again.")},
+
+        {"id": "TC909", "description": "Duplicate username",
+         "check": check_duplicate_user, "expected": "ConflictError: Username already exists. Try a different one."},
+
+        {"id": "TC910", "description": "Expenses of others' products",
+         "check": check_foreign_expenses,
+         "expected": (["NotFoundError: Product not found."] * 3 + ["NotFoundError: Expense not found.",
+                                                                   "NotFoundError: Product not found."], [], 2)},
+
+        {"id": "TC911", "description": "Simulation menus read report once",
+         "check": check_menu_reads_report_once, "expected": [1, 2]}
+    ]
+
+    results = []
+    for test_case in test_cases:
+        try:
+            result = test_case["check"]()
+        except Exception as e:
+            result = str(e)
+
+        status = "PASS" if result == test_case["expected"] else "FAIL"
+        results.append({
+            "id": test_case["id"],
+            "description": test_case["description"],
+            "status": status,
+            "expected": str(test_case["expected"]),
+            "actual": str(result)
+        })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("SERVICE LAYER TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Service Layer\n")
+    test_services()
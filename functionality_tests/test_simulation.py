@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import Database
+from services import UserService, ProductService, ExpenseService, ValidationError, MAX_SCENARIO_QUANTITY
+from simulation import ScenarioGrid, frange
+from colorama import Fore
+
+PRODUCTS = [(1, 1250, 300), (2, 1000, 1200), (3, 800, 100)]
+
+
+def summary(results):
+    return [(r.product_id, r.best_price_change, r.best_expense_scale, round(r.best_net_cents, 2),
+             r.break_even_quantity, r.best_break_even_quantity) for r in results]
+
+
+def check_best_scenario():
+    grid = ScenarioGrid(range(1, 11), frange(-0.2, 0.2, 5), frange(0.8, 1.2, 5))
+    result = grid.run(PRODUCTS[:1])[0]
+    return (result.best_price_change, result.best_expense_scale, round(result.best_net_cents, 2))
+
+
+def check_break_even():
+    grid = ScenarioGrid(range(1, 101), fixed_costs_cents=5000)
+    return [(r.product_id, r.break_even_quantity) for r in grid.run(PRODUCTS)]
+
+
+def check_profit_grid():
+    grid = ScenarioGrid([1, 2, 3], [0.0, 0.1], [1.0], fixed_costs_cents=100)
+    return [[list(map(float, row)) for row in block] for block in grid.profit_grid(1000, 200)]
+
+
+def check_fallback_matches():
+    grid = ScenarioGrid(range(1, 51), frange(-0.3, 0.3, 7), frange(0.5, 1.5, 11), fixed_costs_cents=2500)
+    vectorized = summary(grid.run(PRODUCTS))
+    grid.use_numpy = False
+    return vectorized == summary(grid.run(PRODUCTS))
+
+
+def check_invalid_quantities():
+    try:
+        ScenarioGrid([])
+        return "accepted"
+    except ValueError:
+        return "rejected"
+
+
+def check_huge_range():
+    # A billion quantities stay a range: break-evens are computed, not scanned,
+    # and a profit column is asked for by quantity
+    grid = ScenarioGrid(range(1, 10**9 + 1), fixed_costs_cents=5000)
+    vectorized = [(r.product_id, r.break_even_quantity) for r in grid.run(PRODUCTS)]
+    grid.use_numpy = False
+    fallback = [(r.product_id, r.break_even_quantity) for r in grid.run(PRODUCTS)]
+    column = [[list(map(float, row)) for row in block] for block in grid.profit_grid(1000, 200, quantities=[10**9])]
+    return type(grid.quantities).__name__, vectorized == fallback, vectorized, column
+
+
+def check_stepped_range():
+    # Ranges with a step give the same break-evens as the same quantities listed
+    stepped = ScenarioGrid(range(0, 100, 10), fixed_costs_cents=5000)
+    listed = ScenarioGrid(list(range(0, 100, 10)), fixed_costs_cents=5000)
+    return summary(stepped.run(PRODUCTS)) == summary(listed.run(PRODUCTS)), stepped.run(PRODUCTS)[2].break_even_quantity
+
+
+def check_quantity_cap():
+    db = Database(":memory:")
+    UserService(db).register("user", "secret")
+    ProductService(db).add(1, "Juice", "12.00")
+    expenses = ExpenseService(db)
+    report = expenses.scenarios(1, 1, MAX_SCENARIO_QUANTITY, [0.0, 0.1], [1.0])
+    try:
+        expenses.scenarios(1, 1, MAX_SCENARIO_QUANTITY + 1, [0.0], [1.0])
+        capped = False
+    except ValidationError:
+        capped = True
+    return capped, [[list(map(float, row)) for row in block] for block in report.profits]
+
+
+# Function to test the what-if scenario engine
+def test_scenarios():
+    """Test best-scenario search, break-even quantities and the array fallback"""
+    test_cases = [
+        {"id": "TC601", "description": "Best scenario maximizes net",
+         "check": check_best_scenario, "expected": (0.2, 0.8, 1260.0)},
+
+        {"id": "TC602", "description": "Break-even covers fixed costs",
+         "check": check_break_even, "expected": [(1, 6), (2, None), (3, 8)]},
+
+        {"id": "TC603", "description": "Profit grid per quantity",
+         "check": check_profit_grid, "expected": [[[700.0, 1500.0, 2300.0]], [[800.0, 1700.0, 2600.0]]]},
+
+        {"id": "TC604", "description": "Array fallback matches NumPy",
+         "check": check_fallback_matches, "expected": True},
+
+        {"id": "TC605", "description": "Empty quantity range rejected",
+         "check": check_invalid_quantities, "expected": "rejected"},
+
+        {"id": "TC606", "description": "Billion-unit range stays lazy",
+         "check": check_huge_range,
+         "expected": ("range", True, [(1, 6), (2, None), (3, 8)], [[[799_999_995_000.0]]])},
+
+        {"id": "TC607", "description": "Stepped range break-even",
+         "check": check_stepped_range, "expected": (True, 10)},
+
+        {"id": "TC608", "description": "Scenario quantity is capped",
+         "check": check_quantity_cap,
+         "expected": (True, [[[12_000_000_000.0]], [[13_200_000_000.0]]])}
+    ]
+
+    results = []
+    for test_case in test_cases:
+        try:
+            result = test_case["check"]()
+        except Exception as e:
+            result = str(e)
+
+        status = "PASS" if result == test_case["expected"] else "FAIL"
+        results.append({
+            "id": test_case["id"],
+            "description": test_case["description"],
+            "status": status,
+            "expected": str(test_case["expected"]),
+            "actual": str(result)
+        })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("SCENARIO SIMULATION TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - Scenario Simulation\n")
+    test_scenarios()
@@ -0,0 +1,155 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import unittest.mock
+from contextlib import redirect_stdout
+from ui import Ui
+from colorama import Fore
+
+B, C = Fore.BLUE, Fore.CYAN
+
+
+# Stand-in for sys.stdout that keeps every write separately
+class Writes:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(text)
+
+    def flush(self):
+        pass
+
+
+def check_screen_buffered():
+    # Everything inside screen() reaches stdout in one write, at the end
+    stdout = Writes()
+    with redirect_stdout(stdout):
+        with Ui.screen():
+            Ui.display_header("Menu")
+            Ui.display_options(["Add", "Remove"])
+            Ui.display_success("Saved")
+            during = len(stdout.writes)
+    return during, len(stdout.writes), stdout.writes[0].count("\n")
+
+
+def check_nested_screens():
+    # An inner screen joins the outer one; outside a screen writes go straight out
+    stdout = Writes()
+    with redirect_stdout(stdout):
+        with Ui.screen():
+            Ui.display_separator()
+            with Ui.screen():
+                Ui.display_error("Inner")
+            inner = len(stdout.writes)
+            Ui.display_separator()
+        Ui.display_success("After")
+    return inner, len(stdout.writes), "Inner" in stdout.writes[0]
+
+
+def check_screens_per_thread():
+    # Threads rendering at the same time each write their own screen whole
+    stdout = Writes()
+    start = threading.Barrier(4)
+
+    def render(n):
+        with Ui.screen():
+            start.wait()
+            for _ in range(50):
+                Ui.display_lines([f"thread {n}"])
+
+    with redirect_stdout(stdout):
+        threads = [threading.Thread(target=render, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return sorted(len({line for line in write.splitlines()}) for write in stdout.writes)
+
+
+def check_table_layout():
+    stdout = Writes()
+    with redirect_stdout(stdout):
+        Ui.display_table(["ID", "Name", "Price"], [(1, "Juice", "$12.50"), (12, "Chips", "$3.00")])
+    return len(stdout.writes), stdout.writes[0].split("\n")
+
+
+def check_empty_table():
+    stdout = Writes()
+    with redirect_stdout(stdout):
+        Ui.display_table(["ID", "Name"], [])
+    return stdout.writes
+
+
+# Function to test screen buffering and table rendering in ui.py
+def test_ui():
+    """Test what Ui writes to stdout and how often"""
+    test_cases = [
+        {"id": "TC2101", "description": "screen() writes once at the end",
+         "check": check_screen_buffered, "expected": (0, 1, 11)},
+
+        {"id": "TC2102", "description": "Nested screens join the outer",
+         "check": check_nested_screens, "expected": (0, 2, True)},
+
+        {"id": "TC2103", "description": "Each thread has its own screen",
+         "check": check_screens_per_thread, "expected": [1, 1, 1, 1]},
+
+        {"id": "TC2104", "description": "Table layout",
+         "check": check_table_layout,
+         "expected": (1, [B + "┌────┬───────┬────────┐",
+                          B + "│" + B + " ID │" + B + " Name  │" + B + " Price  " + B + "│",
+                          B + "├────┼───────┼────────┤",
+                          B + "│" + C + " 1  │" + C + " Juice │" + C + " $12.50 " + B + "│",
+                          B + "│" + C + " 12 │" + C + " Chips │" + C + " $3.00  " + B + "│",
+                          B + "└────┴───────┴────────┘",
+                          ""])},
+
+        {"id": "TC2105", "description": "Empty table writes nothing",
+         "check": check_empty_table, "expected": []}
+    ]
+
+    results = []
+    for test_case in test_cases:
+        # run_all_tests swaps ui.Ui for UiMock; these tests need the real one
+        with unittest.mock.patch("ui.Ui", Ui):
+            try:
+                result = test_case["check"]()
+            except Exception as e:
+                result = str(e)
+
+        status = "PASS" if result == test_case["expected"] else "FAIL"
+        results.append({
+            "id": test_case["id"],
+            "description": test_case["description"],
+            "status": status,
+            "expected": str(test_case["expected"]),
+            "actual": str(result)
+        })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("UI TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<35} {'Status':<8} {'Expected':<15} {'Actual':<15}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<35} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{result['expected']:<15} {result['actual']:<15}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
+# Running the tests
+if __name__ == "__main__":
+    print(Fore.CYAN + "\nXPence Functionality Testing - UI\n")
+    test_ui()
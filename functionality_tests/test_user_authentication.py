@@ -4,21 +4,37 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 import unittest.mock
 from user import User
+from database import Database
+import passwords
 from colorama import Fore
 from ui_mock import UiMock
 
 # Mock Database for testing
 class MockDatabase:
-    def fetch_one(self, query, params):
-        if params[0] == "testuser" and params[1] == "password123":
-            return [1]  # Mock user ID
-        elif params[0] == "marie" and params[1] == "whUtth3si6m4???":
-            return [2]  # Mock user ID
-        return None
+    def __init__(self):
+        # testuser still has a plaintext password from before hashing
+        self.users = {
+            "testuser": [1, "password123"],
+            "marie": [2, passwords.hash_password("whUtth3si6m4???")],
+        }
 
-    def execute_query(self, query, params):
+    def fetch_one(self, query, params, row_type=None):
+        user = self.users.get(params[0])
+        if user is None:
+            return None
+        return row_type(user[0], params[0], user[1]) if row_type else tuple(user)
+
+    def insert(self, query, params):
         # For testing registration
-        pass
+        self.users[params[0]] = [len(self.users) + 1, params[1]]
+        return len(self.users)
+
+    def execute_query(self, query, params):
+        # For testing rehashing on login
+        if query.startswith("UPDATE users"):
+            for user in self.users.values():
+                if user[0] == params[1]:
+                    user[1] = params[0]
 
 # Custom mock for input function to handle multiple calls
 class CustomInputMock:
@@ -187,20 +203,105 @@ def test_user_registration():
     print("="*80)
     return passed, total
 
+# Test password storage and transparent rehashing
+def test_password_hashing():
+    """Test that passwords are stored hashed and upgraded on login"""
+    db = Database(":memory:")
+    weak_hash = passwords.hash_password("weakpass", rounds=1000)
+    current_hash = passwords.hash_password("currentpass")
+    for username, stored in [("legacy", "legacypass"), ("weak", weak_hash), ("current", current_hash)]:
+        db.execute_query("INSERT INTO users (username, password) VALUES (?, ?)", (username, stored))
+
+    def stored_password(username):
+        return db.fetch_one("SELECT password FROM users WHERE username = ?", (username,))[0]
+
+    def register(username, password):
+        with unittest.mock.patch('builtins.input', CustomInputMock([username, password])):
+            User(db).register()
+        return stored_password(username)
+
+    def login(username, password):
+        with unittest.mock.patch('builtins.input', CustomInputMock([username, password, ""])):
+            return User(db).login()
+
+    def rehashed_on_login(username, password):
+        before = stored_password(username)
+        logged_in = login(username, password)
+        after = stored_password(username)
+        return logged_in and after != before and not passwords.needs_rehash(after)
+
+    test_cases = [
+        {"id": "TC010", "description": "Registration stores a salted hash",
+         "check": lambda: (register("alice", "secret"), register("bob", "secret")),
+         "verify": lambda hashes: (hashes[0] != hashes[1] and hashes[0].startswith(passwords.ALGORITHM + "$")
+                                   and passwords.verify_password("secret", hashes[0])),
+         "expected": True},
+        {"id": "TC011", "description": "Login with a hashed password",
+         "check": lambda: login("alice", "secret"), "expected": True},
+        {"id": "TC012", "description": "Plaintext password rehashed on login",
+         "check": lambda: rehashed_on_login("legacy", "legacypass"), "expected": True},
+        {"id": "TC013", "description": "Under-cost hash rehashed on login",
+         "check": lambda: rehashed_on_login("weak", "weakpass"), "expected": True},
+        {"id": "TC014", "description": "Current hash kept on login",
+         "check": lambda: login("current", "currentpass") and stored_password("current") == current_hash,
+         "expected": True},
+        {"id": "TC015", "description": "Wrong password leaves hash unchanged",
+         "check": lambda: login("weak", "wrong") or passwords.needs_rehash(stored_password("weak")),
+         "expected": False},
+    ]
+
+    with unittest.mock.patch('ui.Ui', UiMock):
+        results = []
+        for test_case in test_cases:
+            actual = test_case["check"]()
+            if "verify" in test_case:
+                actual = test_case["verify"](actual)
+            status = "PASS" if actual == test_case["expected"] else "FAIL"
+            results.append({
+                "id": test_case["id"],
+                "description": test_case["description"],
+                "status": status,
+                "actual": actual,
+                "expected": test_case["expected"]
+            })
+
+    # Display results in a formatted table
+    print("\n" + "="*80)
+    print("PASSWORD HASHING TEST RESULTS".center(80))
+    print("="*80)
+
+    print(f"{'ID':<8} {'Description':<40} {'Status':<8} {'Expected':<10} {'Actual':<10}")
+    print("-" * 80)
+
+    for result in results:
+        print(f"{result['id']:<8} {result['description']:<40} "
+              f"{Fore.GREEN if result['status']=='PASS' else Fore.RED}{result['status']:<8}{Fore.RESET} "
+              f"{str(result['expected']):<10} {str(result['actual']):<10}")
+
+    # Summary
+    passed = sum(1 for result in results if result['status'] == "PASS")
+    total = len(results)
+    print("\n" + "-"*80)
+    print(f"Summary: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+    print("="*80)
+    return passed, total
+
 # Running the tests
 if __name__ == "__main__":
     print(Fore.CYAN + "\nXPence Functionality Testing - User Authentication Module\n")
     auth_passed, auth_total = test_user_authentication()
     reg_passed, reg_total = test_user_registration()
+    hash_passed, hash_total = test_password_hashing()
     
     # Overall summary
-    total_passed = auth_passed + reg_passed
-    total_tests = auth_total + reg_total
+    total_passed = auth_passed + reg_passed + hash_passed
+    total_tests = auth_total + reg_total + hash_total
     
     print("\n" + "="*80)
     print("OVERALL TEST SUMMARY".center(80))
     print("="*80)
     print(f"Authentication Tests: {auth_passed}/{auth_total} passed ({auth_passed/auth_total*100:.1f}%)")
     print(f"Registration Tests: {reg_passed}/{reg_total} passed ({reg_passed/reg_total*100:.1f}%)")
+    print(f"Password Hashing Tests: {hash_passed}/{hash_total} passed ({hash_passed/hash_total*100:.1f}%)")
     print(f"Overall: {total_passed}/{total_tests} tests passed ({total_passed/total_tests*100:.1f}%)")
     print("="*80)
\ No newline at end of file
@@ -1,6 +1,8 @@
 """
 Mock UI class to prevent UI interactions during testing
 """
+from contextlib import contextmanager
+
 
 class UiMock:
     """Mock version of UI class that suppresses all UI interactions"""
@@ -52,4 +54,35 @@ class UiMock:
     @staticmethod
     def display_expense(index, name, amount):
         """Mock implementation that does nothing"""
-        pass
\ No newline at end of file
+        pass
+
+    @staticmethod
+    @contextmanager
+    def screen():
+        """Mock implementation that buffers nothing"""
+        yield
+
+    @staticmethod
+    def write(text):
+        """Mock implementation that does nothing"""
+        pass
+
+    @staticmethod
+    def display_options(options):
+        """Mock implementation that does nothing"""
+        pass
+
+    @staticmethod
+    def display_lines(lines, color=None):
+        """Mock implementation that does nothing"""
+        pass
+
+    @staticmethod
+    def display_table(headers, data):
+        """Mock implementation that does nothing"""
+        pass
+
+    @staticmethod
+    def page_navigation(page):
+        """Mock implementation that never changes page"""
+        return None
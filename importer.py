@@ -0,0 +1,306 @@
+"""
+Streaming bulk import of products and expenses from CSV or JSONL files.
+
+    stats = Importer(db, user_id).import_expenses("expenses.csv")
+    print("\\n".join(stats.summary()))
+
+Files are read one batch at a time, so memory stays flat whatever their
+size. CSV files start with a header row; JSONL files hold one object per
+line with the same keys:
+
+    products:  name, price
+    expenses:  product (a product name) or product_id, name, amount
+
+Expense files may leave out the product columns when a product_id is
+passed for every row. Rows are checked with the same rules as the menus
+(ProductService.validate and ExpenseService.validate), and products are
+looked up among the importing user's own products only.
+
+Each batch is inserted in one transaction together with a row in
+import_checkpoints recording how far into the file it got. Running the
+same import again after an interruption skips straight to the end of the
+last committed batch; the checkpoint is removed once the file is done.
+"""
+import codecs
+import csv
+import itertools
+import json
+import os
+import time
+from operator import itemgetter
+import aggregates
+import cache
+import metrics
+from services import ExpenseService, NotFoundError, ProductService, ValidationError
+
+# Rows validated and inserted per transaction
+BATCH_SIZE = 20_000
+
+# Rejected rows whose messages are kept in ImportStats.errors
+MAX_ERRORS = 20
+
+STAGES = ("read", "validate", "insert")
+
+_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+# Outcome of one import call
+class ImportStats:
+    def __init__(self, kind, source):
+        self.kind = kind
+        self.source = source
+        self.rows = 0
+        self.rejected = 0
+        self.errors = []
+        self.resumed_at = 0
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        """Human-readable lines describing the import."""
+        lines = [f"Imported {self.rows} {self.kind} from {self.source} in {self.elapsed:.2f}s "
+                 f"({self.rows_per_second:,.0f} rows/s)"]
+        if self.resumed_at:
+            lines.append(f"  resumed after row {self.resumed_at}")
+        lines.append("  " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items()))
+        if self.rejected:
+            lines.append(f"Rejected {self.rejected} rows:")
+            lines.extend(f"  Row {row}: {message}" for row, message in self.errors)
+            if self.rejected > len(self.errors):
+                lines.append(f"  ... and {self.rejected - len(self.errors)} more")
+        return lines
+
+
+def _skip_bom(stream):
+    # Excel writes UTF-8 files with a byte order mark
+    head = stream.peek(3)[:3] if hasattr(stream, "peek") else b""
+    if head == codecs.BOM_UTF8:
+        stream.read(3)
+
+
+def detect_format(path):
+    """"csv" or "jsonl" from the file extension."""
+    fmt = _FORMATS.get(os.path.splitext(str(path))[1].lower())
+    if fmt is None:
+        raise ValidationError(f"Cannot tell the format of {path}; use a .csv or .jsonl file.")
+    return fmt
+
+
+class Importer:
+    def __init__(self, db, user_id, batch_size=BATCH_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+
+    def import_products(self, source, fmt=None, skip_invalid=False, resume=True):
+        """Add the user's products from a CSV/JSONL path or binary stream."""
+        validate = ProductService.validate
+        user_id = self.user_id
+
+        def convert(fields):
+            name, price = validate(*fields)
+            return user_id, name, price.cents
+
+        return self._run("products", source, fmt, ("name", "price"), convert,
+                         "INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                         skip_invalid, resume)
+
+    def import_expenses(self, source, fmt=None, product_id=None, skip_invalid=False, resume=True):
+        """Add expenses from a CSV/JSONL path or binary stream.
+
+        Rows name their product in a product or product_id column; with
+        ``product_id`` given, rows without one go to that product.
+        """
+        validate = ExpenseService.validate
+        names, owned = {}, set()
+        for pid, name in self.db.fetch_all("SELECT id, name FROM products WHERE user_id = ? ORDER BY id DESC",
+                                           (self.user_id,)):
+            # Lowest id wins when several products share a name
+            names[name] = pid
+            owned.add(pid)
+        if product_id is not None and product_id not in owned:
+            raise NotFoundError("Product not found.")
+
+        def convert(fields):
+            product, pid, name, amount = fields
+            if product:
+                try:
+                    pid = names[product]
+                except (KeyError, TypeError):
+                    raise ValidationError(f"Unknown product {product!r}.") from None
+            elif pid not in (None, ""):
+                pid = int(pid)
+                if pid not in owned:
+                    raise ValidationError(f"Unknown product id {pid}.")
+            elif product_id is not None:
+                pid = product_id
+            else:
+                raise ValidationError("Missing product.")
+            name, amount = validate(name, amount)
+            return pid, name, amount.cents
+
+        return self._run("expenses", source, fmt, ("name", "amount"), convert,
+                         "INSERT INTO expenses (product_id, name, amount_cents) VALUES (?, ?, ?)",
+                         skip_invalid, resume, optional=("product", "product_id"))
+
+    def _run(self, kind, source, fmt, columns, convert, insert, skip_invalid, resume, optional=()):
+        start = time.perf_counter()
+        key = None
+        if isinstance(source, (str, os.PathLike)):
+            fmt = fmt or detect_format(source)
+            key = f"{kind}:{os.path.abspath(source)}"
+            stream = open(source, "rb")
+        else:
+            stream = source
+        stats = ImportStats(kind, getattr(stream, "name", source))
+        try:
+            checkpoint = self._checkpoint(key, stream, resume)
+            records, fields = self._reader(fmt, stream, checkpoint, optional + columns)
+            if checkpoint:
+                stats.resumed_at, stats.rows, stats.rejected = checkpoint[1:]
+            self._import(stats, key, stream, records, fields, convert, insert, skip_invalid, kind)
+        finally:
+            if stream is not source:
+                stream.close()
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _checkpoint(self, key, stream, resume):
+        # (byte_offset, records, rows, rejected) to carry on from, or None
+        if key is None:
+            return None
+        if not resume:
+            self.db.execute_query("DELETE FROM import_checkpoints WHERE source = ?", (key,))
+            return None
+        checkpoint = self.db.fetch_one(
+            "SELECT byte_offset, records, rows, rejected FROM import_checkpoints WHERE source = ?", (key,))
+        if checkpoint and checkpoint[0] > os.fstat(stream.fileno()).st_size:
+            raise ValidationError("The file is shorter than its import checkpoint; import it with resume=False.")
+        return checkpoint
+
+    def _reader(self, fmt, stream, checkpoint, columns):
+        # The record iterator, positioned after the checkpoint, and a function
+        # returning one record's values in ``columns`` order. Lines are read
+        # from the binary stream, so stream.tell() is where a batch ends.
+        _skip_bom(stream)
+        lines = map(bytes.decode, stream)
+        if fmt == "csv":
+            records = csv.reader(lines)
+            header = [name.strip().lower() for name in next(records, [])]
+            fields = _csv_fields(header, columns)
+        elif fmt == "jsonl":
+            records = map(str.strip, lines)
+            fields = _json_fields(columns)
+        else:
+            raise ValidationError(f"Unknown import format {fmt!r}.")
+        if checkpoint:
+            stream.seek(checkpoint[0])
+        return records, fields
+
+    def _import(self, stats, key, stream, records, fields, convert, insert, skip_invalid, kind):
+        timings = stats.timings
+        errors = stats.errors
+        number = stats.resumed_at
+        while True:
+            clock = time.perf_counter()
+            try:
+                batch = list(itertools.islice(records, self.batch_size))
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise ValidationError(f"Cannot read the file after row {number}: {e}") from None
+            if not batch:
+                break
+            offset = stream.tell() if key is not None else None
+            now = time.perf_counter()
+            timings["read"] += now - clock
+            clock = now
+
+            rows = []
+            for number, record in enumerate(batch, number + 1):
+                if not record:
+                    continue
+                try:
+                    rows.append(convert(fields(record)))
+                # ArithmeticError (OverflowError included) covers numbers no
+                # conversion anticipated, so one bad row cannot abort the run
+                except (ValidationError, ValueError, IndexError, TypeError, ArithmeticError) as e:
+                    message = _describe(e)
+                    if not skip_invalid:
+                        raise ValidationError(f"Row {number}: {message}") from None
+                    stats.rejected += 1
+                    if len(errors) < MAX_ERRORS:
+                        errors.append((number, message))
+            now = time.perf_counter()
+            timings["validate"] += now - clock
+            clock = now
+
+            # Expense batches skip the per-row totals and search triggers and
+            # update product_totals and the search index once per batch instead
+            block = aggregates.deferred_triggers(self.db) if kind == "expenses" else self.db.transaction()
+            with block:
+                self.db.executemany(insert, rows)
+                if kind == "expenses":
+                    cache.invalidate(self.db, *{("product", row[0]) for row in rows})
+                else:
+                    cache.invalidate(self.db, ("user", self.user_id))
+                if key is not None:
+                    self.db.execute_query("""
+                        INSERT OR REPLACE INTO import_checkpoints (source, byte_offset, records, rows, rejected)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (key, offset, number, stats.rows + len(rows), stats.rejected))
+            stats.rows += len(rows)
+            (metrics.EXPENSE_INSERTS if kind == "expenses" else metrics.PRODUCT_INSERTS).inc(len(rows))
+            timings["insert"] += time.perf_counter() - clock
+        if key is not None:
+            self.db.execute_query("DELETE FROM import_checkpoints WHERE source = ?", (key,))
+
+
+def _describe(error):
+    if isinstance(error, ValidationError):
+        return str(error)
+    if isinstance(error, IndexError):
+        return "Missing columns."
+    return f"Malformed row ({error})."
+
+
+def _csv_fields(header, columns):
+    # The product columns are optional, the others required
+    required = columns[-2:]
+    missing = [name for name in required if name not in header]
+    if missing:
+        raise ValidationError(f"The CSV header is missing {', '.join(missing)}.")
+    indexes = [header.index(name) if name in header else None for name in columns]
+    if None not in indexes:
+        return itemgetter(*indexes)
+    if indexes[:-2] == [None] * (len(columns) - 2):
+        # No product column: every row goes to the default product
+        pick = itemgetter(*indexes[-2:])
+        padding = (None,) * (len(columns) - 2)
+        return lambda row: padding + pick(row)
+    # A column the file lacks reads the None appended to the row
+    pick = itemgetter(*(-1 if i is None else i for i in indexes))
+    width, pad = len(header), [None]
+
+    def fields(row):
+        if len(row) < width:
+            raise IndexError(width)
+        return pick(row + pad)
+
+    return fields
+
+
+def _json_fields(columns):
+    # Product references keep their JSON type; names and amounts become text
+    optional, required = columns[:-2], columns[-2:]
+
+    def fields(line):
+        obj = json.loads(line)
+        if not isinstance(obj, dict):
+            raise ValidationError("Expected a JSON object.")
+        return (*(obj.get(name) for name in optional),
+                *("" if obj.get(name) is None else str(obj[name]) for name in required))
+
+    return fields
@@ -0,0 +1,303 @@
+"""
+Opt-in timing of every SQL statement a Database runs.
+
+    recorder = instrumentation.enable(db, slow_ms=50, slow_log="slow.log")
+    ...
+    recorder.report(sys.stderr)
+    instrumentation.disable(db)
+
+or, without touching the code, for any program that opens a Database:
+
+    XPENCE_SQL_STATS=1 XPENCE_SLOW_MS=50 XPENCE_SLOW_LOG=slow.log python main.py
+
+Each statement run through execute_query, insert, executemany, fetch_one,
+fetch_all or iter_query (and so fetch_page) is recorded with its latency,
+row count and call site: the first frame outside the data layer. Latencies
+go into a log-scale histogram per normalized query (literals and IN lists
+folded into "?"), from which the summary reports p50/p95/p99. Statements
+slower than ``slow_ms`` are appended to the slow-query log together with
+their EXPLAIN QUERY PLAN. With XPENCE_SQL_STATS set the summary is written
+when the process exits, to stderr or XPENCE_SQL_REPORT.
+
+enable() replaces those methods on the one Database instance with timed
+wrappers; the class itself is never changed, so a Database that is not
+instrumented runs exactly the code it always did.
+"""
+import atexit
+import bisect
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from database import Database
+
+SLOW_MS = 100.0
+
+# Histogram bucket bounds in seconds: 1 µs to ~100 s, each 10% above the
+# last, so percentiles are within 10% of the exact value
+_BOUNDS = []
+_bound = 1e-6
+while _bound < 100:
+    _BOUNDS.append(_bound)
+    _bound *= 1.1
+
+# Frames in these files are the data layer, not the call site
+_INTERNAL = {__file__, sys.modules[Database.__module__].__file__, sys.modules["contextlib"].__file__}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_normalized = {}
+
+
+def normalize(query):
+    """The query with whitespace collapsed and literals replaced by "?"."""
+    text = _normalized.get(query)
+    if text is None:
+        text = _SPACE.sub(" ", query).strip()
+        text = _NUMBER.sub("?", _STRING.sub("?", text))
+        text = _IN_LIST.sub("(?, ...)", text)
+        if len(_normalized) < 4096:
+            _normalized[query] = text
+    return text
+
+
+_sites = {}
+
+
+def call_site():
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename in _INTERNAL:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    key = (frame.f_code, frame.f_lineno)
+    site = _sites.get(key)
+    if site is None:
+        code = frame.f_code
+        site = _sites[key] = f"{os.path.basename(code.co_filename)}:{frame.f_lineno} ({code.co_name})"
+    return site
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_BOUNDS[index] if index < len(_BOUNDS) else self.max, self.max)
+        return self.max
+
+
+# Everything recorded for one normalized query
+class QueryStats:
+    def __init__(self, query):
+        self.query = query
+        self.latency = Histogram()
+        self.rows = 0
+        self.sites = {}
+
+    def as_dict(self):
+        return {
+            "query": self.query,
+            "calls": self.latency.count,
+            "total_ms": self.latency.total * 1000,
+            "p50_ms": self.latency.percentile(0.50) * 1000,
+            "p95_ms": self.latency.percentile(0.95) * 1000,
+            "p99_ms": self.latency.percentile(0.99) * 1000,
+            "max_ms": self.latency.max * 1000,
+            "rows": self.rows,
+            "sites": dict(self.sites),
+        }
+
+
+class Recorder:
+    def __init__(self, slow_ms=SLOW_MS, slow_log=None):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.queries = {}
+        self.slow = 0
+        self._lock = threading.Lock()
+
+    def record(self, db, query, params, seconds, rows, site):
+        key = normalize(query)
+        with self._lock:
+            stats = self.queries.get(key)
+            if stats is None:
+                stats = self.queries[key] = QueryStats(key)
+            stats.latency.add(seconds)
+            stats.rows += rows
+            stats.sites[site] = stats.sites.get(site, 0) + 1
+        if seconds * 1000 >= self.slow_ms:
+            self.log_slow(db, query, params, seconds, rows, site)
+
+    def log_slow(self, db, query, params, seconds, rows, site):
+        with self._lock:
+            self.slow += 1
+        if self.slow_log is None:
+            return
+        if isinstance(params, (tuple, list, dict)):
+            try:
+                # The unwrapped method, so the EXPLAIN is not recorded itself
+                plan = Database.fetch_all(db, f"EXPLAIN QUERY PLAN {query}", params)
+                plan = "\n".join(f"    {detail}" for _, _, _, detail in plan) or "    (no plan)"
+            except sqlite3.Error as e:
+                plan = f"    (no plan: {e})"
+        else:
+            plan = "    (executemany: no plan)"
+            params = "..."
+        entry = (f"{time.strftime('%Y-%m-%d %H:%M:%S')} {seconds * 1000:.1f} ms, {rows} rows, {site}\n"
+                 f"  {_SPACE.sub(' ', query).strip()}\n  params: {params!r}\n{plan}\n")
+        with self._lock:
+            if isinstance(self.slow_log, (str, os.PathLike)):
+                with open(self.slow_log, "a", encoding="utf-8") as f:
+                    f.write(entry)
+            else:
+                self.slow_log.write(entry)
+
+    def summary(self):
+        """Per-query statistics, slowest total time first."""
+        with self._lock:
+            return sorted((stats.as_dict() for stats in self.queries.values()), key=lambda s: -s["total_ms"])
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+            self.slow = 0
+
+    def report(self, stream=None, limit=20):
+        stream = stream or sys.stderr
+        rows = self.summary()
+        if not rows:
+            return
+        total = sum(row["total_ms"] for row in rows)
+        calls = sum(row["calls"] for row in rows)
+        lines = ["=" * 80, f"SQL STATEMENTS ({calls} calls, {total:.1f} ms, {self.slow} slow)".center(80), "=" * 80,
+                 f"{'Calls':>7} {'Total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Max ms':>8} "
+                 f"{'Rows':>9}", "-" * 80]
+        for row in rows[:limit]:
+            lines.append(f"{row['calls']:>7} {row['total_ms']:>10.2f} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} "
+                         f"{row['p99_ms']:>8.3f} {row['max_ms']:>8.3f} {row['rows']:>9}")
+            lines.append(f"  {row['query'][:150]}")
+            for site, count in sorted(row["sites"].items(), key=lambda item: -item[1])[:3]:
+                lines.append(f"    {count:>6} x {site}")
+        lines.append("-" * 80)
+        lines.append("Percentiles are bucket upper bounds, within 10% of the exact latency.")
+        stream.write("\n".join(lines) + "\n")
+
+
+def _timed(recorder, db, method, rows_of):
+    needs_site = getattr(recorder, "needs_site", True)
+
+    def wrapper(query, *args, **kwargs):
+        site = call_site() if needs_site else None
+        start = time.perf_counter()
+        result = method(query, *args, **kwargs)
+        recorder.record(db, query, args[0] if args else kwargs.get("params", kwargs.get("seq_of_params", ())),
+                        time.perf_counter() - start, rows_of(result), site)
+        return result
+    return wrapper
+
+
+def _timed_iter(recorder, db, method):
+    # Only the time spent producing rows counts, not the caller's work
+    # between them
+    needs_site = getattr(recorder, "needs_site", True)
+
+    def wrapper(query, params=(), *args, **kwargs):
+        site = call_site() if needs_site else None
+        rows = method(query, params, *args, **kwargs)
+        elapsed = 0.0
+        count = 0
+        clock = time.perf_counter
+        try:
+            while True:
+                start = clock()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    elapsed += clock() - start
+                    break
+                elapsed += clock() - start
+                count += 1
+                yield row
+        finally:
+            rows.close()
+            recorder.record(db, query, params, elapsed, count, site)
+    return wrapper
+
+
+_ROWS = {
+    "execute_query": lambda rowcount: max(rowcount, 0),
+    "insert": lambda row_id: 1,
+    "executemany": lambda rowcount: max(rowcount, 0),
+    "fetch_one": lambda row: 0 if row is None else 1,
+    "fetch_all": len,
+}
+
+
+def enable(db, recorder=None, slow_ms=SLOW_MS, slow_log=None):
+    """Start recording the statements of ``db``; returns the Recorder.
+
+    Any object with Recorder.record's signature can stand in for the
+    Recorder; one with ``needs_site = False`` is passed None as the call
+    site, which saves walking the stack.
+    """
+    disable(db)
+    recorder = recorder or Recorder(slow_ms, slow_log)
+    for name, rows_of in _ROWS.items():
+        setattr(db, name, _timed(recorder, db, getattr(Database, name).__get__(db), rows_of))
+    db.iter_query = _timed_iter(recorder, db, Database.iter_query.__get__(db))
+    db.recorder = recorder
+    return recorder
+
+
+def disable(db):
+    """Stop recording; ``db`` goes back to the plain Database methods."""
+    for name in (*_ROWS, "iter_query", "recorder"):
+        db.__dict__.pop(name, None)
+
+
+_process_recorder = None
+
+
+def from_environment(db):
+    """Instrument ``db`` when XPENCE_SQL_STATS is set. All databases of the
+    process share one recorder, reported at exit."""
+    global _process_recorder
+    if not os.environ.get("XPENCE_SQL_STATS"):
+        return None
+    if _process_recorder is None:
+        _process_recorder = Recorder(float(os.environ.get("XPENCE_SLOW_MS", SLOW_MS)),
+                                     os.environ.get("XPENCE_SLOW_LOG"))
+        atexit.register(_report_at_exit, _process_recorder, os.environ.get("XPENCE_SQL_REPORT"))
+    return enable(db, _process_recorder)
+
+
+def _report_at_exit(recorder, path):
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            recorder.report(f, limit=100)
+    else:
+        recorder.report(sys.stderr)
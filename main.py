@@ -1,15 +1,26 @@
+import sys
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Arguments select a one-shot command; hand off before the menus and
+    # their dependencies are imported, so commands start as fast as cli.py
+    from cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
 from ui import Ui
 from user import User
 from product import Product
 from expense import Expense
 from database import Database
+import cache
+import passwords
 from colorama import Fore
 
 # Main Menu
 def main_menu(user):
     while True:
-        Ui.display_header("Main Menu")
-        Ui.display_options(["View Products", "Add Product", "Remove Product", "Manage Expenses", "Logout"])
+        with Ui.screen():
+            Ui.display_header("Main Menu")
+            Ui.display_options(["View Products", "Add Product", "Remove Product", "Manage Expenses", "Product Dashboard", "Search", "Logout"])
         choice = input(Fore.BLUE + "Enter your choice: ")
 
         product_manager = Product(user.db, user.id)
@@ -33,12 +44,18 @@ def main_menu(user):
                 product_choice = int(input(Fore.BLUE + "Select a product to manage expenses (number): ")) - 1
                 if 0 <= product_choice < len(products):
                     product_id = products[product_choice][0]
-                    Expense.manage_expenses(user.db, product_id)
+                    Expense.manage_expenses(user.db, user.id, product_id)
                 else:
                     Ui.display_error("Invalid choice.")
             except ValueError:
                 Ui.display_error("Invalid input.")
         elif choice == "5":
+            product_manager.view_dashboard()
+            input(Fore.YELLOW + "Press Enter to continue...")
+        elif choice == "6":
+            product_manager.search()
+            input(Fore.YELLOW + "Press Enter to continue...")
+        elif choice == "7":
             Ui.display_box("Logging out...", Fore.YELLOW)
             break
 
@@ -49,10 +66,15 @@ def main_menu(user):
 # Program Entry Point
 def main():
     db = Database()
+    # Product lists and reports are read again on every menu loop
+    cache.enable(db)
+    # Pick the password hashing cost for this host before the first login
+    passwords.calibrate()
 
     while True:
-        Ui.display_header("Xpence - Small Business Expense Tracker")
-        Ui.display_options(["Register", "Login", "Exit"])
+        with Ui.screen():
+            Ui.display_header("Xpence - Small Business Expense Tracker")
+            Ui.display_options(["Register", "Login", "Exit"])
         user_choice = input(Fore.BLUE + "Enter your choice: ")
 
         user = User(db)
@@ -0,0 +1,375 @@
+"""
+Prometheus-style metrics for registrations, logins, product and expense
+changes, reports and database statements.
+
+    XPENCE_METRICS_PORT=9464 python main.py          # scrape http://127.0.0.1:9464/metrics
+    XPENCE_METRICS_FILE=xpence.prom python cli.py --user alice report
+    python server.py                                 # GET /metrics next to the API
+
+The services update the counters in REGISTRY as they work. A Database is
+added with track_database(), which times its statements into
+xpence_db_statement_seconds and reports the file size, WAL size and row
+counts as gauges, read when the registry is collected. Both environment
+variables do that for every Database the process opens: the port serves
+the registry over HTTP, the file gets the registry written to it when the
+process exits (atomically, for node_exporter's textfile collector).
+
+Counters and histograms keep one cell per thread and sum the cells when
+collected, so an update never waits on a lock; collection is the only
+place the threads' values meet.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, fine enough for sub-millisecond statements
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+# Values that only the owning thread writes; read by summing every thread's cell
+class _Cells:
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()
+
+    def mine(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0] * self.size
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+
+    def totals(self):
+        with self._lock:
+            cells = list(self._cells)
+        return [sum(values) for values in zip(*cells)] if cells else [0] * self.size
+
+
+class _CounterChild:
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount=1):
+        self._cells.mine()[0] += amount
+
+    def value(self):
+        return self._cells.totals()[0]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One count per bucket, one for +Inf, then the sum
+        self._cells = _Cells(len(buckets) + 2)
+
+    def observe(self, value):
+        cell = self._cells.mine()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self):
+        """(cumulative bucket counts including +Inf, count, sum)."""
+        totals = self._cells.totals()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **named):
+        """The child for one combination of label values."""
+        key = tuple(str(v) for v in values) if values else tuple(str(named[n]) for n in self.labelnames)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def children(self):
+        with self._lock:
+            return [(tuple(zip(self.labelnames, key)), child) for key, child in self._children.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def value(self):
+        return self._default.value()
+
+    def samples(self):
+        for labels, child in self.children():
+            yield self.name, labels, child.value()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self):
+        for labels, child in self.children():
+            cumulative, count, total = child.snapshot()
+            for bound, value in zip((*self.buckets, float("inf")), cumulative):
+                yield f"{self.name}_bucket", labels + (("le", _format_value(float(bound))),), value
+            yield f"{self.name}_count", labels, count
+            yield f"{self.name}_sum", labels, total
+
+
+class Gauge(_Metric):
+    """A value read when the registry is collected. ``function`` returns a
+    number, or (label values, number) pairs for a labelled gauge."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        self.functions = {}
+        super().__init__(name, documentation, labelnames)
+        if function is not None:
+            self.set_function(function)
+
+    def _new_child(self):
+        return None
+
+    def set_function(self, function, key=None):
+        # Several sources (e.g. one per database) can feed the same gauge
+        with self._lock:
+            self.functions[key] = function
+
+    def samples(self):
+        with self._lock:
+            functions = list(self.functions.values())
+        for function in functions:
+            try:
+                result = function()
+            except Exception:
+                continue  # A closed database or a missing file; skip it
+            if not self.labelnames:
+                yield self.name, (), result
+                continue
+            for values, value in result:
+                yield self.name, tuple(zip(self.labelnames, values)), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, documentation, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames=labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames=labelnames, buckets=buckets)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get(Gauge, name, documentation, labelnames=labelnames)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def exposition(self):
+        """Every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Write the exposition to ``path`` atomically."""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.exposition())
+        os.replace(temporary, path)
+
+
+REGISTRY = Registry()
+
+REGISTRATIONS = REGISTRY.counter("xpence_registrations_total", "Users registered.")
+LOGINS = REGISTRY.counter("xpence_logins_total", "Login attempts by result.", ["result"])
+PRODUCT_INSERTS = REGISTRY.counter("xpence_product_inserts_total", "Products added.")
+PRODUCT_DELETES = REGISTRY.counter("xpence_product_deletes_total", "Products removed.")
+EXPENSE_INSERTS = REGISTRY.counter("xpence_expense_inserts_total", "Expenses added, including bulk imports.")
+EXPENSE_DELETES = REGISTRY.counter("xpence_expense_deletes_total",
+                                   "Expenses removed one by one (not with their product).")
+REPORTS = REGISTRY.histogram("xpence_report_seconds", "Report computations by kind.", ["kind"])
+SEARCHES = REGISTRY.histogram("xpence_search_seconds", "Product and expense name searches.")
+STATEMENTS = REGISTRY.histogram("xpence_db_statement_seconds", "Database statement latency by operation.",
+                                ["operation"])
+DB_FILE_BYTES = REGISTRY.gauge("xpence_db_file_bytes", "Size of the database file.", ["database"])
+DB_WAL_BYTES = REGISTRY.gauge("xpence_db_wal_bytes", "Size of the write-ahead log.", ["database"])
+DB_ROWS = REGISTRY.gauge("xpence_db_rows", "Rows per table.", ["database", "table"])
+
+
+# Feeds statement latencies into a histogram; plugs into instrumentation
+class StatementMetrics:
+    def __init__(self, histogram=STATEMENTS, inner=None):
+        self.histogram = histogram
+        # A Recorder already attached to the database keeps receiving statements
+        self.inner = inner
+        self.needs_site = inner is not None
+        self._children = {}
+
+    def record(self, db, query, params, seconds, rows, site):
+        operation = query.lstrip()[:6].upper()
+        child = self._children.get(operation)
+        if child is None:
+            label = operation if operation in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+            child = self._children[operation] = self.histogram.labels(label)
+        child.observe(seconds)
+        if self.inner is not None:
+            self.inner.record(db, query, params, seconds, rows, site)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def track_database(db, registry=REGISTRY):
+    """Time the statements of ``db`` and report its size and row counts."""
+    import instrumentation
+    if not isinstance(db.recorder, StatementMetrics):
+        instrumentation.enable(db, StatementMetrics(registry.get("xpence_db_statement_seconds") or STATEMENTS,
+                                                    inner=db.recorder))
+    path = db.path
+
+    def rows():
+        # The expense count comes from product_totals, so a scrape never
+        # scans the expenses table
+        from database import Database
+        users, products, expenses = Database.fetch_one(db, """
+            SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM products),
+                   (SELECT COALESCE(SUM(expense_count), 0) FROM product_totals)
+        """)
+        return [((path, "users"), users), ((path, "products"), products), ((path, "expenses"), expenses)]
+
+    registry.get("xpence_db_file_bytes").set_function(lambda: [((path,), _file_size(path))], key=path)
+    registry.get("xpence_db_wal_bytes").set_function(lambda: [((path,), _file_size(path + "-wal"))], key=path)
+    registry.get("xpence_db_rows").set_function(rows, key=path)
+
+
+def serve(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve GET /metrics from a daemon thread; returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+_exporting = False
+
+
+def from_environment(db):
+    """Track ``db`` and start the XPENCE_METRICS_PORT endpoint and the
+    XPENCE_METRICS_FILE dump, once per process."""
+    global _exporting
+    track_database(db)
+    if _exporting:
+        return
+    _exporting = True
+    if os.environ.get("XPENCE_METRICS_PORT"):
+        serve(int(os.environ["XPENCE_METRICS_PORT"]), os.environ.get("XPENCE_METRICS_HOST", "127.0.0.1"))
+    if os.environ.get("XPENCE_METRICS_FILE"):
+        import atexit
+        atexit.register(REGISTRY.write_file, os.environ["XPENCE_METRICS_FILE"])
@@ -0,0 +1,367 @@
+"""
+Versioned schema migrations.
+
+The schema version lives in ``PRAGMA user_version``. Each entry in
+MIGRATIONS upgrades the database from ``version - 1`` to ``version``.
+A migration either runs inside one transaction together with the
+version bump, or, for tables that can hold millions of rows, rebuilds
+the table in batches so no single transaction holds the write lock for
+long (see rebuild_table).
+"""
+
+import aggregates
+import search
+
+DEFAULT_BATCH_SIZE = 50_000
+
+
+# A numbered schema change
+class Migration:
+    def __init__(self, version, description, statements=(), apply=None):
+        self.version = version
+        self.description = description
+        self.statements = statements
+        self.apply = apply
+
+    def run(self, db, batch_size):
+        if self.apply is not None:
+            # Batched migrations manage their own transactions and set the
+            # version in their final one
+            self.apply(db, self.version, batch_size)
+            return
+        with db.transaction():
+            for statement in self.statements:
+                db.execute_query(statement)
+            set_version(db, self.version)
+
+
+def get_version(db):
+    return db.fetch_one("PRAGMA user_version")[0]
+
+
+def set_version(db, version):
+    # PRAGMA arguments cannot be bound as parameters
+    db.execute_query(f"PRAGMA user_version = {int(version)}")
+
+
+def latest_version():
+    return MIGRATIONS[-1].version
+
+
+def pending(db):
+    current = get_version(db)
+    return [migration for migration in MIGRATIONS if migration.version > current]
+
+
+def migrate(db, batch_size=DEFAULT_BATCH_SIZE):
+    """Apply every pending migration in order; returns the versions applied."""
+    applied = []
+    for migration in pending(db):
+        migration.run(db, batch_size)
+        applied.append(migration.version)
+    return applied
+
+
+def rebuild_table(db, table, create_sql, indexes, columns, select_exprs=None,
+                  version=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Rewrite ``table`` into a new schema without one long write transaction.
+
+    ``create_sql`` is the new CREATE TABLE statement using the placeholder
+    ``{table}`` for the table name, ``indexes`` maps index names to their
+    column lists, ``columns`` names the columns of the new table to fill and
+    ``select_exprs`` the matching expressions over the old rows (defaults to
+    the same column names).
+
+    Rows are copied into an empty new table in id order, ``batch_size`` rows
+    per transaction, while the old table keeps serving reads and writes with
+    its indexes. The new table carries its indexes from the start under
+    temporary names, so they grow with the copy. Triggers log the ids of
+    rows deleted or updated meanwhile, and an interrupted rebuild resumes
+    from the last copied id. The final swap is a single transaction: it
+    copies the rows added since, copies the logged rows again (or leaves
+    them out if they are gone), replaces the old table, gives the new
+    indexes their names, recreates the table's triggers and bumps the
+    schema version.
+    """
+    new_table, changes = f"{table}__new", f"{table}__changes"
+    select_exprs = select_exprs or columns
+    column_list = ", ".join(columns)
+    select_list = ", ".join(select_exprs)
+
+    with db.transaction():
+        if not db.fetch_one("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (new_table,)):
+            db.execute_query(create_sql.format(table=new_table))
+        # Index names are global; the old table holds the real ones until the swap
+        for index_name, index_columns in indexes.items():
+            db.execute_query(f"CREATE INDEX IF NOT EXISTS {index_name}__new ON {new_table} ({index_columns})")
+        db.execute_query(f"CREATE TABLE IF NOT EXISTS {changes} (id INTEGER PRIMARY KEY)")
+        for name, body in _CHANGE_LOG_TRIGGERS.items():
+            db.execute_query(f"CREATE TRIGGER IF NOT EXISTS {name} {body}".format(table=table, changes=changes))
+
+    copy_sql = (
+        f"INSERT INTO {new_table} ({column_list}) "
+        f"SELECT {select_list} FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+    )
+    last_id = db.fetch_one(f"SELECT COALESCE(MAX(id), 0) FROM {new_table}")[0]
+    while True:
+        with db.transaction():
+            copied = db.execute_query(copy_sql, (last_id, batch_size))
+        if copied < batch_size:
+            break
+        last_id = db.fetch_one(f"SELECT MAX(id) FROM {new_table}")[0]
+
+    with db.transaction():
+        last_id = db.fetch_one(f"SELECT COALESCE(MAX(id), 0) FROM {new_table}")[0]
+        db.execute_query(copy_sql, (last_id, -1))
+        # Rows changed after they were copied: take them again as they are now
+        db.execute_query(f"DELETE FROM {new_table} WHERE id IN (SELECT id FROM {changes})")
+        db.execute_query(f"INSERT INTO {new_table} ({column_list}) "
+                         f"SELECT {select_list} FROM {table} WHERE id IN (SELECT id FROM {changes})")
+        for name in _CHANGE_LOG_TRIGGERS:
+            db.execute_query(f"DROP TRIGGER {name.format(table=table)}")
+        db.execute_query(f"DROP TABLE {changes}")
+        # Triggers go away with the old table; recreate them on the new one.
+        # So does its AUTOINCREMENT counter, which may be past the last row
+        triggers = db.fetch_all("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,))
+        sequence = db.fetch_one("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        db.execute_query(f"DROP TABLE {table}")
+        # Triggers on other tables may read this one (the search triggers on
+        # products read expenses); the legacy rename leaves them as they are
+        # instead of failing on the table missing for a moment
+        db.execute_query("PRAGMA legacy_alter_table = ON")
+        try:
+            db.execute_query(f"ALTER TABLE {new_table} RENAME TO {table}")
+        finally:
+            db.execute_query("PRAGMA legacy_alter_table = OFF")
+        if sequence is not None:
+            if not db.execute_query("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                                    (sequence[0], table)):
+                db.execute_query("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, sequence[0]))
+        # The old indexes served reads until now and took their names with
+        # them. SQLite has no ALTER INDEX ... RENAME, so the built indexes
+        # are renamed in the schema table instead of being built again
+        db.execute_query("PRAGMA writable_schema = ON")
+        try:
+            for index_name, index_columns in indexes.items():
+                db.execute_query("UPDATE sqlite_master SET name = ?, sql = ? WHERE type = 'index' AND name = ?",
+                                 (index_name, f"CREATE INDEX {index_name} ON {table} ({index_columns})",
+                                  f"{index_name}__new"))
+        finally:
+            db.execute_query("PRAGMA writable_schema = RESET")
+        for (trigger_sql,) in triggers:
+            db.execute_query(trigger_sql)
+        if version is not None:
+            set_version(db, version)
+
+
+# Log the ids of rows deleted or updated in a table while rebuild_table
+# copies it; the swap copies those rows again
+_CHANGE_LOG_TRIGGERS = {
+    "trg_{table}_rebuild_delete": """
+    AFTER DELETE ON {table}
+    BEGIN
+        INSERT OR IGNORE INTO {changes} (id) VALUES (OLD.id);
+    END
+    """,
+    "trg_{table}_rebuild_update": """
+    AFTER UPDATE ON {table}
+    BEGIN
+        INSERT OR IGNORE INTO {changes} (id) VALUES (OLD.id), (NEW.id);
+    END
+    """,
+}
+
+
+def has_column(db, table, column):
+    return any(row[1] == column for row in db.fetch_all(f"PRAGMA table_info({table})"))
+
+
+def index_columns(db, index):
+    return [row[2] for row in db.fetch_all(f"PRAGMA index_info({index})")]
+
+
+_PRODUCTS_TABLE = """
+    CREATE TABLE {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        price_cents INTEGER NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+"""
+
+_EXPENSES_TABLE = """
+    CREATE TABLE {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        amount_cents INTEGER NOT NULL,
+        FOREIGN KEY (product_id) REFERENCES products (id)
+    )
+"""
+
+
+# Round to the cent first so 1.005 becomes 101 cents, as Money.parse would
+_REAL_TO_CENTS = "CAST(ROUND(ROUND({column}, 2) * 100) AS INTEGER)"
+
+
+def _store_money_as_cents(db, version, batch_size):
+    # Each table is swapped on its own; skipping already converted tables
+    # lets an interrupted run pick up where it stopped
+    if not has_column(db, "products", "price_cents"):
+        rebuild_table(
+            db, "products", _PRODUCTS_TABLE,
+            indexes={"idx_products_user": "user_id, name, price_cents"},
+            columns=["id", "user_id", "name", "price_cents"],
+            select_exprs=["id", "user_id", "name", _REAL_TO_CENTS.format(column="price")],
+            batch_size=batch_size,
+        )
+    if not has_column(db, "expenses", "amount_cents"):
+        rebuild_table(
+            db, "expenses", _EXPENSES_TABLE,
+            indexes={"idx_expenses_product": "product_id, name, amount_cents"},
+            columns=["id", "product_id", "name", "amount_cents"],
+            select_exprs=["id", "product_id", "name", _REAL_TO_CENTS.format(column="amount")],
+            batch_size=batch_size,
+        )
+    with db.transaction():
+        set_version(db, version)
+
+
+def _add_product_totals(db, version, batch_size):
+    with db.transaction():
+        for statement in _PRODUCT_TOTALS_SCHEMA:
+            db.execute_query(statement)
+    # The triggers keep already backfilled ranges current while the
+    # remaining ranges are computed
+    aggregates.rebuild(db)
+    with db.transaction():
+        set_version(db, version)
+
+
+_PRODUCT_TOTALS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS product_totals (
+        product_id INTEGER PRIMARY KEY,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        expense_total_cents INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_insert AFTER INSERT ON expenses
+    BEGIN
+        INSERT INTO product_totals (product_id, expense_count, expense_total_cents)
+        VALUES (NEW.product_id, 1, NEW.amount_cents)
+        ON CONFLICT (product_id) DO UPDATE SET
+            expense_count = expense_count + 1,
+            expense_total_cents = expense_total_cents + excluded.expense_total_cents;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_delete AFTER DELETE ON expenses
+    BEGIN
+        UPDATE product_totals SET
+            expense_count = expense_count - 1,
+            expense_total_cents = expense_total_cents - OLD.amount_cents
+        WHERE product_id = OLD.product_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_update AFTER UPDATE OF product_id, amount_cents ON expenses
+    BEGIN
+        UPDATE product_totals SET
+            expense_count = expense_count - 1,
+            expense_total_cents = expense_total_cents - OLD.amount_cents
+        WHERE product_id = OLD.product_id;
+        INSERT INTO product_totals (product_id, expense_count, expense_total_cents)
+        VALUES (NEW.product_id, 1, NEW.amount_cents)
+        ON CONFLICT (product_id) DO UPDATE SET
+            expense_count = expense_count + 1,
+            expense_total_cents = expense_total_cents + excluded.expense_total_cents;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_totals_delete AFTER DELETE ON products
+    BEGIN
+        DELETE FROM product_totals WHERE product_id = OLD.id;
+    END
+    """,
+]
+
+
+def _add_keyset_indexes(db, version, batch_size):
+    # Putting id right after the lookup column lets "WHERE user_id = ? AND
+    # id > ? ORDER BY id" seek straight to a page instead of sorting every row
+    # of the user. Only the indexes change, so each is replaced in place: one
+    # transaction per table drops it and builds it again from the table, and
+    # readers keep the old index until that commits.
+    for table, index, columns in [
+        ("products", "idx_products_user", "user_id, id, name, price_cents"),
+        ("expenses", "idx_expenses_product", "product_id, id, name, amount_cents"),
+    ]:
+        if index_columns(db, index) != columns.split(", "):
+            with db.transaction():
+                db.execute_query(f"DROP INDEX IF EXISTS {index}")
+                db.execute_query(f"CREATE INDEX {index} ON {table} ({columns})")
+    with db.transaction():
+        set_version(db, version)
+
+
+def _add_search_index(db, version, batch_size):
+    # Without FTS5 there is nothing to build; search falls back to LIKE scans
+    if search.available(db):
+        search.build(db, batch_size)
+    with db.transaction():
+        set_version(db, version)
+
+
+MIGRATIONS = [
+    Migration(1, "Initial schema with covering lookup indexes", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            price REAL NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            amount REAL NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        """,
+        # Covering indexes for the per-user product list and per-product
+        # expense lookups; users.username is served by its UNIQUE index
+        "CREATE INDEX IF NOT EXISTS idx_products_user ON products (user_id, name, price)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_product ON expenses (product_id, name, amount)",
+    ]),
+    Migration(2, "Store prices and expense amounts as integer cents", apply=_store_money_as_cents),
+    Migration(3, "Trigger-maintained expense totals per product", apply=_add_product_totals),
+    Migration(4, "Keyset pagination order in the lookup indexes", apply=_add_keyset_indexes),
+    Migration(5, "Resume points for bulk imports", [
+        # One row per import in progress, updated in the same transaction as
+        # each batch it covers (see importer.py)
+        """
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY,
+            byte_offset INTEGER NOT NULL,
+            records INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            rejected INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    Migration(6, "Full-text search index of product and expense names", apply=_add_search_index),
+]
@@ -0,0 +1,88 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Largest amount in cents SQLite can store (a signed 64-bit integer)
+MAX_CENTS = 2**63 - 1
+
+
+# Fixed-point amount stored as a whole number of cents
+class Money:
+    __slots__ = ("cents",)
+
+    def __init__(self, cents=0):
+        self.cents = int(cents)
+
+    @classmethod
+    def parse(cls, text):
+        """Parse user input such as "12", "12.5" or "1,299.99" into Money.
+
+        Raises ValueError for anything that is not a finite number or does
+        not fit in MAX_CENTS; amounts with more than two decimals are rounded
+        half up to the cent.
+        """
+        text = str(text).strip()
+        if "," in text:
+            text = text.replace(",", "")
+        # Fast path for plain "123" / "123.4" / "123.45", the bulk of imported
+        # rows; everything else goes through Decimal
+        whole, _, fraction = text.partition(".")
+        if whole.isdigit() and whole.isascii() and len(fraction) <= 2 and (not fraction or fraction.isdigit()):
+            cents = int(whole) * 100 + int(fraction.ljust(2, "0"))
+        else:
+            try:
+                value = Decimal(text)
+                if not value.is_finite():
+                    raise ValueError(f"Invalid amount: {text!r}")
+                # Exponents such as "1e30" leave more digits than the context
+                # holds, and quantize raises InvalidOperation
+                cents = int(value.scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+            except InvalidOperation:
+                raise ValueError(f"Invalid amount: {text!r}") from None
+        if not -MAX_CENTS <= cents <= MAX_CENTS:
+            raise ValueError(f"Invalid amount: {text!r}")
+        return cls(cents)
+
+    def __add__(self, other):
+        return Money(self.cents + other.cents)
+
+    def __sub__(self, other):
+        return Money(self.cents - other.cents)
+
+    def __mul__(self, quantity):
+        return Money(self.cents * quantity)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        return NotImplemented
+
+    def __lt__(self, other):
+        return self.cents < other.cents
+
+    def __le__(self, other):
+        return self.cents <= other.cents
+
+    def __gt__(self, other):
+        return self.cents > other.cents
+
+    def __ge__(self, other):
+        return self.cents >= other.cents
+
+    def __hash__(self):
+        return hash(self.cents)
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __repr__(self):
+        return f"Money({self.cents})"
+
+    def __str__(self):
+        # Same layout the screens used for floats: "$12.50", "$-3.00"
+        sign = "-" if self.cents < 0 else ""
+        dollars, cents = divmod(abs(self.cents), 100)
+        return f"${sign}{dollars}.{cents:02d}"
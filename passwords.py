@@ -0,0 +1,104 @@
+"""
+Salted PBKDF2-SHA256 password hashes.
+
+Hashes are stored as ``pbkdf2_sha256$<iterations>$<salt>$<hash>`` with the
+salt and hash base64 encoded, so every hash carries its own work factor.
+The iteration count for new hashes is calibrated once per process so that
+one verification takes about TARGET_SECONDS on this host; logins rehash
+stored passwords that are plaintext (from before hashing) or well below
+the current cost.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import time
+
+ALGORITHM = "pbkdf2_sha256"
+TARGET_SECONDS = 0.1
+# Never go below this, however slow the host is
+MIN_ITERATIONS = 100_000
+# Hashes within this fraction of the current cost are kept, so calibration
+# noise between runs does not rehash on every login
+REHASH_RATIO = 0.8
+SALT_BYTES = 16
+
+_CALIBRATION_ITERATIONS = 20_000
+_iterations = None
+
+
+def calibrate(target_seconds=TARGET_SECONDS):
+    """Time a short PBKDF2 run and set the iteration count that takes
+    ``target_seconds``; returns the new count."""
+    global _iterations
+    salt = os.urandom(SALT_BYTES)
+    # Best of a few runs, so a busy moment does not lower the cost
+    elapsed = min(_time_pbkdf2(salt, _CALIBRATION_ITERATIONS) for _ in range(3))
+    iterations = int(_CALIBRATION_ITERATIONS * target_seconds / max(elapsed, 1e-9))
+    # Round to a thousand so hashes made in one run share a cost
+    _iterations = max(MIN_ITERATIONS, iterations // 1000 * 1000)
+    return _iterations
+
+
+def _time_pbkdf2(salt, iterations):
+    start = time.perf_counter()
+    hashlib.pbkdf2_hmac("sha256", b"calibration", salt, iterations)
+    return time.perf_counter() - start
+
+
+def iterations():
+    """Iteration count used for new hashes, calibrated on first use."""
+    if _iterations is None:
+        calibrate()
+    return _iterations
+
+
+def hash_password(password, rounds=None):
+    rounds = rounds or iterations()
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, rounds)
+    return "$".join([ALGORITHM, str(rounds), _b64(salt), _b64(digest)])
+
+
+def verify_password(password, stored):
+    """Check ``password`` against a stored hash (or a legacy plaintext
+    password) in constant time."""
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), stored.encode())
+    rounds, salt, digest = parsed
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, rounds, len(digest))
+    return hmac.compare_digest(candidate, digest)
+
+
+def needs_rehash(stored):
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] < iterations() * REHASH_RATIO
+
+
+def _parse(stored):
+    # (iterations, salt, digest) for our format, None for anything else
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != ALGORITHM or not parts[1].isdigit():
+        return None
+    try:
+        return int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+    except ValueError:
+        return None
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+_dummy_hash = None
+
+
+def dummy_verify(password):
+    """Spend the same time as a real verification, so unknown usernames
+    cannot be told apart from wrong passwords by timing."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password("")
+    verify_password(password, _dummy_hash)
+    return False
@@ -1,14 +1,17 @@
 from ui import Ui
+from money import Money
+from services import DASHBOARD_SORT_KEYS, ProductService, SearchService, XpenceError
 from colorama import Fore
 
 # Product Class
 class Product:
-    def __init__(self, db, user_id, name="", price=0.0):
+    def __init__(self, db, user_id, name="", price=Money(0)):
         self.db = db
         self.user_id = user_id
         self.name = name
         self.price = price
         self.id = None
+        self.service = ProductService(db)
 
     def add_product(self):
         Ui.display_header("Add Product")
@@ -17,17 +20,11 @@ class Product:
             Ui.display_error("Product name cannot be empty.")
             return
         try:
-            self.price = float(input(Fore.BLUE + "Enter product price: "))
-        except ValueError:
-            Ui.display_error("Invalid price. Please enter a number.")
-            return
-        if self.price == 0:
-            Ui.display_error("Product price cannot be zero.")
+            product = self.service.add(self.user_id, self.name, input(Fore.BLUE + "Enter product price: "))
+        except XpenceError as e:
+            Ui.display_error(str(e))
             return
-        if self.price < 0:
-            Ui.display_error("Product price cannot be negative.")
-            return
-        self.db.execute_query("INSERT INTO products (user_id, name, price) VALUES (?, ?, ?)", (self.user_id, self.name, self.price))
+        self.id, self.price = product.id, product.price
         Ui.display_success("Product added successfully!")
 
     def remove_product(self):
@@ -38,25 +35,81 @@ class Product:
         try:
             choice = int(input(Fore.BLUE + "Select a product to remove (number): ")) - 1
             if 0 <= choice < len(products):
-                product_id = products[choice][0]
-                self.db.execute_query("DELETE FROM products WHERE id = ?", (product_id,))
-                self.db.execute_query("DELETE FROM expenses WHERE product_id = ?", (product_id,))
+                self.service.remove(self.user_id, products[choice].id)
                 Ui.display_success("Product removed successfully!")
             else:
                 Ui.display_error("Invalid choice.")
         except ValueError:
             Ui.display_error("Invalid input.")
+        except XpenceError as e:
+            Ui.display_error(str(e))
+
+    def fetch_page(self, after_id=None, before_id=None):
+        return self.service.list(self.user_id, after_id=after_id, before_id=before_id)
 
     def view_products(self):
-        products = self.db.fetch_all("SELECT id, name, price FROM products WHERE user_id = ?", (self.user_id,))
-        
-        if not products:
+        # Shows one page at a time; returns the rows of the page the user stopped on
+        page = self.fetch_page()
+
+        if not page.rows:
+            Ui.display_error("No products found.")
+            return []
+
+        while True:
+            with Ui.screen():
+                Ui.display_header("Products")
+                Ui.display_lines(f"{index}. {product.name} - {product.price}"
+                                 for index, product in enumerate(page.rows, start=1))
+                Ui.display_separator()
+
+            action = Ui.page_navigation(page)
+            if action == "next":
+                page = self.fetch_page(after_id=page.last_id)
+            elif action == "prev":
+                page = self.fetch_page(before_id=page.first_id)
+            else:
+                return page.rows
+
+    def fetch_dashboard(self, sort_by="margin", descending=True):
+        # Raw rows in cents: (id, name, price, expense count, expense total, net, margin)
+        return self.service.dashboard_rows(self.user_id, sort_by, descending)
+
+    def view_dashboard(self, sort_by="margin", descending=True):
+        dashboard = self.service.dashboard(self.user_id, sort_by, descending)
+        if not dashboard:
             Ui.display_error("No products found.")
             return []
 
-        Ui.display_header("Products")
-        for index, (prod_id, name, price) in enumerate(products, start=1):
-            print(Fore.CYAN + f"{index}. {name} - ${price:.2f}")
-        print(Fore.YELLOW + "-" * 60)
+        rows = [
+            (row.name, row.price, row.expense_count, row.total_expenses, row.net_per_unit,
+             "-" if row.margin is None else f"{row.margin:.1f}%")
+            for row in dashboard
+        ]
+        with Ui.screen():
+            Ui.display_header("Product Dashboard")
+            Ui.display_table(["Product", "Price", "Expenses", "Total Expenses", "Net/Unit", "Margin"], rows)
+        return dashboard
+
+    def search(self):
+        Ui.display_header("Search")
+        text = input(Fore.BLUE + "Search product and expense names: ")
+        try:
+            results = SearchService(self.db).search(self.user_id, text)
+        except XpenceError as e:
+            Ui.display_error(str(e))
+            return None
+        if not results.products and not results.expenses:
+            Ui.display_error("Nothing matches.")
+            return results
+
+        with Ui.screen():
+            Ui.display_header("Search Results")
+            if results.products:
+                Ui.display_table(["Product", "Price"], [(p.name, p.price) for p in results.products])
+            if results.expenses:
+                Ui.display_table(["Expense", "Amount", "Product"],
+                                 [(e.name, e.amount, e.product_name) for e in results.expenses])
+        return results
 
-        return products
\ No newline at end of file
+    def simulate_scenarios(self, grid):
+        return self.service.simulate_scenarios(self.user_id, grid)
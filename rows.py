@@ -0,0 +1,126 @@
+"""
+Compact record types for rows read from the database.
+
+    products = db.fetch_all("SELECT id, name, price_cents FROM products WHERE user_id = ?", (user_id,),
+                            row_type=ProductRow)
+    products[0].name, products[0].price
+
+Each record class lists its columns in ``__slots__``, so a row is one small
+object with no per-instance dict: about the size of the tuple it replaces
+and much smaller than a dict or sqlite3.Row. ``row_type`` hands the class's
+``row_factory`` to the cursor, which builds the records while fetching
+instead of a list of tuples that is then copied into records.
+
+Records still index, unpack and compare like the tuples they replace, so
+``page.rows[0][0]`` and ``id, name, price = row`` keep working. Unlike
+tuples they can be changed, so they cannot be hashed.
+"""
+from operator import attrgetter
+from money import Money
+
+
+def _row_factory(cls):
+    # sqlite3 calls this with the cursor and the tuple of every row fetched.
+    # Generated like collections.namedtuple's methods: unpacking straight
+    # into the slots is one Python call per row, where cls(*row) is two.
+    source = (f"def row_factory(cursor, row):\n"
+              f"    self = new(cls)\n"
+              f"    {', '.join(f'self.{name}' for name in cls.__slots__)}, = row\n"
+              f"    return self\n")
+    namespace = {"new": object.__new__, "cls": cls}
+    exec(source, namespace)
+    return namespace["row_factory"]
+
+
+class Record:
+    __slots__ = ()
+    _fields = ()
+
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        cls._fields = cls.__slots__
+        cls._values = attrgetter(*cls.__slots__)
+        cls.row_factory = staticmethod(_row_factory(cls))
+
+    def __iter__(self):
+        return iter(self._values(self))
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return self._values(self)[index]
+
+    # Records are mutable, so they are unhashable like lists; equal records
+    # are of the same class, and a record also equals the tuple it replaces
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._values(self) == other._values(other)
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)})"
+
+    def _asdict(self):
+        return dict(zip(self._fields, self._values(self)))
+
+
+class UserRow(Record):
+    __slots__ = ("id", "username", "password")
+
+    def __init__(self, id, username, password):
+        self.id = id
+        self.username = username
+        self.password = password
+
+    def __repr__(self):
+        # Never print the password hash
+        return f"UserRow(id={self.id!r}, username={self.username!r})"
+
+
+# Amounts stay in cents like the database; the Money properties are for
+# display and arithmetic
+class ProductRow(Record):
+    __slots__ = ("id", "name", "price_cents")
+
+    def __init__(self, id, name, price_cents):
+        self.id = id
+        self.name = name
+        self.price_cents = price_cents
+
+    @property
+    def price(self):
+        return Money(self.price_cents)
+
+
+class ExpenseRow(Record):
+    __slots__ = ("id", "name", "amount_cents")
+
+    def __init__(self, id, name, amount_cents):
+        self.id = id
+        self.name = name
+        self.amount_cents = amount_cents
+
+    @property
+    def amount(self):
+        return Money(self.amount_cents)
+
+
+# An expense found by search, with the product it belongs to
+class ExpenseMatch(Record):
+    __slots__ = ("id", "name", "amount_cents", "product_id", "product_name")
+
+    def __init__(self, id, name, amount_cents, product_id, product_name):
+        self.id = id
+        self.name = name
+        self.amount_cents = amount_cents
+        self.product_id = product_id
+        self.product_name = product_name
+
+    @property
+    def amount(self):
+        return Money(self.amount_cents)
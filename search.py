@@ -0,0 +1,222 @@
+"""
+Full-text search over product and expense names.
+
+    search.find(db, user_id, "bott lab")      # SearchResults(products=[...], expenses=[...])
+
+Names are indexed in two FTS5 tables, products_search and expenses_search,
+created by migration 6 and kept in sync by triggers on products and
+expenses. Both are contentless: they hold only the index, and the rows are
+read back from products and expenses by id. Next to the name every row
+indexes an owner token ("u" followed by the user id), so a user's matches
+are found inside the index rather than by joining every match in the
+table to products. Each word searched for matches as a prefix, so "bott"
+finds "Bottle".
+
+Products are ranked by bm25. A common word can match hundreds of thousands
+of expenses, so expense matches are ranked within the newest WINDOW of
+them, and by name length rather than bm25: every match holds every word
+searched for, so bm25 would order them by length anyway, but it first
+counts every row of the owner token to weigh it. That way a search costs
+about the same however many rows the user has or match.
+
+Per-row index triggers are slow next to the inserts themselves, so bulk
+inserts (aggregates.deferred_triggers, used by the importer and datagen) drop
+the expenses insert trigger and index the new rows with CATCH_UP once the
+batch is in. Without FTS5 in the SQLite library the tables are not created
+and find() falls back to LIKE scans.
+"""
+import re
+from collections import namedtuple
+from rows import ProductRow, ExpenseMatch
+
+# Results returned by default, and the expense matches ranked for them
+LIMIT = 20
+WINDOW = 500
+
+# Rows indexed per transaction when the migration fills the index
+BATCH_SIZE = 50_000
+
+EXPENSES_INSERT_TRIGGER = "trg_expenses_search_insert"
+
+SearchResults = namedtuple("SearchResults", "products expenses")
+
+# The words unicode61 indexes; anything else in a search separates words
+_WORD = re.compile(r"[^\W_]+")
+
+# Rows to index, in id order, for the backfill (id > ?, LIMIT ?)
+_SOURCES = {
+    "products_search": "SELECT id, name, 'u' || user_id FROM products WHERE id > ? ORDER BY id LIMIT ?",
+    "expenses_search": """
+        SELECT e.id, e.name, 'u' || p.user_id FROM expenses AS e JOIN products AS p ON p.id = e.product_id
+        WHERE e.id > ? ORDER BY e.id LIMIT ?
+    """,
+}
+
+# Indexes the expenses inserted after id ? while EXPENSES_INSERT_TRIGGER was dropped
+CATCH_UP = """
+    INSERT INTO expenses_search (rowid, name, owner)
+    SELECT e.id, e.name, 'u' || p.user_id FROM expenses AS e JOIN products AS p ON p.id = e.product_id
+    WHERE e.id > ?
+"""
+
+# Deleting from a contentless table takes the values that were indexed, so
+# the triggers look the owner up again. A product's expenses leave the
+# index with the product; deleting them afterwards finds no product and
+# leaves the index alone.
+_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_search_insert AFTER INSERT ON products
+    BEGIN
+        INSERT INTO products_search (rowid, name, owner) VALUES (NEW.id, NEW.name, 'u' || NEW.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_search_delete AFTER DELETE ON products
+    BEGIN
+        INSERT INTO products_search (products_search, rowid, name, owner)
+        VALUES ('delete', OLD.id, OLD.name, 'u' || OLD.user_id);
+        INSERT INTO expenses_search (expenses_search, rowid, name, owner)
+        SELECT 'delete', id, name, 'u' || OLD.user_id FROM expenses WHERE product_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_search_update AFTER UPDATE OF name, user_id ON products
+    BEGIN
+        INSERT INTO products_search (products_search, rowid, name, owner)
+        VALUES ('delete', OLD.id, OLD.name, 'u' || OLD.user_id);
+        INSERT INTO products_search (rowid, name, owner) VALUES (NEW.id, NEW.name, 'u' || NEW.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_search_owner AFTER UPDATE OF user_id ON products
+    WHEN OLD.user_id != NEW.user_id
+    BEGIN
+        INSERT INTO expenses_search (expenses_search, rowid, name, owner)
+        SELECT 'delete', id, name, 'u' || OLD.user_id FROM expenses WHERE product_id = OLD.id;
+        INSERT INTO expenses_search (rowid, name, owner)
+        SELECT id, name, 'u' || NEW.user_id FROM expenses WHERE product_id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {EXPENSES_INSERT_TRIGGER} AFTER INSERT ON expenses
+    BEGIN
+        INSERT INTO expenses_search (rowid, name, owner)
+        SELECT NEW.id, NEW.name, 'u' || user_id FROM products WHERE id = NEW.product_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_expenses_search_delete AFTER DELETE ON expenses
+    BEGIN
+        INSERT INTO expenses_search (expenses_search, rowid, name, owner)
+        SELECT 'delete', OLD.id, OLD.name, 'u' || user_id FROM products WHERE id = OLD.product_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_expenses_search_update AFTER UPDATE OF product_id, name ON expenses
+    BEGIN
+        INSERT INTO expenses_search (expenses_search, rowid, name, owner)
+        SELECT 'delete', OLD.id, OLD.name, 'u' || user_id FROM products WHERE id = OLD.product_id;
+        INSERT INTO expenses_search (rowid, name, owner)
+        SELECT NEW.id, NEW.name, 'u' || user_id FROM products WHERE id = NEW.product_id;
+    END
+    """,
+]
+
+
+def available(db):
+    """Whether the SQLite library was built with FTS5."""
+    return bool(db.fetch_one("SELECT sqlite_compileoption_used('ENABLE_FTS5')")[0])
+
+
+def indexed(db):
+    return db.fetch_one("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expenses_search'") is not None
+
+
+def build(db, batch_size=BATCH_SIZE):
+    """Create and fill the search tables, then start the sync triggers.
+
+    Rows are indexed in id order, ``batch_size`` per transaction; an
+    interrupted build resumes after the last id indexed. The last
+    transaction indexes rows added meanwhile and creates the triggers.
+    Runs before the application writes, like the other migrations: rows
+    deleted or renamed during the build are not noticed.
+    """
+    with db.transaction():
+        for table in _SOURCES:
+            db.execute_query(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                    name, owner, content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            # The owner column only narrows the search; it takes no part in the rank
+            db.execute_query(f"INSERT INTO {table} ({table}, rank) VALUES ('rank', 'bm25(1.0, 0.0)')")
+    for table in _SOURCES:
+        while _index_rows(db, table, batch_size) == batch_size:
+            pass
+    with db.transaction():
+        for table in _SOURCES:
+            _index_rows(db, table, -1)
+        for statement in _TRIGGERS:
+            db.execute_query(statement)
+
+
+def _index_rows(db, table, limit):
+    with db.transaction():
+        last_id = db.fetch_one(f"SELECT COALESCE(MAX(id), 0) FROM {table}_docsize")[0]
+        return db.execute_query(f"INSERT INTO {table} (rowid, name, owner) {_SOURCES[table]}", (last_id, limit))
+
+
+def words(text):
+    return _WORD.findall(text or "")
+
+
+def match_expression(user_id, text):
+    """The FTS5 query for ``text`` within ``user_id``'s rows: every word as a
+    quoted prefix, so nothing typed is read as FTS5 syntax."""
+    prefixes = " ".join(f'"{word}"*' for word in words(text))
+    return f'owner : "u{int(user_id)}" AND name : ({prefixes})'
+
+
+def find(db, user_id, text, limit=LIMIT):
+    """Products and expenses of ``user_id`` whose names contain words
+    starting with each word of ``text``, best matches first."""
+    if not words(text):
+        return SearchResults([], [])
+    if not indexed(db):
+        return _find_like(db, user_id, text, limit)
+    query = match_expression(user_id, text)
+    products = db.fetch_all("""
+        SELECT p.id, p.name, p.price_cents
+        FROM products_search AS s JOIN products AS p ON p.id = s.rowid
+        WHERE products_search MATCH ?
+        ORDER BY s.rank LIMIT ?
+    """, (query, limit), row_type=ProductRow)
+    expenses = db.fetch_all("""
+        SELECT e.id, e.name, e.amount_cents, p.id, p.name
+        FROM (
+            SELECT rowid FROM expenses_search WHERE expenses_search MATCH ?
+            ORDER BY rowid DESC LIMIT ?
+        ) AS s
+        JOIN expenses AS e ON e.id = s.rowid
+        JOIN products AS p ON p.id = e.product_id
+        ORDER BY length(e.name), e.id DESC LIMIT ?
+    """, (query, max(WINDOW, limit), limit), row_type=ExpenseMatch)
+    return SearchResults(products, expenses)
+
+
+def _find_like(db, user_id, text, limit):
+    # Substring scans of the user's rows, newest first
+    patterns = ["%" + re.sub(r"([\\%_])", r"\\\1", word) + "%" for word in words(text)]
+    where = " AND ".join(["{column} LIKE ? ESCAPE '\\'"] * len(patterns))
+    products = db.fetch_all(f"""
+        SELECT id, name, price_cents FROM products
+        WHERE user_id = ? AND {where.format(column="name")}
+        ORDER BY id DESC LIMIT ?
+    """, (user_id, *patterns, limit), row_type=ProductRow)
+    expenses = db.fetch_all(f"""
+        SELECT e.id, e.name, e.amount_cents, p.id, p.name
+        FROM products AS p JOIN expenses AS e ON e.product_id = p.id
+        WHERE p.user_id = ? AND {where.format(column="e.name")}
+        ORDER BY e.id DESC LIMIT ?
+    """, (user_id, *patterns, limit), row_type=ExpenseMatch)
+    return SearchResults(products, expenses)
@@ -0,0 +1,580 @@
+"""
+Local HTTP/JSON API over the user, product and expense services.
+
+    python server.py --db business_tracker.db --port 8080 --workers 8
+
+Several clerks can record expenses at once: requests are served by a
+bounded pool of worker threads sharing one Database (and so its
+connection pool), and HTTP/1.1 keep-alive lets a client send any number
+of requests over one connection. Between requests a connection waits in
+a selector rather than on a worker, so idle clients cost no threads; it
+still holds one of the workers + backlog connection slots until it
+closes or sits idle for KEEPALIVE_TIMEOUT seconds. When every slot is
+taken, new connections get 503 straight away instead of queueing
+without bound.
+
+    POST   /users                              {"username", "password"}
+    POST   /sessions                           {"username", "password"} -> {"token"}
+    DELETE /sessions
+    GET    /products?after=ID&before=ID
+    POST   /products                           {"name", "price"}
+    GET    /products/ID
+    DELETE /products/ID
+    GET    /products/ID/expenses?after=ID&before=ID
+    POST   /products/ID/expenses               {"name", "amount"} or {"expenses": [...]}
+    DELETE /products/ID/expenses/ID
+    GET    /products/ID/report
+    GET    /products/ID/simulation?quantity=N
+    GET    /dashboard?sort=margin&order=desc
+    GET    /search?q=WORDS&limit=N                 products and expenses by name
+    GET    /metrics                            Prometheus text format
+
+Everything but the first two and /metrics needs "Authorization: Bearer TOKEN". Money
+goes in as text or numbers ("12.50") and comes out as cents plus the
+formatted amount. Errors are {"error": message} with 400 (validation),
+401 (credentials or token), 404, 405, 409 (conflict), 413, 500 or 503.
+"""
+import argparse
+import json
+import re
+import secrets
+import selectors
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+import cache
+import metrics
+import search
+from database import Database, PoolTimeout
+from services import (UserService, ProductService, ExpenseService, SearchService, XpenceError, ValidationError,
+                      NotFoundError, AuthenticationError, ConflictError)
+
+WORKERS = 8
+
+# Connections, idle or waiting for a worker, allowed on top of one per
+# worker before new ones get 503
+BACKLOG = 64
+
+# Seconds an idle keep-alive connection is kept open
+KEEPALIVE_TIMEOUT = 15
+
+# Seconds a worker waits for the rest of a request it has started reading
+REQUEST_TIMEOUT = 10
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1024 * 1024
+
+SESSION_TTL = 8 * 60 * 60
+
+_STATUS = {
+    ValidationError: 400,
+    AuthenticationError: 401,
+    NotFoundError: 404,
+    ConflictError: 409,
+}
+
+
+class HttpError(Exception):
+    """An error response that does not come from the services."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Bearer tokens of logged-in users, kept in memory
+class Sessions:
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._tokens[token] = (user_id, time.monotonic() + self.ttl)
+        return token
+
+    def user(self, token):
+        with self._lock:
+            session = self._tokens.get(token)
+            if session is None:
+                return None
+            if session[1] < time.monotonic():
+                del self._tokens[token]
+                return None
+            return session[0]
+
+    def revoke(self, token):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+
+def _money(name, money):
+    return {f"{name}_cents": money.cents, name: str(money)}
+
+
+def _page(page, item):
+    return {"items": [item(row) for row in page.rows], "has_prev": page.has_prev, "has_next": page.has_next,
+            "first_id": page.first_id, "last_id": page.last_id}
+
+
+def _product(product):
+    return {"id": product.id, "name": product.name, **_money("price", product.price)}
+
+
+def _expense(expense):
+    return {"id": expense.id, "name": expense.name, **_money("amount", expense.amount)}
+
+
+def _int(value, what):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid {what}.") from None
+
+
+def _text(body, key):
+    value = body.get(key)
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise ValidationError(f"Missing {key}.")
+    return str(value)
+
+
+# Routes the requests to the services; independent of the HTTP plumbing
+class Api:
+    def __init__(self, db, sessions=None):
+        self.db = db
+        self.sessions = sessions or Sessions()
+        self.users = UserService(db)
+        self.products = ProductService(db)
+        self.expenses = ExpenseService(db)
+        self.search_service = SearchService(db)
+        self.routes = [
+            ("POST", re.compile(r"/users"), self.register, False),
+            ("POST", re.compile(r"/sessions"), self.login, False),
+            ("DELETE", re.compile(r"/sessions"), self.logout, True),
+            ("GET", re.compile(r"/products"), self.list_products, True),
+            ("POST", re.compile(r"/products"), self.add_product, True),
+            ("GET", re.compile(r"/products/(\d+)"), self.get_product, True),
+            ("DELETE", re.compile(r"/products/(\d+)"), self.remove_product, True),
+            ("GET", re.compile(r"/products/(\d+)/expenses"), self.list_expenses, True),
+            ("POST", re.compile(r"/products/(\d+)/expenses"), self.add_expenses, True),
+            ("DELETE", re.compile(r"/products/(\d+)/expenses/(\d+)"), self.remove_expense, True),
+            ("GET", re.compile(r"/products/(\d+)/report"), self.report, True),
+            ("GET", re.compile(r"/products/(\d+)/simulation"), self.simulate, True),
+            ("GET", re.compile(r"/dashboard"), self.dashboard, True),
+            ("GET", re.compile(r"/search"), self.search, True),
+        ]
+
+    def handle(self, method, path, query, body, authorization):
+        """Return (status, payload) for one request; payload None means no body."""
+        try:
+            allowed = []
+            for route_method, pattern, view, needs_session in self.routes:
+                match = pattern.fullmatch(path.rstrip("/") or "/")
+                if match is None:
+                    continue
+                if route_method != method:
+                    allowed.append(route_method)
+                    continue
+                request = Request(query, body, authorization)
+                if needs_session:
+                    request.user_id = self.authenticate(request.token)
+                return view(request, *map(int, match.groups()))
+            if allowed:
+                raise HttpError(405, f"Use {', '.join(allowed)} for {path}.")
+            raise HttpError(404, f"No such endpoint: {path}")
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except XpenceError as e:
+            return _STATUS.get(type(e), 400), {"error": str(e)}
+        except PoolTimeout:
+            return 503, {"error": "The database is busy, try again."}
+        except Exception:
+            traceback.print_exc()
+            return 500, {"error": "Internal server error."}
+
+    def authenticate(self, token):
+        user_id = self.sessions.user(token) if token else None
+        if user_id is None:
+            raise HttpError(401, "Log in first: POST /sessions, then send Authorization: Bearer TOKEN.")
+        return user_id
+
+    def owned_product(self, request, product_id):
+        return self.products.get(request.user_id, product_id)
+
+    def register(self, request):
+        body = request.json()
+        user_id = self.users.register(_text(body, "username").strip(), _text(body, "password"))
+        return 201, {"id": user_id}
+
+    def login(self, request):
+        body = request.json()
+        user_id = self.users.login(_text(body, "username").strip(), _text(body, "password"))
+        return 201, {"token": self.sessions.create(user_id), "user_id": user_id, "expires_in": self.sessions.ttl}
+
+    def logout(self, request):
+        self.sessions.revoke(request.token)
+        return 204, None
+
+    def list_products(self, request):
+        page = self.products.list(request.user_id, request.int_arg("after"), request.int_arg("before"))
+        return 200, _page(page, _product)
+
+    def add_product(self, request):
+        body = request.json()
+        return 201, _product(self.products.add(request.user_id, _text(body, "name"), _text(body, "price")))
+
+    def get_product(self, request, product_id):
+        return 200, _product(self.owned_product(request, product_id))
+
+    def remove_product(self, request, product_id):
+        self.products.remove(request.user_id, product_id)
+        return 204, None
+
+    def list_expenses(self, request, product_id):
+        self.owned_product(request, product_id)
+        page = self.expenses.list(request.user_id, product_id, request.int_arg("after"), request.int_arg("before"))
+        return 200, _page(page, _expense)
+
+    def add_expenses(self, request, product_id):
+        body = request.json()
+        if "expenses" not in body:
+            return 201, _expense(self.expenses.add(request.user_id, product_id, _text(body, "name"), _text(body, "amount")))
+        if not isinstance(body["expenses"], list) or not all(isinstance(e, dict) for e in body["expenses"]):
+            raise ValidationError("expenses must be a list of objects.")
+        pairs = [(_text(e, "name"), _text(e, "amount")) for e in body["expenses"]]
+        return 201, {"added": self.expenses.add_many(request.user_id, product_id, pairs)}
+
+    def remove_expense(self, request, product_id, expense_id):
+        self.expenses.remove(request.user_id, product_id, expense_id)
+        return 204, None
+
+    def report(self, request, product_id):
+        report = self.expenses.report(request.user_id, product_id)
+        return 200, {"product_id": product_id, **_money("price", report.price),
+                     **_money("total_expenses", report.total_expenses),
+                     **_money("net_per_unit", report.net_per_unit)}
+
+    def simulate(self, request, product_id):
+        quantity = request.int_arg("quantity")
+        if quantity is None:
+            raise ValidationError("Pass the quantity to simulate.")
+        result = self.expenses.simulate_profit(request.user_id, product_id, quantity)
+        return 200, {"product_id": product_id, "quantity": quantity, **_money("net_per_unit", result.net_per_unit),
+                     **_money("total_profit", result.total_profit)}
+
+    def dashboard(self, request):
+        sort = request.query.get("sort", ["margin"])[0]
+        descending = request.query.get("order", ["desc"])[0] != "asc"
+        return 200, {"items": [
+            {"id": row.id, "name": row.name, **_money("price", row.price), "expense_count": row.expense_count,
+             **_money("total_expenses", row.total_expenses), **_money("net_per_unit", row.net_per_unit),
+             "margin": None if row.margin is None else round(row.margin, 2)}
+            for row in self.products.dashboard(request.user_id, sort, descending)
+        ]}
+
+
+    def search(self, request):
+        limit = request.int_arg("limit")
+        results = self.search_service.search(request.user_id, request.query.get("q", [""])[0],
+                                             search.LIMIT if limit is None else limit)
+        return 200, {"products": [_product(p) for p in results.products],
+                     "expenses": [{**_expense(e), "product_id": e.product_id, "product_name": e.product_name}
+                                  for e in results.expenses]}
+
+
+# The parts of one request the views need
+class Request:
+    def __init__(self, query, body, authorization):
+        self.query = query
+        self.body = body
+        self.token = None
+        if authorization and authorization.startswith("Bearer "):
+            self.token = authorization[7:].strip()
+        self.user_id = None
+
+    def json(self):
+        try:
+            body = json.loads(self.body or b"{}")
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError("The request body is not valid JSON.") from None
+        if not isinstance(body, dict):
+            raise ValidationError("The request body must be a JSON object.")
+        return body
+
+    def int_arg(self, name):
+        values = self.query.get(name)
+        return _int(values[0], name) if values else None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "Xpence/1.0"
+    # Headers and body go out in separate writes; without this the body
+    # can wait for a delayed ACK on keep-alive connections
+    disable_nagle_algorithm = True
+    timeout = REQUEST_TIMEOUT
+
+    def __init__(self, request, client_address, server):
+        # Only set up the connection: the server calls handle_one_request
+        # each time a request arrives, and finish once it closes
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.close_connection = False
+        self.setup()
+
+    def pending(self):
+        """True when a pipelined request already sits in the read buffer."""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY:
+            # The body is not read, so the connection cannot be reused
+            self.close_connection = True
+            status, payload = (413, {"error": "Request body too large."}) if length > 0 else \
+                (400, {"error": "Invalid Content-Length."})
+        else:
+            body = self.rfile.read(length) if length else b""
+            if method == "GET" and url.path == "/metrics":
+                self.respond_metrics()
+                return
+            status, payload = self.server.api.handle(method, url.path, parse_qs(url.query), body,
+                                                     self.headers.get("Authorization"))
+        self.respond(status, payload)
+
+    def respond(self, status, payload):
+        data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        if data:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def respond_metrics(self):
+        data = metrics.REGISTRY.exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", metrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ApiServer(HTTPServer):
+    """HTTPServer that hands each request to a bounded worker pool.
+
+    Connections hold one of workers + backlog slots from accept to close.
+    A watcher thread keeps the idle ones in a selector and submits a
+    connection to the workers once its next request starts to arrive.
+    """
+
+    # The socketserver default of 5 drops SYNs when many clients connect at
+    # once, and the kernel retries them only after a second
+    request_queue_size = 128
+
+    def __init__(self, address, api, workers=WORKERS, backlog=BACKLOG, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                 verbose=False):
+        super().__init__(address, Handler)
+        self.api = api
+        self.verbose = verbose
+        self.keepalive_timeout = keepalive_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="xpence-http")
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+        self._busy = set()
+        self._parked = []
+        self._closing = False
+        self._lock = threading.Lock()
+        self._idle = selectors.DefaultSelector()
+        self._wake_read, self._wake_write = socket.socketpair()
+        self._idle.register(self._wake_read, selectors.EVENT_READ)
+        self._watcher = threading.Thread(target=self._watch, name="xpence-http-idle", daemon=True)
+        self._watcher.start()
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            self._slots.release()
+            return
+        # Workers only get the connection once its first request arrives
+        self._park(handler)
+
+    def _serve(self, handler):
+        with self._lock:
+            self._busy.add(handler)
+        try:
+            while True:
+                handler.handle_one_request()
+                if handler.close_connection or not handler.pending():
+                    break
+        except Exception:
+            handler.close_connection = True
+            self.handle_error(handler.request, handler.client_address)
+        finally:
+            with self._lock:
+                self._busy.discard(handler)
+        if handler.close_connection:
+            self._close(handler)
+        else:
+            self._park(handler)
+
+    def _park(self, handler):
+        # Hand a connection between requests to the watcher thread
+        with self._lock:
+            if not self._closing:
+                self._parked.append(handler)
+                self._wake_write.send(b"\0")
+                return
+        self._close(handler)
+
+    def _watch(self):
+        deadlines = {}
+        while True:
+            with self._lock:
+                if self._closing:
+                    break
+                parked, self._parked = self._parked, []
+            expires = time.monotonic() + self.keepalive_timeout
+            for handler in parked:
+                self._idle.register(handler.connection, selectors.EVENT_READ, handler)
+                deadlines[handler] = expires
+            timeout = max(min(deadlines.values()) - time.monotonic(), 0) if deadlines else None
+            for key, _ in self._idle.select(timeout):
+                if key.data is None:
+                    self._wake_read.recv(4096)
+                    continue
+                # Readable: a request, or the client closing, is on its way
+                self._idle.unregister(key.fileobj)
+                del deadlines[key.data]
+                self.executor.submit(self._serve, key.data)
+            now = time.monotonic()
+            for handler in [handler for handler, deadline in deadlines.items() if deadline <= now]:
+                self._idle.unregister(handler.connection)
+                del deadlines[handler]
+                self._close(handler)
+        with self._lock:
+            parked, self._parked = self._parked, []
+        for handler in [*deadlines, *parked]:
+            self._close(handler)
+
+    def _close(self, handler):
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+        self._slots.release()
+
+    def _reject(self, request):
+        body = json.dumps({"error": "The server is busy, try again."}).encode("utf-8")
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+                            b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body))
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        with self._lock:
+            self._closing = True
+            self._wake_write.send(b"\0")
+            # Wake the workers blocked reading a request
+            for handler in self._busy:
+                try:
+                    handler.connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self._watcher.join()
+        self.executor.shutdown(wait=True)
+        self._idle.close()
+        self._wake_read.close()
+        self._wake_write.close()
+
+
+def serve(db, host="127.0.0.1", port=8080, workers=WORKERS, backlog=BACKLOG, keepalive_timeout=KEEPALIVE_TIMEOUT,
+          verbose=False):
+    """Create the server; call serve_forever() on it (shutdown() stops it)."""
+    return ApiServer((host, port), Api(db), workers=workers, backlog=backlog, keepalive_timeout=keepalive_timeout,
+                     verbose=verbose)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xpence HTTP/JSON API")
+    parser.add_argument("--db", default="business_tracker.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker threads (concurrent requests)")
+    parser.add_argument("--backlog", type=int, default=BACKLOG,
+                        help="connections, idle or waiting, allowed on top of one per worker")
+    parser.add_argument("--cache-bytes", type=int, default=cache.MAX_BYTES,
+                        help="memory for cached product lists and reports (0 = no cache)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    import passwords
+    db = Database(args.db, max_readers=args.workers)
+    metrics.track_database(db)
+    if args.cache_bytes:
+        cache.enable(db, args.cache_bytes)
+    passwords.calibrate()
+    server = serve(db, args.host, args.port, args.workers, args.backlog, verbose=args.verbose)
+    sys.stderr.write(f"Serving on http://{args.host}:{server.server_address[1]} with {args.workers} workers\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Headless business operations for users, products and expenses.
+
+The services never prompt or print: they take plain arguments, return
+typed records and raise XpenceError subclasses, so scripts, servers and
+benchmarks can call them in loops. The interactive menus in user.py,
+product.py and expense.py are thin wrappers that turn errors into
+Ui.display_error messages.
+"""
+import sqlite3
+from collections import namedtuple
+import cache
+import metrics
+import passwords
+import search
+from database import Page
+from money import Money
+from rows import UserRow, ProductRow, ExpenseRow
+from simulation import ScenarioGrid
+
+
+class XpenceError(Exception):
+    """Base class for errors raised by the services."""
+
+
+class ValidationError(XpenceError, ValueError):
+    """An argument was rejected; the message is fit to show the user."""
+
+
+class NotFoundError(XpenceError):
+    """The product or expense does not exist (for this user)."""
+
+
+class AuthenticationError(XpenceError):
+    """Unknown username or wrong password."""
+
+
+class ConflictError(XpenceError):
+    """The change clashes with existing data, e.g. a taken username."""
+
+
+# The services return rows.Record types, built by the cursor as rows are
+# fetched; the old names stay for existing callers
+ProductRecord = ProductRow
+ExpenseRecord = ExpenseRow
+
+DashboardRow = namedtuple("DashboardRow", "id name price expense_count total_expenses net_per_unit margin")
+ProductReport = namedtuple("ProductReport", "product_id price total_expenses net_per_unit")
+ProfitSimulation = namedtuple("ProfitSimulation", "product_id quantity net_per_unit total_profit")
+ScenarioReport = namedtuple("ScenarioReport", "product_id max_quantity result profits")
+
+# Largest quantity a scenario run accepts
+MAX_SCENARIO_QUANTITY = 10_000_000
+
+# Guard on expense statements, bound to (product_id, user_id): foreign keys
+# are not enforced, so every write and read checks ownership in the same
+# statement rather than in a separate lookup beforehand
+_OWNED = "EXISTS (SELECT 1 FROM products WHERE id = ? AND user_id = ?)"
+
+# Columns the dashboard can be sorted by
+DASHBOARD_SORT_KEYS = {
+    "margin": "margin",
+    "net": "net_cents",
+    "expenses": "expense_total_cents",
+    "price": "p.price_cents",
+    "name": "p.name",
+}
+
+
+def parse_money(value, what):
+    # Accepts Money or user text such as "12.50"
+    if isinstance(value, Money):
+        return value
+    try:
+        return Money.parse(value)
+    except ValueError:
+        raise ValidationError(f"Invalid {what}. Please enter a number.") from None
+
+
+def _require_positive(amount, label):
+    if amount.cents == 0:
+        raise ValidationError(f"{label} cannot be zero.")
+    if amount.cents < 0:
+        raise ValidationError(f"{label} cannot be negative.")
+
+
+class UserService:
+    def __init__(self, db):
+        self.db = db
+
+    def register(self, username, password):
+        """Create a user and return its id."""
+        if not username:
+            raise ValidationError("Username cannot be empty.")
+        if not password:
+            raise ValidationError("Password cannot be empty.")
+        try:
+            user_id = self.db.insert(
+                "INSERT INTO users (username, password) VALUES (?, ?)",
+                (username, passwords.hash_password(password)),
+            )
+        except sqlite3.IntegrityError:
+            raise ConflictError("Username already exists. Try a different one.") from None
+        metrics.REGISTRATIONS.inc()
+        return user_id
+
+    def find(self, username):
+        """Return the id of ``username`` without checking a password."""
+        user = self.db.fetch_one("SELECT id FROM users WHERE username = ?", (username,))
+        if user is None:
+            raise NotFoundError(f"No user named {username!r}.")
+        return user[0]
+
+    def login(self, username, password):
+        """Return the user id for valid credentials, else raise AuthenticationError."""
+        # Look up by username (unique index), then check the hash here
+        user = self.db.fetch_one("SELECT id, username, password FROM users WHERE username = ?", (username,),
+                                 row_type=UserRow)
+        if user is None:
+            passwords.dummy_verify(password)
+            metrics.LOGINS.labels("failure").inc()
+            raise AuthenticationError("Invalid credentials. Try again.")
+        user_id, stored = user.id, user.password
+        if not passwords.verify_password(password, stored):
+            metrics.LOGINS.labels("failure").inc()
+            raise AuthenticationError("Invalid credentials. Try again.")
+        metrics.LOGINS.labels("success").inc()
+        if passwords.needs_rehash(stored):
+            # Plaintext or under-cost hash: upgrade it now we know the password
+            self.db.execute_query(
+                "UPDATE users SET password = ? WHERE id = ?",
+                (passwords.hash_password(password), user_id),
+            )
+        return user_id
+
+
+class ProductService:
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def validate(name, price):
+        """Return the cleaned (name, Money) pair or raise ValidationError."""
+        name = name.strip()
+        if not name:
+            raise ValidationError("Product name cannot be empty.")
+        price = parse_money(price, "price")
+        _require_positive(price, "Product price")
+        return name, price
+
+    def add(self, user_id, name, price):
+        """Store a product for the user; ``price`` is Money or text."""
+        name, price = self.validate(name, price)
+        product_id = self.db.insert("INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+                                    (user_id, name, price.cents))
+        cache.invalidate(self.db, ("user", user_id))
+        metrics.PRODUCT_INSERTS.inc()
+        return ProductRow(product_id, name, price.cents)
+
+    def get(self, user_id, product_id):
+        return cache.read_through(self.db, ("product", user_id, product_id), [("product", product_id)],
+                                  lambda: self._get(user_id, product_id))
+
+    def _get(self, user_id, product_id):
+        product = self.db.fetch_one("SELECT id, name, price_cents FROM products WHERE id = ? AND user_id = ?",
+                                    (product_id, user_id), row_type=ProductRow)
+        if product is None:
+            raise NotFoundError("Product not found.")
+        return product
+
+    def remove(self, user_id, product_id):
+        """Delete the user's product together with its expenses."""
+        with self.db.transaction():
+            if not self.db.execute_query("DELETE FROM products WHERE id = ? AND user_id = ?", (product_id, user_id)):
+                raise NotFoundError("Product not found.")
+            self.db.execute_query("DELETE FROM expenses WHERE product_id = ?", (product_id,))
+            cache.invalidate(self.db, ("user", user_id), ("product", product_id))
+        metrics.PRODUCT_DELETES.inc()
+
+    def list(self, user_id, after_id=None, before_id=None):
+        """One keyset page of the user's products, as ProductRows."""
+        def load():
+            return self.db.fetch_page("SELECT id, name, price_cents FROM products WHERE user_id = ?", (user_id,),
+                                      after_id=after_id, before_id=before_id, row_type=ProductRow)
+
+        page = cache.read_through(self.db, ("products", user_id, after_id, before_id), [("user", user_id)], load)
+        # A cached page is shared; callers get their own list of rows
+        return Page(list(page.rows), page.has_prev, page.has_next)
+
+    def dashboard_rows(self, user_id, sort_by="margin", descending=True):
+        with metrics.REPORTS.labels("dashboard").time():
+            return self._dashboard_rows(user_id, sort_by, descending)
+
+    def _dashboard_rows(self, user_id, sort_by="margin", descending=True):
+        # Every product of the user with its expense count, total and net income
+        # per unit in one query, joined against the trigger-maintained totals
+        if sort_by not in DASHBOARD_SORT_KEYS:
+            raise ValidationError(f"Cannot sort the dashboard by {sort_by!r}.")
+        order = DASHBOARD_SORT_KEYS[sort_by]
+        direction = "DESC" if descending else "ASC"
+        return self.db.fetch_all(f"""
+            SELECT p.id, p.name, p.price_cents,
+                   COALESCE(t.expense_count, 0) AS expense_count,
+                   COALESCE(t.expense_total_cents, 0) AS expense_total_cents,
+                   p.price_cents - COALESCE(t.expense_total_cents, 0) AS net_cents,
+                   (p.price_cents - COALESCE(t.expense_total_cents, 0)) * 100.0 / NULLIF(p.price_cents, 0) AS margin
+            FROM products AS p LEFT JOIN product_totals AS t ON t.product_id = p.id
+            WHERE p.user_id = ?
+            ORDER BY {order} {direction}, p.id
+        """, (user_id,))
+
+    def dashboard(self, user_id, sort_by="margin", descending=True):
+        return [
+            DashboardRow(pid, name, Money(price), count, Money(total), Money(net), margin)
+            for pid, name, price, count, total, net, margin in self.dashboard_rows(user_id, sort_by, descending)
+        ]
+
+    def simulate_scenarios(self, user_id, grid):
+        # Runs a simulation.ScenarioGrid over every product of the user at once
+        with metrics.REPORTS.labels("scenarios").time():
+            return grid.run(
+                (prod_id, price_cents, expense_total_cents)
+                for prod_id, _, price_cents, _, expense_total_cents, *_ in self._dashboard_rows(user_id, "name")
+            )
+
+
+class ExpenseService:
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def validate(name, amount):
+        """Return the cleaned (name, Money) pair or raise ValidationError."""
+        name = name.strip()
+        if not name:
+            raise ValidationError("Expense name cannot be empty.")
+        amount = parse_money(amount, "amount")
+        _require_positive(amount, "Expense amount")
+        return name, amount
+
+    def add(self, user_id, product_id, name, amount):
+        """Store an expense on the user's product; ``amount`` is Money or text."""
+        name, amount = self.validate(name, amount)
+        expense_id = self.db.insert(
+            f"INSERT INTO expenses (product_id, name, amount_cents) SELECT ?, ?, ? WHERE {_OWNED}",
+            (product_id, name, amount.cents, product_id, user_id),
+        )
+        if expense_id is None:
+            raise NotFoundError("Product not found.")
+        cache.invalidate(self.db, ("product", product_id))
+        metrics.EXPENSE_INSERTS.inc()
+        return ExpenseRow(expense_id, name, amount.cents)
+
+    def add_many(self, user_id, product_id, expenses):
+        """Insert (name, amount) pairs in one transaction; nothing is written
+        if any of them is invalid. Returns the number of rows added."""
+        rows = [(product_id, name, amount.cents, product_id, user_id)
+                for name, amount in (self.validate(*e) for e in expenses)]
+        with self.db.transaction():
+            added = self.db.executemany(
+                f"INSERT INTO expenses (product_id, name, amount_cents) SELECT ?, ?, ? WHERE {_OWNED}", rows)
+            if added < len(rows):
+                raise NotFoundError("Product not found.")
+            cache.invalidate(self.db, ("product", product_id))
+        metrics.EXPENSE_INSERTS.inc(len(rows))
+        return len(rows)
+
+    def remove(self, user_id, product_id, expense_id):
+        if not self.db.execute_query(f"DELETE FROM expenses WHERE id = ? AND product_id = ? AND {_OWNED}",
+                                     (expense_id, product_id, product_id, user_id)):
+            raise NotFoundError("Expense not found.")
+        cache.invalidate(self.db, ("product", product_id))
+        metrics.EXPENSE_DELETES.inc()
+
+    def list(self, user_id, product_id, after_id=None, before_id=None):
+        """One keyset page of the expenses of the user's product, as
+        ExpenseRows; empty for a product that is not theirs."""
+        return self.db.fetch_page(f"SELECT id, name, amount_cents FROM expenses WHERE product_id = ? AND {_OWNED}",
+                                  (product_id, product_id, user_id),
+                                  after_id=after_id, before_id=before_id, row_type=ExpenseRow)
+
+    def report(self, user_id, product_id):
+        with metrics.REPORTS.labels("product").time():
+            return self._report(user_id, product_id)
+
+    def _report(self, user_id, product_id):
+        return cache.read_through(self.db, ("report", user_id, product_id), [("product", product_id)],
+                                  lambda: self._load_report(user_id, product_id))
+
+    def _load_report(self, user_id, product_id):
+        # Price and total expenses of the product, read from the trigger-maintained
+        # product_totals row instead of summing every expense
+        product = self.db.fetch_one("""
+            SELECT p.price_cents, COALESCE(t.expense_total_cents, 0)
+            FROM products AS p LEFT JOIN product_totals AS t ON t.product_id = p.id
+            WHERE p.id = ? AND p.user_id = ?
+        """, (product_id, user_id))
+        if not product:
+            raise NotFoundError("Product not found.")
+        price, total_expenses = Money(product[0]), Money(product[1])
+        return ProductReport(product_id, price, total_expenses, price - total_expenses)
+
+    # ``report`` is the product's ProductReport when the caller already read it
+    def simulate_profit(self, user_id, product_id, quantity, report=None):
+        with metrics.REPORTS.labels("simulation").time():
+            if report is None:
+                report = self._report(user_id, product_id)
+            if quantity < 0:
+                raise ValidationError("Quantity cannot be negative.")
+            if quantity == 0:
+                raise ValidationError("Quantity cannot be zero.")
+            return ProfitSimulation(product_id, quantity, report.net_per_unit, report.net_per_unit * quantity)
+
+    def scenarios(self, user_id, product_id, max_quantity, price_changes, expense_scales, fixed_costs=Money(0),
+                  report=None):
+        """Best price/expense scenario over 1..max_quantity units and the profit
+        of every scenario at max_quantity units. Pass the product's ``report``
+        if it was already read."""
+        with metrics.REPORTS.labels("scenarios").time():
+            return self._scenarios(user_id, product_id, max_quantity, price_changes, expense_scales, fixed_costs,
+                                   report)
+
+    def _scenarios(self, user_id, product_id, max_quantity, price_changes, expense_scales, fixed_costs, report):
+        if report is None:
+            report = self._report(user_id, product_id)
+        fixed_costs = parse_money(fixed_costs, "fixed costs")
+        if fixed_costs.cents < 0:
+            raise ValidationError("Fixed costs cannot be negative.")
+        if max_quantity <= 0:
+            raise ValidationError("Quantity must be greater than zero.")
+        if max_quantity > MAX_SCENARIO_QUANTITY:
+            raise ValidationError(f"Quantity cannot be more than {MAX_SCENARIO_QUANTITY:,}.")
+        grid = ScenarioGrid(range(1, max_quantity + 1), price_changes, expense_scales, fixed_costs.cents)
+        price, expenses = report.price.cents, report.total_expenses.cents
+        result = grid.run([(product_id, price, expenses)])[0]
+        # Only the profit at max_quantity is shown, so only that column is computed
+        return ScenarioReport(product_id, max_quantity, result,
+                              grid.profit_grid(price, expenses, quantities=[max_quantity]))
+
+
+class SearchService:
+    # Most results one search returns
+    MAX_LIMIT = 100
+
+    def __init__(self, db):
+        self.db = db
+
+    def search(self, user_id, text, limit=search.LIMIT):
+        """The user's products and expenses whose names match ``text``; see search.py."""
+        if not search.words(text):
+            raise ValidationError("Enter a word to search for.")
+        if not 1 <= limit <= self.MAX_LIMIT:
+            raise ValidationError(f"The limit must be between 1 and {self.MAX_LIMIT}.")
+        with metrics.SEARCHES.time():
+            return search.find(self.db, user_id, text, limit)
@@ -0,0 +1,190 @@
+"""
+What-if profit simulation across quantities, price changes and expense
+scaling factors.
+
+For a product with price P and per-unit expenses E (both in cents), a
+scenario (price change dp, expense scale s) earns
+
+    net per unit = P * (1 + dp) - E * s
+    profit(q)    = net per unit * q - fixed costs
+
+ScenarioGrid evaluates every scenario for one or many products in one
+vectorized NumPy pass, chunked over products to bound memory, and falls
+back to the standard array module when NumPy is not installed. NumPy is
+imported on first use so commands that never simulate start quickly.
+"""
+from array import array
+from bisect import bisect_left
+
+# The numpy module once loaded, False if it is not installed
+np = None
+
+# Upper bound for the scenario block evaluated at once, in grid cells
+CHUNK_CELLS = 1_000_000
+
+
+# Best scenario and break-even point for one product
+class ScenarioResult:
+    __slots__ = ("product_id", "base_net_cents", "best_price_change", "best_expense_scale",
+                 "best_net_cents", "break_even_quantity", "best_break_even_quantity")
+
+    def __init__(self, product_id, base_net_cents, best_price_change, best_expense_scale,
+                 best_net_cents, break_even_quantity, best_break_even_quantity):
+        self.product_id = product_id
+        self.base_net_cents = base_net_cents
+        self.best_price_change = best_price_change
+        self.best_expense_scale = best_expense_scale
+        self.best_net_cents = best_net_cents
+        self.break_even_quantity = break_even_quantity
+        self.best_break_even_quantity = best_break_even_quantity
+
+    def __repr__(self):
+        return (f"ScenarioResult(product_id={self.product_id}, best_price_change={self.best_price_change}, "
+                f"best_expense_scale={self.best_expense_scale}, best_net_cents={self.best_net_cents:.2f}, "
+                f"break_even_quantity={self.break_even_quantity})")
+
+
+def numpy_available():
+    """Import NumPy on first call; NumPy is optional and the array fallback
+    is used without it."""
+    global np
+    if np is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = False
+    return np is not False
+
+
+def frange(start, stop, steps):
+    """``steps`` evenly spaced values from start to stop inclusive."""
+    if steps == 1:
+        return [start]
+    width = (stop - start) / (steps - 1)
+    return [start + width * i for i in range(steps)]
+
+
+def _break_even(quantities, net, fixed_costs):
+    # Smallest quantity whose profit covers the fixed costs, or None
+    if net > 0:
+        # Binary search: quantities may be a range of millions
+        index = bisect_left(quantities, fixed_costs / net)
+        return quantities[index] if index < len(quantities) else None
+    if net == 0 and fixed_costs <= 0:
+        return quantities[0]
+    return None
+
+
+class ScenarioGrid:
+    def __init__(self, quantities, price_changes=(0.0,), expense_scales=(1.0,), fixed_costs_cents=0,
+                 use_numpy=True):
+        # An ascending range stays a range: it is indexed and searched, never
+        # expanded into a list
+        if isinstance(quantities, range) and quantities.step > 0:
+            self.quantities = quantities
+        else:
+            self.quantities = sorted(int(q) for q in quantities)
+        if not self.quantities or self.quantities[0] < 0:
+            raise ValueError("Quantities must be a non-empty range of non-negative numbers.")
+        self.price_changes = [float(dp) for dp in price_changes]
+        self.expense_scales = [float(s) for s in expense_scales]
+        self.fixed_costs_cents = fixed_costs_cents
+        self.use_numpy = use_numpy and numpy_available()
+
+    @property
+    def shape(self):
+        return len(self.price_changes), len(self.expense_scales), len(self.quantities)
+
+    def profit_grid(self, price_cents, expense_cents, quantities=None):
+        """Profit in cents for every (price change, expense scale, quantity).
+
+        ``quantities`` limits the last axis to the quantities a caller shows,
+        e.g. only the largest; the default is every quantity of the grid.
+        """
+        quantities = self.quantities if quantities is None else quantities
+        if self.use_numpy:
+            prices = price_cents * (1 + np.asarray(self.price_changes))
+            expenses = expense_cents * np.asarray(self.expense_scales)
+            net = prices[:, None] - expenses[None, :]
+            return net[:, :, None] * np.asarray(quantities, dtype=np.float64) - self.fixed_costs_cents
+        grid = []
+        for dp in self.price_changes:
+            price = price_cents * (1 + dp)
+            grid.append([
+                array("d", [(price - expense_cents * scale) * q - self.fixed_costs_cents for q in quantities])
+                for scale in self.expense_scales
+            ])
+        return grid
+
+    def run(self, products):
+        """Evaluate every scenario for each (product_id, price_cents, expense_cents)."""
+        products = list(products)
+        if self.use_numpy:
+            return self._run_numpy(products)
+        return [self._run_array(*product) for product in products]
+
+    def _run_numpy(self, products):
+        ids = [product[0] for product in products]
+        prices = np.fromiter((product[1] for product in products), dtype=np.float64, count=len(products))
+        expenses = np.fromiter((product[2] for product in products), dtype=np.float64, count=len(products))
+        price_factors = 1 + np.asarray(self.price_changes)
+        scales = np.asarray(self.expense_scales)
+        n_price, n_scale = len(price_factors), len(scales)
+        chunk = max(1, CHUNK_CELLS // (n_price * n_scale))
+
+        best_index = np.empty(len(products), dtype=np.int64)
+        best_net = np.empty(len(products), dtype=np.float64)
+        buffer = np.empty((min(chunk, len(products)), n_price, n_scale), dtype=np.float64)
+        for start in range(0, len(products), chunk):
+            stop = start + chunk
+            # Scale prices and expenses first so only the subtraction runs
+            # over the full (products, price changes, expense scales) block,
+            # written into one reused buffer
+            scenario_prices = prices[start:stop, None] * price_factors
+            scenario_expenses = expenses[start:stop, None] * scales
+            net = buffer[:len(scenario_prices)]
+            np.subtract(scenario_prices[:, :, None], scenario_expenses[:, None, :], out=net)
+            flat = net.reshape(net.shape[0], -1)
+            best_index[start:stop] = flat.argmax(axis=1)
+            best_net[start:stop] = flat[np.arange(flat.shape[0]), best_index[start:stop]]
+
+        base_net = prices - expenses
+        base_break_even = self._break_even_numpy(base_net)
+        best_break_even = self._break_even_numpy(best_net)
+        best_price, best_scale = np.divmod(best_index, n_scale)
+        return [
+            ScenarioResult(ids[k], float(base_net[k]), self.price_changes[best_price[k]],
+                           self.expense_scales[best_scale[k]], float(best_net[k]),
+                           base_break_even[k], best_break_even[k])
+            for k in range(len(products))
+        ]
+
+    def _break_even_numpy(self, net):
+        fixed = float(self.fixed_costs_cents)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            needed = np.where(net > 0, fixed / net, np.inf)
+        needed[(net == 0) & (fixed <= 0)] = -np.inf
+        # Unreachable break-evens search to len(quantities) and map to None
+        quantities = self.quantities
+        if isinstance(quantities, range):
+            # First index at or above needed, computed rather than searched
+            with np.errstate(invalid="ignore"):
+                index = np.clip(np.ceil((needed - quantities.start) / quantities.step), 0, len(quantities))
+            index = index.astype(np.int64)
+        else:
+            index = np.searchsorted(np.asarray(quantities, dtype=np.float64), needed, side="left")
+        return [self.quantities[i] if i < len(self.quantities) else None for i in index]
+
+    def _run_array(self, product_id, price_cents, expense_cents):
+        best = None
+        for dp in self.price_changes:
+            price = price_cents * (1 + dp)
+            for scale in self.expense_scales:
+                net = price - expense_cents * scale
+                if best is None or net > best[0]:
+                    best = (net, dp, scale)
+        base_net = price_cents - expense_cents
+        return ScenarioResult(product_id, float(base_net), best[1], best[2], float(best[0]),
+                              _break_even(self.quantities, base_net, self.fixed_costs_cents),
+                              _break_even(self.quantities, best[0], self.fixed_costs_cents))
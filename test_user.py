@@ -1,4 +1,3 @@
-import sqlite3
 import os
 from user import User
 from database import Database
@@ -8,9 +7,7 @@ from ui import Ui
 # create a mock/in memory db for testing
 class TestDatabase(Database):
     def __init__(self):
-        self.conn = sqlite3.connect(":memory:")
-        self.cursor = self.conn.cursor()
-        self.create_tables()
+        super().__init__(":memory:")
 
 
 def interactive_login_test(user):
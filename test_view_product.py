@@ -1,4 +1,3 @@
-import sqlite3
 import unittest
 from product import Product
 from database import Database
@@ -8,9 +7,7 @@ from colorama import Fore, Style
 # Create a mock/in-memory db for testing
 class TestDatabase(Database):
     def __init__(self):
-        self.conn = sqlite3.connect(":memory:")
-        self.cursor = self.conn.cursor()
-        self.create_tables()
+        super().__init__(":memory:")
 
 
 def interactive_view_products_test(db, user_id):
@@ -38,26 +35,26 @@ def main():
     user3_id = db.fetch_one("SELECT id FROM users WHERE username = ?", ("user3",))[0]
     # Add products for user1
     db.execute_query(
-        "INSERT INTO products (user_id, name, price) VALUES (?, ?, ?)",
-        (user1_id, "Juice", 12),
+        "INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+        (user1_id, "Juice", 1200),
     )
     db.execute_query(
-        "INSERT INTO products (user_id, name, price) VALUES (?, ?, ?)",
-        (user1_id, "Chips", 10),
+        "INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+        (user1_id, "Chips", 1000),
     )
     db.execute_query(
-        "INSERT INTO products (user_id, name, price) VALUES (?, ?, ?)",
-        (user1_id, "Lollipop", 1.5),
+        "INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+        (user1_id, "Lollipop", 150),
     )
 
     # Add products for user2
     db.execute_query(
-        "INSERT INTO products (user_id, name, price) VALUES (?, ?, ?)",
-        (user2_id, "Cellphone", 200),
+        "INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+        (user2_id, "Cellphone", 20000),
     )
     db.execute_query(
-        "INSERT INTO products (user_id, name, price) VALUES (?, ?, ?)",
-        (user2_id, "Charger", 66),
+        "INSERT INTO products (user_id, name, price_cents) VALUES (?, ?, ?)",
+        (user2_id, "Charger", 6600),
     )
 
     while True:
@@ -1,69 +1,139 @@
-import os
+import sys
+import threading
+from contextlib import contextmanager
 from colorama import Fore, Back, Style, init
 
 # Initialize colorama
 init(autoreset=True)
 
+# ANSI "erase display" + "cursor home"; colorama translates it on Windows
+CLEAR_SCREEN = "\033[2J\033[H"
+
+
 class Ui:
+    # Output collected by each thread's open screen() block
+    _local = threading.local()
+
+    @classmethod
+    @contextmanager
+    def screen(cls):
+        """Collect everything displayed in the block and write it with a single
+        sys.stdout.write when the block ends. Close the block before prompting
+        for input so the prompt appears after the screen."""
+        local = cls._local
+        if getattr(local, "buffer", None) is not None:
+            yield  # Nested screens join the outer one
+            return
+        local.buffer = []
+        try:
+            yield
+        finally:
+            text, local.buffer = "".join(local.buffer), None
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+    @classmethod
+    def write(cls, text):
+        buffer = getattr(cls._local, "buffer", None)
+        if buffer is not None:
+            buffer.append(text)
+        else:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
     @staticmethod
     def clear_screen():
-        os.system("cls" if os.name == "nt" else "clear")
+        Ui.write(CLEAR_SCREEN)
 
     @staticmethod
     def display_header(title):
-        Ui.clear_screen()
-        print(Fore.CYAN + "╒" + "═" * 58 + "╕")
-        print(Fore.CYAN + "│" + Fore.YELLOW + f" {title.upper()} ".center(58) + Fore.CYAN + "│")
-        print(Fore.CYAN + "╘" + "═" * 58 + "╛\n")
+        Ui.write(
+            CLEAR_SCREEN
+            + Fore.CYAN + "╒" + "═" * 58 + "╕\n"
+            + Fore.CYAN + "│" + Fore.YELLOW + f" {title.upper()} ".center(58) + Fore.CYAN + "│\n"
+            + Fore.CYAN + "╘" + "═" * 58 + "╛\n\n"
+        )
 
     @staticmethod
     def display_options(options):
-        print(Fore.BLUE + "┌──────────────────────────────────────────────┐")
+        lines = [Fore.BLUE + "┌──────────────────────────────────────────────┐"]
         for index, option in enumerate(options, start=1):
             opt_text = f" {index}. {option} "
-            print(Fore.BLUE + "│" + Fore.CYAN + opt_text.ljust(46) + Fore.BLUE + "│")
-        print(Fore.BLUE + "└──────────────────────────────────────────────┘\n")
+            lines.append(Fore.BLUE + "│" + Fore.CYAN + opt_text.ljust(46) + Fore.BLUE + "│")
+        lines.append(Fore.BLUE + "└──────────────────────────────────────────────┘\n")
+        Ui.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def display_lines(lines, color=Fore.CYAN):
+        Ui.write("".join(color + line + "\n" for line in lines))
+
+    @staticmethod
+    def display_separator():
+        Ui.write(Fore.YELLOW + "-" * 60 + "\n")
 
     @staticmethod
     def styled_input(prompt):
         return input(Fore.BLUE + "➤ " + Fore.MAGENTA + prompt)
 
+    @staticmethod
+    def page_navigation(page):
+        # Returns "next" or "prev" when the user wants another page, None when done
+        if not (page.has_prev or page.has_next):
+            return None
+        options = []
+        if page.has_prev:
+            options.append("[P]revious")
+        if page.has_next:
+            options.append("[N]ext")
+        choice = input(Fore.BLUE + " / ".join(options) + " page, or Enter to continue: ").strip().lower()
+        if choice == "n" and page.has_next:
+            return "next"
+        if choice == "p" and page.has_prev:
+            return "prev"
+        return None
+
     @staticmethod
     def display_success(message):
-        print(Fore.GREEN + "✔ " + message)
-        print(Fore.GREEN + "─" * 60)
+        Ui.write(Fore.GREEN + "✔ " + message + "\n" + Fore.GREEN + "─" * 60 + "\n")
 
     @staticmethod
     def display_error(message):
-        print(Fore.RED + "✖ " + message)
-        print(Fore.RED + "─" * 60)
+        Ui.write(Fore.RED + "✖ " + message + "\n" + Fore.RED + "─" * 60 + "\n")
 
     @staticmethod
     def display_table(headers, data):
         if not data:
             return
-            
+
+        # Format every cell once; widths and the rows below reuse the strings
+        rows = [[str(item) for item in row] for row in data]
+
         # Calculate column widths
         col_widths = [len(header) for header in headers]
-        for row in data:
+        for row in rows:
             for i, item in enumerate(row):
-                col_widths[i] = max(col_widths[i], len(str(item)))
-                
+                if len(item) > col_widths[i]:
+                    col_widths[i] = len(item)
+
         # Create format string
         header_format = "│".join([Fore.BLUE + " %-{}s ".format(w) for w in col_widths])
-        row_format = "│".join([Fore.CYAN + " %-{}s ".format(w) for w in col_widths])
-        
-        # Print table
-        print(Fore.BLUE + "┌" + "┬".join(["─" * (w+2) for w in col_widths]) + "┐")
-        print(Fore.BLUE + "│" + header_format % tuple(headers) + Fore.BLUE + "│")
-        print(Fore.BLUE + "├" + "┼".join(["─" * (w+2) for w in col_widths]) + "┤")
-        for row in data:
-            print(Fore.BLUE + "│" + row_format % tuple(row) + Fore.BLUE + "│")
-        print(Fore.BLUE + "└" + "┴".join(["─" * (w+2) for w in col_widths]) + "┘")
+        row_format = Fore.BLUE + "│" + "│".join([Fore.CYAN + " %-{}s ".format(w) for w in col_widths]) + Fore.BLUE + "│\n"
+
+        # Build the whole table, then write it once
+        lines = [
+            Fore.BLUE + "┌" + "┬".join(["─" * (w+2) for w in col_widths]) + "┐\n",
+            Fore.BLUE + "│" + header_format % tuple(headers) + Fore.BLUE + "│\n",
+            Fore.BLUE + "├" + "┼".join(["─" * (w+2) for w in col_widths]) + "┤\n",
+        ]
+        lines.extend(row_format % tuple(row) for row in rows)
+        lines.append(Fore.BLUE + "└" + "┴".join(["─" * (w+2) for w in col_widths]) + "┘\n")
+        Ui.write("".join(lines))
 
     @staticmethod
     def display_box(message, color=Fore.GREEN):
         box_width = len(message) + 4
-        print(color + "╭" + "─" * box_width + "╮")
-        print(color + "│  " + message + "  │")
-        print(color + "╰" + "─" * box_width + "╯")
+        Ui.write(
+            color + "╭" + "─" * box_width + "╮\n"
+            + color + "│  " + message + "  │\n"
+            + color + "╰" + "─" * box_width + "╯\n"
+        )
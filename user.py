@@ -1,5 +1,5 @@
 from ui import Ui
-import sqlite3
+from services import UserService, XpenceError
 from colorama import Fore
 
 
@@ -10,41 +10,35 @@ class User:
         self.username = username
         self.password = password
         self.id = None
+        self.service = UserService(db)
 
     def register(self):
         Ui.display_header("Register")
         self.username = input(Fore.BLUE + "Enter a username: ").strip()
         self.password = input(Fore.BLUE + "Enter a password: ").strip()
 
-        if not self.username:
-            Ui.display_error("Username cannot be empty.")
-            return
-        if not self.password:
-            Ui.display_error("Password cannot be empty.")
-            return
-
         try:
-            self.db.execute_query(
-                "INSERT INTO users (username, password) VALUES (?, ?)",
-                (self.username, self.password),
-            )
+            self.service.register(self.username, self.password)
             Ui.display_success("Registration successful! You can now log in.")
-        except sqlite3.IntegrityError:
-            Ui.display_error("Username already exists. Try a different one.")
+        except XpenceError as e:
+            Ui.display_error(str(e))
 
     def login(self):
         Ui.display_header("Login")
         self.username = input(Fore.BLUE + "Enter your username: ")
         self.password = input(Fore.BLUE + "Enter your password: ")
-        user = self.db.fetch_one(
-            "SELECT id FROM users WHERE username = ? AND password = ?",
-            (self.username, self.password),
-        )
-        if user:
-            self.id = user[0]
+        if self.authenticate(self.username, self.password):
             Ui.display_success("Login successful!")
             return True
         else:
             Ui.display_error("Invalid credentials. Try again.")
             input(Fore.YELLOW + "Press Enter to continue...")
             return False
+
+    def authenticate(self, username, password):
+        """Check the credentials and set self.id on success."""
+        try:
+            self.id = self.service.login(username, password)
+        except XpenceError:
+            return False
+        return True